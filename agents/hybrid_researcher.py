@@ -0,0 +1,347 @@
+"""
+Agente Híbrido - RAG interno + busca web concorrentes por subtópico
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from state import ResearchState, pending_subtopics
+from config import Config
+from vector_store import search_documents, retrieved_doc_chars
+from agents.web_searcher import search_web_simple, source_content, PASSAGE_SEPARATOR
+from utils.web_fetcher import deep_fetch_results
+from checkpointing import load_completed_subtopics, record_subtopic_result
+from events import emit_subtopic_done
+from scheduler import llm_budget, skipped_result, BudgetExhausted
+from utils.evidence import EvidencePool, repeat_excerpt, source_record
+from context_compression import compress_passages
+from prefetch import prefetched_candidates
+
+def merge_evidence(
+    internal_docs: List[str],
+    web_results: List[Dict],
+    budget_chars: int,
+    max_chars_per_item: int = 500,
+    max_chars_internal: Optional[int] = None,
+    max_chars_passages: Optional[int] = None,
+    repeat_chars: int = 200,
+    query: Optional[str] = None,
+    embeddings=None
+) -> List[Dict]:
+    """
+    Junta evidências internas e web num único ranking e corta no orçamento de contexto
+
+    Com `query` e `embeddings`, todas as evidências (das duas fontes) são
+    pontuadas pela similaridade de cosseno com a query num único batch, e as
+    mais relevantes entram primeiro. Sem embeddings, as listas são intercaladas
+    por posição (Doc 1, Web 1, Doc 2, ...): nenhuma comparação entre fontes.
+
+    Args:
+        internal_docs: Chunks do FAISS (ordenados por relevância)
+        web_results: Resultados web (ordenados por relevância)
+        budget_chars: Tamanho máximo total do contexto
+        max_chars_per_item: Tamanho máximo de cada evidência
+        max_chars_internal: Tamanho máximo de cada chunk interno (None = max_chars_per_item)
+        max_chars_passages: Tamanho máximo de um resultado web com trechos do
+            deep fetch (None = max_chars_per_item)
+        repeat_chars: Tamanho máximo de fontes já analisadas em outro subtópico
+            (resultados com `repeat`, vindos do EvidencePool)
+        query: Subtópico (pontuação por relevância)
+        embeddings: Modelo de embeddings (pontuação por relevância)
+
+    Returns:
+        List[Dict]: [{"label", "kind", "content", "title", "url", "source"}, ...]
+    """
+    candidates = []
+
+    for rank, doc in enumerate(internal_docs):
+        candidates.append({
+            "kind": "internal",
+            "content": doc,
+            "max_chars": max_chars_internal or max_chars_per_item,
+            "rank": rank
+        })
+
+    for rank, result in enumerate(web_results):
+        content = source_content(result)
+        # Trechos do deep fetch já foram selecionados: cortar em 500 caracteres descartaria quase todos
+        max_chars = (max_chars_passages or max_chars_per_item) if result.get("passages") else max_chars_per_item
+        if result.get("repeat"):
+            content = f"(already analyzed for another subtopic) {repeat_excerpt(content, repeat_chars)}"
+        candidates.append({
+            "kind": "web",
+            "content": content,
+            "max_chars": max_chars,
+            "title": result['title'],
+            "url": result['url'],
+            "source": result,
+            "rank": rank
+        })
+
+    if query and embeddings is not None and candidates:
+        vectors = np.asarray(
+            embeddings.embed_documents([query] + [item["content"][:item["max_chars"]] for item in candidates]),
+            dtype=np.float32
+        )
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        for item, score in zip(candidates, vectors[1:] @ vectors[0]):
+            item["score"] = float(score)
+        candidates.sort(key=lambda item: item["score"], reverse=True)
+    else:
+        # Ordenação estável: mesma posição alterna interno/web
+        candidates.sort(key=lambda item: item["rank"])
+
+    selected = []
+    used = 0
+    doc_count = 0
+    source_count = 0
+
+    for item in candidates:
+        remaining = budget_chars - used
+        if remaining < 100:
+            break
+
+        content = item["content"][:min(item["max_chars"], remaining)]
+        if not content.strip():
+            continue
+
+        if item["kind"] == "internal":
+            doc_count += 1
+            item["label"] = f"Doc {doc_count}"
+        else:
+            source_count += 1
+            item["label"] = f"Source {item['source'].get('source_id', source_count)}"
+
+        item["content"] = content
+        used += len(content)
+        selected.append(item)
+
+    return selected
+
+def create_hybrid_researcher_agent(llm, vectorstore, config: Config, embeddings=None, checkpoint_store=None, scheduler=None, compressor=None, prefetch_cache=None):
+    """
+    Cria agente que pesquisa cada subtópico no FAISS e na web ao mesmo tempo
+    e faz UMA análise com o LLM sobre as evidências combinadas
+
+    Se `checkpoint_store` for fornecido, subtópicos já concluídos no run são reaproveitados.
+    Se `scheduler` for fornecido, contexto e chamadas ao LLM respeitam o orçamento da execução
+    Se `compressor` for fornecido, só as sentenças mais relevantes de cada evidência vão ao prompt
+    Se `prefetch_cache` for fornecido, subtópicos cobertos pelo prefetch não buscam de novo no FAISS
+    """
+
+    HYBRID_RESEARCH_PROMPT = """You are an experienced researcher tasked with investigating a specific subtopic using internal documents and web search results.
+
+            SUBTOPIC:
+            {subtopic}
+
+            EVIDENCE (internal documents and web sources):
+            {context}
+
+            Your task: Extract all relevant information about the subtopic from the evidence.
+            Respond objectively and directly. Cite evidence when relevant (Doc 1, Source 1, etc).
+            If no useful information is found, state clearly.
+
+            ANALYSIS:"""
+
+    def _scaled(value: int) -> int:
+        return scheduler.scale_count(value) if scheduler is not None else value
+
+    def _retrieve(subtopic: str, evidence_pool: EvidencePool, stop: threading.Event, prefetched_docs=None):
+        """
+        Busca no FAISS e na web em paralelo (só na web se o prefetch já trouxe os documentos)
+
+        Os resultados web são registrados no pool antes do deep fetch: fontes já
+        vistas em outro subtópico não são baixadas de novo. Retorna None sem
+        buscar se o orçamento já acabou (`stop` ou scheduler); com `stop` marcado
+        durante a busca, o deep fetch não é feito.
+        """
+        if stop.is_set() or (scheduler is not None and not scheduler.can_start_subtopic()):
+            return None
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            if prefetched_docs is None:
+                internal_future = executor.submit(
+                    search_documents, vectorstore, subtopic, _scaled(config.top_k_retrieval)
+                )
+            web_future = executor.submit(
+                search_web_simple, subtopic, _scaled(config.web_max_results), config.verbose
+            )
+            if prefetched_docs is None:
+                docs = internal_future.result()
+            else:
+                docs = prefetched_docs[:_scaled(config.top_k_retrieval)]
+            search_results = web_future.result()
+
+        entries = evidence_pool.register(search_results)
+        new_entries = [entry for entry in entries if not entry["repeat"]]
+        if config.deep_fetch and embeddings is not None and new_entries and not stop.is_set():
+            fetched = deep_fetch_results(subtopic, new_entries, embeddings, config, verbose=config.verbose)
+            by_id = {entry["source_id"]: entry for entry in fetched}
+            entries = [by_id.get(entry["source_id"], entry) for entry in entries]
+        return docs, entries
+
+    def hybrid_researcher_node(state: ResearchState) -> dict:
+        """
+        Node híbrido: recupera evidências de todos os subtópicos em paralelo,
+        depois analisa cada subtópico com uma única chamada ao LLM
+        """
+        if config.verbose:
+            print("\n" + "="*70)
+            print("HYBRID RESEARCHERS - RAG interno + Internet")
+            print("="*70)
+
+        subtopics = pending_subtopics(state)
+        results = []
+        completed = load_completed_subtopics(checkpoint_store, state)
+        
+        # Fontes web únicas da execução: repetidas entre subtópicos vão resumidas
+        evidence_pool = EvidencePool(near_duplicate_threshold=config.evidence_near_duplicate_threshold)
+        # Fontes das rodadas anteriores (estado) e do checkpoint mantêm seus IDs
+        evidence_pool.seed(state.get("subagent_results", []) + list(completed.values()))
+        
+        pending = [subtopic for subtopic in subtopics if subtopic not in completed]
+
+        prefetched, trace = prefetched_candidates(
+            prefetch_cache, state, "hybrid_researcher", pending, config.top_k_retrieval, verbose=config.verbose
+        )
+
+        # Recuperação concorrente de todos os subtópicos pendentes; a análise de
+        # cada subtópico começa assim que a sua recuperação termina. Quando o
+        # orçamento acaba, `stop` impede novas buscas e deep fetches em segundo plano
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=max(1, len(pending)))
+        retrievals = {
+            subtopic: executor.submit(_retrieve, subtopic, evidence_pool, stop, prefetched.get(subtopic))
+            for subtopic in pending
+        }
+
+        def _stop_retrievals():
+            """Sem orçamento: cancela as recuperações que não começaram e interrompe as demais"""
+            stop.set()
+            for future in retrievals.values():
+                future.cancel()
+
+        for i, subtopic in enumerate(subtopics, 1):
+            if subtopic in completed:
+                if config.verbose:
+                    print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic} (retomado do checkpoint)")
+                results.append(completed[subtopic])
+                emit_subtopic_done(results[-1])
+                continue
+
+            if scheduler is not None and not scheduler.can_start_subtopic():
+                _stop_retrievals()
+                if config.verbose:
+                    print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic} (pulado: orçamento esgotado)")
+                results.append(skipped_result(subtopic))
+                emit_subtopic_done(results[-1])
+                continue
+
+            if config.verbose:
+                print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic}")
+
+            try:
+                retrieval = retrievals[subtopic].result()
+                if retrieval is None:
+                    raise BudgetExhausted("Orçamento esgotado antes da recuperação")
+                docs, entries = retrieval
+
+                evidence = merge_evidence(
+                    docs,
+                    entries,
+                    budget_chars=_scaled(config.hybrid_context_chars),
+                    max_chars_internal=retrieved_doc_chars(config),
+                    max_chars_passages=config.fetch_top_passages * (config.fetch_chunk_chars + len(PASSAGE_SEPARATOR)),
+                    repeat_chars=config.evidence_repeat_chars,
+                    query=subtopic,
+                    embeddings=embeddings
+                )
+
+                # Trechos do deep fetch ficam só no prompt, não nas fontes salvas
+                web_sources = [source_record(item["source"]) for item in evidence if item["kind"] == "web"]
+
+                if config.verbose:
+                    print(f"{len(docs)} documentos + {len(entries)} resultados web → {len(evidence)} evidências no contexto")
+
+                if not evidence:
+                    results.append({
+                        "subtopic": subtopic,
+                        "research_findings": "No information found in internal documents or on the web for this question.",
+                        "web_sources": [],
+                        "status": "completed"
+                    })
+                    record_subtopic_result(checkpoint_store, state, results[-1])
+                    emit_subtopic_done(results[-1])
+                    continue
+
+                contents = compress_passages(
+                    compressor, subtopic, [item["content"] for item in evidence], verbose=config.verbose
+                )
+                for item, content in zip(evidence, contents):
+                    item["content"] = content
+
+                context_parts = []
+                for item in evidence:
+                    if item["kind"] == "web":
+                        context_parts.append(f"""
+{item['label']}:
+Title: {item['title']}
+URL: {item['url']}
+Content: {item['content']}
+""")
+                    else:
+                        context_parts.append(f"\n{item['label']}:\n{item['content']}\n")
+
+                context = "\n---\n".join(context_parts)
+
+                # Analisar com LLM (uma chamada por subtópico)
+                prompt = HYBRID_RESEARCH_PROMPT.format(
+                    subtopic=subtopic,
+                    context=context
+                )
+
+                with llm_budget(scheduler) as llm_kwargs:
+                    response = llm.invoke(prompt, **llm_kwargs)
+                findings = response.content if hasattr(response, 'content') else str(response)
+
+                if config.verbose:
+                    findings_preview = findings[:100].replace('\n', ' ')
+                    print(f"Análise: {findings_preview}...")
+
+                results.append({
+                    "subtopic": subtopic,
+                    "research_findings": findings,
+                    "web_sources": web_sources,
+                    "status": "completed"
+                })
+                record_subtopic_result(checkpoint_store, state, results[-1])
+                emit_subtopic_done(results[-1])
+
+            except BudgetExhausted:
+                # Orçamento acabou durante o subtópico: pulado, não falha
+                _stop_retrievals()
+                if config.verbose:
+                    print("Pulado: orçamento esgotado")
+                results.append(skipped_result(subtopic))
+                emit_subtopic_done(results[-1])
+
+            except Exception as e:
+                if config.verbose:
+                    print(f"Erro: {str(e)}")
+
+                results.append({
+                    "subtopic": subtopic,
+                    "research_findings": f"Error in hybrid research: {str(e)}",
+                    "web_sources": [],
+                    "status": "failed"
+                })
+                emit_subtopic_done(results[-1])
+
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        if config.verbose:
+            print(f"\n{len(results)} subtópicos pesquisados")
+
+        return {"subagent_results": results, "trace": trace}
+
+    return hybrid_researcher_node
@@ -0,0 +1,32 @@
+"""
+Agente de Prefetch - Recuperação especulativa em paralelo com o supervisor
+
+Roda logo no início da execução, ao mesmo tempo que o supervisor, e guarda
+no PrefetchCache os candidatos da pergunta original e de expansões por
+palavras-chave. Os researchers reaproveitam esse pool para os subtópicos
+cobertos por ele (ver prefetch.py).
+"""
+from state import ResearchState
+from config import Config
+from prefetch import PrefetchCache
+
+def create_prefetch_agent(vectorstore, prefetch_cache: PrefetchCache, config: Config):
+    """
+    Cria o node de prefetch (erros nunca interrompem a execução: os researchers
+    simplesmente buscam no índice)
+    """
+
+    def prefetch_node(state: ResearchState) -> dict:
+        try:
+            summary = prefetch_cache.prefetch(state["run_id"], state["user_question"], vectorstore)
+        except Exception as e:
+            if config.verbose:
+                print(f"\nErro no prefetch ({str(e)}), researchers vão buscar no índice")
+            return {"trace": [{"node": "prefetch", "event": "prefetch_failed", "error": str(e)}]}
+
+        if config.verbose:
+            print(f"\nPrefetch: {summary['candidates']} candidatos para {len(summary['queries'])} queries em {summary['seconds']}s")
+
+        return {"trace": [{"node": "prefetch", "event": "prefetch_ready", **summary}]}
+
+    return prefetch_node
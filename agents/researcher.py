@@ -1,13 +1,24 @@
 """
 Agente Pesquisador - Pesquisa um subtópico específico
 """
-from state import ResearchState, SubtopicState
+from state import ResearchState, SubtopicState, pending_subtopics
 from config import Config
-from vector_store import search_documents
+from vector_store import search_documents, retrieved_doc_chars
+from reranker import get_reranker
+from checkpointing import load_completed_subtopics, record_subtopic_result
+from events import emit_subtopic_done
+from scheduler import llm_budget, skipped_result, BudgetExhausted
+from context_compression import compress_passages
+from prefetch import prefetched_candidates
 
-def create_researcher_agent(llm, vectorstore, config: Config):
+def create_researcher_agent(llm, vectorstore, config: Config, checkpoint_store=None, scheduler=None, compressor=None, prefetch_cache=None):
     """
     Cria agente pesquisador que investiga um subtópico
+    
+    Se `checkpoint_store` for fornecido, subtópicos já concluídos no run são reaproveitados.
+    Se `scheduler` for fornecido, contexto e chamadas ao LLM respeitam o orçamento da execução
+    Se `compressor` for fornecido, só as sentenças mais relevantes de cada chunk vão ao prompt
+    Se `prefetch_cache` for fornecido, subtópicos cobertos pelo prefetch usam os candidatos já buscados
     """
     
     RESEARCH_PROMPT = """You are an experienced researcher tasked with investigating a specific subtopic by consulting provided internal documents.
@@ -23,6 +34,30 @@ def create_researcher_agent(llm, vectorstore, config: Config):
 
                         ANALYSIS:"""
 
+    reranker = get_reranker(config) if config.rerank else None
+    
+    def retrieve_with_rerank(subtopics: list, prefetched: dict) -> dict:
+        """
+        Over-fetch de candidatos para TODOS os subtópicos e reranking num único
+        passe batched do cross-encoder (candidatos do prefetch quando houver)
+        """
+        candidates = {
+            subtopic: prefetched.get(subtopic) or search_documents(vectorstore, subtopic, k=config.rerank_candidates)
+            for subtopic in subtopics
+        }
+        
+        reranked = reranker.rerank(
+            candidates,
+            top_n=config.rerank_top_n,
+            latency_budget=config.rerank_latency_budget
+        )
+        
+        if config.verbose:
+            total = sum(len(chunks) for chunks in candidates.values())
+            print(f"\nRerank: {total} candidatos → top-{config.rerank_top_n} por subtópico")
+        
+        return reranked
+    
     def researcher_node(state: ResearchState) -> dict:
         """
         Node pesquisador: pesquisa TODOS os subtópicos em paralelo
@@ -34,23 +69,68 @@ def create_researcher_agent(llm, vectorstore, config: Config):
             print("RESEARCHERS - Pesquisando subtópicos")
             print("="*70)
         
-        subtopics = state["subtopics"]
+        subtopics = pending_subtopics(state)
         results = []
+        completed = load_completed_subtopics(checkpoint_store, state)
+        pending = [subtopic for subtopic in subtopics if subtopic not in completed]
+        
+        # Candidatos do prefetch (já buscados enquanto o supervisor gerava os subtópicos)
+        prefetch_k = config.rerank_candidates if reranker is not None else config.top_k_retrieval
+        prefetched, trace = prefetched_candidates(
+            prefetch_cache, state, "researcher", pending, prefetch_k, verbose=config.verbose
+        )
+        
+        reranked = {}
+        if reranker is not None and pending:
+            try:
+                reranked = retrieve_with_rerank(pending, prefetched)
+            except Exception as e:
+                if config.verbose:
+                    print(f"Erro no rerank ({str(e)}), usando busca vetorial direta")
         
         for i, subtopic in enumerate(subtopics, 1):
+            if subtopic in completed:
+                if config.verbose:
+                    print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic} (retomado do checkpoint)")
+                results.append(completed[subtopic])
+                emit_subtopic_done(results[-1])
+                continue
+            
+            if scheduler is not None and not scheduler.can_start_subtopic():
+                if config.verbose:
+                    print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic} (pulado: orçamento esgotado)")
+                results.append(skipped_result(subtopic))
+                emit_subtopic_done(results[-1])
+                continue
+            
             if config.verbose:
                 print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic}")
             
+            # Sob pressão de tempo, menos chunks e chunks mais curtos
+            top_k = config.top_k_retrieval
+            doc_chars = retrieved_doc_chars(config)
+            if scheduler is not None:
+                top_k = scheduler.scale_count(top_k)
+                doc_chars = scheduler.scale_count(doc_chars)
+            
             try:
                 # Buscar documentos relevantes
-                docs = search_documents(
-                    vectorstore, 
-                    subtopic, 
-                    k=config.top_k_retrieval
-                )
+                if subtopic in reranked:
+                    docs = reranked[subtopic][:top_k]
+                elif subtopic in prefetched:
+                    docs = prefetched[subtopic][:top_k]
+                else:
+                    docs = search_documents(
+                        vectorstore, 
+                        subtopic, 
+                        k=top_k
+                    )
+                
+                # Sentenças relevantes antes do corte: o limite de caracteres perde menos informação
+                docs = compress_passages(compressor, subtopic, docs, verbose=config.verbose)
                 
                 context = "\n\n---\n\n".join([
-                    f"Doc {j+1}:\n{doc[:500]}"  # Limitar tamanho
+                    f"Doc {j+1}:\n{doc[:doc_chars]}"  # Limitar tamanho
                     for j, doc in enumerate(docs)
                 ])
                 
@@ -63,7 +143,8 @@ def create_researcher_agent(llm, vectorstore, config: Config):
                     context=context
                 )
                 
-                response = llm.invoke(prompt)
+                with llm_budget(scheduler) as llm_kwargs:
+                    response = llm.invoke(prompt, **llm_kwargs)
                 findings = response.content if hasattr(response, 'content') else str(response)
                 
                 if config.verbose:
@@ -75,7 +156,16 @@ def create_researcher_agent(llm, vectorstore, config: Config):
                     "research_findings": findings,
                     "status": "completed"
                 })
+                record_subtopic_result(checkpoint_store, state, results[-1])
+                emit_subtopic_done(results[-1])
                 
+            except BudgetExhausted:
+                # Orçamento acabou durante o subtópico: pulado, não falha
+                if config.verbose:
+                    print("Pulado: orçamento esgotado")
+                results.append(skipped_result(subtopic))
+                emit_subtopic_done(results[-1])
+
             except Exception as e:
                 if config.verbose:
                     print(f"Erro: {str(e)}")
@@ -85,11 +175,12 @@ def create_researcher_agent(llm, vectorstore, config: Config):
                     "research_findings": f"Erro na pesquisa: {str(e)}",
                     "status": "failed"
                 })
+                emit_subtopic_done(results[-1])
         
         if config.verbose:
             print(f"\n{len(results)} subtópicos pesquisados")
         
-        return {"subagent_results": results}
+        return {"subagent_results": results, "trace": trace}
     
     return researcher_node
 
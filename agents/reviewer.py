@@ -0,0 +1,197 @@
+"""
+Agente Revisor - Decide se a pesquisa precisa de mais uma rodada
+
+Depois de cada rodada de pesquisa, avalia os resultados e pede subtópicos de
+acompanhamento só para as lacunas. O loop para quando:
+- a rodada anterior trouxe pouca informação nova (novidade abaixo de
+  `config.novelty_threshold`, medida por distância de embeddings contra os
+  resultados anteriores)
+- `config.max_research_rounds` foi atingido
+- o orçamento do scheduler não comporta mais uma rodada
+- o LLM não encontra lacunas
+"""
+from typing import List
+import numpy as np
+from state import ResearchState
+from config import Config
+from scheduler import llm_budget
+from events import emit
+from agents.supervisor import parse_subtopics, deduplicate_subtopics
+from utils.evidence import jaccard, shingles
+
+def findings_novelty(new_findings: List[str], previous_findings: List[str], embeddings=None) -> float:
+    """
+    Novidade média dos novos resultados em relação aos anteriores
+
+    Para cada novo resultado: 1 - maior similaridade com um resultado anterior
+    (cosseno dos embeddings; sem embeddings, Jaccard de shingles de palavras).
+
+    Returns:
+        float: 0.0 (nada novo) a 1.0 (tudo novo)
+    """
+    if not new_findings:
+        return 0.0
+    if not previous_findings:
+        return 1.0
+
+    if embeddings is not None:
+        vectors = np.asarray(embeddings.embed_documents(new_findings + previous_findings), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = vectors[:len(new_findings)] @ vectors[len(new_findings):].T
+        closest = np.clip(similarity.max(axis=1), 0.0, 1.0)
+    else:
+        previous = [shingles(text) for text in previous_findings]
+        closest = np.array([
+            max(jaccard(shingles(text), other) for other in previous)
+            for text in new_findings
+        ])
+
+    return float(np.mean(1.0 - closest))
+
+def create_reviewer_agent(llm, config: Config, embeddings=None, scheduler=None):
+    """
+    Cria o agente revisor do loop pesquisa → revisão → pesquisa | síntese
+
+    Se `embeddings` for None, a novidade é medida por sobreposição de palavras e
+    os follow-ups só são deduplicados por texto igual; com embeddings, paráfrases de
+    subtópicos já pesquisados (similaridade >= `config.subtopic_dedup_threshold`)
+    também são descartadas.
+    Se `scheduler` for fornecido, uma nova rodada só começa se couber no orçamento
+    """
+
+    REVIEW_PROMPT = """You are an experienced research reviewer.
+
+            USER QUESTION:
+            {question}
+
+            RESEARCH DONE SO FAR:
+            {findings}
+
+            Your task: identify important GAPS - aspects of the user's question that the research above
+            does not answer or answers only superficially. For each gap, write one specific follow-up question.
+            Do not repeat questions that were already researched.
+            If the research already answers the question well, respond only with: NONE
+
+            ANSWER FORMAT (numbered list only, no explanations, at most {max_followups} lines):
+            1. [Specific follow-up question]
+            ...
+
+            FOLLOW-UP QUESTIONS:
+            """
+
+    def _stop(state: ResearchState, reason: str) -> dict:
+        if config.verbose:
+            print(f"\nPesquisa encerrada na rodada {state.get('research_round', 1)}: {reason}")
+        return {
+            "research_complete": True,
+            "reviewed_results": len(state["subagent_results"]),
+        }
+
+    def _budget_allows_round() -> bool:
+        if scheduler is None:
+            return True
+        calls = scheduler.remaining_calls()
+        # Revisor + pelo menos um subtópico + síntese
+        if calls is not None and calls < 3:
+            return False
+        return scheduler.can_start_subtopic()
+
+    def reviewer_node(state: ResearchState) -> dict:
+        """
+        Node revisor: avalia a rodada e gera subtópicos de acompanhamento
+        """
+        if config.verbose:
+            print("\n" + "="*70)
+            print("REVIEWER - Avaliando lacunas da pesquisa")
+            print("="*70)
+
+        results = state["subagent_results"]
+        research_round = state.get("research_round", 1)
+        reviewed = state.get("reviewed_results", 0)
+
+        # Novidade da última rodada (a primeira é sempre nova)
+        if research_round > 1:
+            new = [r["research_findings"] for r in results[reviewed:] if r["status"] == "completed"]
+            previous = [r["research_findings"] for r in results[:reviewed] if r["status"] == "completed"]
+            novelty = findings_novelty(new, previous, embeddings)
+            if config.verbose:
+                print(f"\nNovidade da rodada {research_round}: {novelty:.2f} (limite: {config.novelty_threshold})")
+            if novelty < config.novelty_threshold:
+                return _stop(state, "pouca informação nova")
+
+        if research_round >= config.max_research_rounds:
+            return _stop(state, "limite de rodadas atingido")
+        if not _budget_allows_round():
+            return _stop(state, "orçamento esgotado")
+
+        max_followups = config.max_followup_subtopics
+        if scheduler is not None:
+            max_followups = min(max_followups, scheduler.plan_subtopics(max_followups))
+
+        findings = "\n\n".join(
+            f"Q: {r['subtopic']}\nA: {r['research_findings']}"
+            for r in results
+        )
+        prompt = REVIEW_PROMPT.format(
+            question=state["user_question"],
+            findings=findings,
+            max_followups=max_followups
+        )
+
+        try:
+            with llm_budget(scheduler) as llm_kwargs:
+                response = llm.invoke(prompt, **llm_kwargs)
+        except Exception as e:
+            return _stop(state, f"erro na revisão ({str(e)})")
+        response_text = response.content if hasattr(response, 'content') else str(response)
+
+        existing = {subtopic.strip().lower() for subtopic in state["subtopics"]}
+        followups = [
+            subtopic for subtopic in parse_subtopics(response_text, max_followups)
+            if subtopic.strip().lower() not in existing
+        ]
+
+        # Paráfrase de um subtópico já pesquisado custaria outra pesquisa repetida
+        trace = []
+        if embeddings is not None and config.subtopic_dedup_threshold is not None and followups:
+            try:
+                followups, dropped = deduplicate_subtopics(
+                    followups, embeddings, config.subtopic_dedup_threshold, kept_before=state["subtopics"]
+                )
+            except Exception as e:
+                dropped = []
+                if config.verbose:
+                    print(f"Erro na deduplicação dos follow-ups: {str(e)}")
+            if dropped:
+                trace.append({"node": "reviewer", "event": "subtopics_deduplicated", "round": research_round + 1, "dropped": dropped})
+                if config.verbose:
+                    print(f"\n{len(dropped)} follow-up(s) duplicado(s) removido(s):")
+                    for item in dropped:
+                        print(f"   - {item['subtopic']} (≈ {item['duplicate_of']}, {item['similarity']:.2f})")
+
+        if not followups:
+            result = _stop(state, "nenhuma lacuna encontrada")
+            result["trace"] = trace
+            return result
+
+        if config.verbose:
+            print(f"\nRodada {research_round + 1}: {len(followups)} subtópicos de acompanhamento")
+            for topic in followups:
+                print(f"   + {topic}")
+
+        emit("subtopics_ready", subtopics=state["subtopics"] + followups, research_round=research_round + 1)
+        return {
+            "subtopics": state["subtopics"] + followups,
+            "research_round": research_round + 1,
+            "reviewed_results": len(results),
+            "research_complete": False,
+            "trace": trace,
+        }
+
+    return reviewer_node
+
+def route_after_review(researcher_name: str):
+    """Conditional edge: nova rodada de pesquisa ou síntese"""
+    def route(state: ResearchState) -> str:
+        return "synthesis" if state.get("research_complete") else researcher_name
+    return route
@@ -1,13 +1,78 @@
 """
 Agente Supervisor - Divide pergunta em subtópicos
 """
-from typing import List
+from typing import Dict, List, Tuple
+import numpy as np
 from state import ResearchState
 from config import Config
+from scheduler import llm_budget
+from events import emit
 
-def create_supervisor_agent(llm, config: Config):
+def parse_subtopics(response_text: str, limit: int) -> List[str]:
+    """Extrai os itens de uma lista numerada (ou com hífens) da resposta do LLM"""
+    subtopics = []
+    for line in response_text.split('\n'):
+        line = line.strip()
+        if line and (line[0].isdigit() or line.startswith('-')):
+            # Remove numeração
+            item = line.split('.', 1)[-1].strip()
+            item = item.lstrip('- ').strip()
+            if item and len(subtopics) < limit:
+                subtopics.append(item)
+    return subtopics
+
+def deduplicate_subtopics(
+    subtopics: List[str],
+    embeddings,
+    threshold: float,
+    kept_before: List[str] = None
+) -> Tuple[List[str], List[Dict]]:
+    """
+    Remove subtópicos quase iguais (paráfrases) com um único batch de embeddings
+    
+    Percorre na ordem gerada: um subtópico com similaridade de cosseno >= `threshold`
+    com outro já mantido é absorvido por ele.
+    
+    Args:
+        kept_before: Subtópicos já aceitos (comparados, mas não retornados)
+        
+    Returns:
+        Tuple: (subtópicos mantidos, [{"subtopic", "duplicate_of", "similarity"}, ...])
+    """
+    kept_before = kept_before or []
+    if not subtopics:
+        return [], []
+    
+    vectors = np.asarray(embeddings.embed_documents(kept_before + subtopics), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    
+    kept_indices = list(range(len(kept_before)))
+    kept = []
+    dropped = []
+    for offset, subtopic in enumerate(subtopics):
+        index = len(kept_before) + offset
+        if kept_indices:
+            similarities = vectors[kept_indices] @ vectors[index]
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                dropped.append({
+                    "subtopic": subtopic,
+                    "duplicate_of": (kept_before + subtopics)[kept_indices[best]],
+                    "similarity": round(float(similarities[best]), 3)
+                })
+                continue
+        kept_indices.append(index)
+        kept.append(subtopic)
+    
+    return kept, dropped
+
+def create_supervisor_agent(llm, config: Config, scheduler=None, embeddings=None):
     """
     Cria o agente supervisor que divide a pergunta em subtópicos
+    
+    Se `scheduler` for fornecido, o número de subtópicos é limitado pelo orçamento da execução
+    Se `embeddings` for fornecido, paráfrases (similaridade >= `config.subtopic_dedup_threshold`)
+    são removidas e, com `config.subtopic_replacements`, substituídas numa segunda chamada
     """
     
     SUPERVISOR_PROMPT = """You are an experienced research planner.
@@ -34,6 +99,77 @@ def create_supervisor_agent(llm, config: Config):
             SUBTOPICS:
             """
 
+    REPLACEMENT_PROMPT = """You are an experienced research planner.
+
+            USER QUESTION:
+            {question}
+
+            SUBTOPICS ALREADY PLANNED:
+            {planned}
+
+            Write {count} additional specific and independent questions about the user's question.
+            They must cover aspects NOT covered by the planned subtopics and must not paraphrase them.
+
+            ANSWER FORMAT (numbered list only, no explanations, exactly {count} lines):
+            1. [Specific question]
+            ...
+
+            SUBTOPICS:
+            """
+
+    def _can_request_replacements() -> bool:
+        if scheduler is None:
+            return True
+        calls = scheduler.remaining_calls()
+        # Substituição + pesquisa de um subtópico + síntese
+        return calls is None or calls >= 3
+    
+    def _deduplicate(question: str, subtopics: List[str]) -> Tuple[List[str], List[Dict]]:
+        """Remove paráfrases e (opcionalmente) pede substitutos só para as vagas liberadas"""
+        kept, dropped = deduplicate_subtopics(subtopics, embeddings, config.subtopic_dedup_threshold)
+        trace = []
+        if not dropped:
+            return kept, trace
+        
+        trace.append({"node": "supervisor", "event": "subtopics_deduplicated", "dropped": dropped})
+        if config.verbose:
+            print(f"\n{len(dropped)} subtópico(s) duplicado(s) removido(s):")
+            for item in dropped:
+                print(f"   - {item['subtopic']} (≈ {item['duplicate_of']}, {item['similarity']:.2f})")
+        
+        if not config.subtopic_replacements or not _can_request_replacements():
+            return kept, trace
+        
+        prompt = REPLACEMENT_PROMPT.format(
+            question=question,
+            planned="\n".join(f"- {subtopic}" for subtopic in kept),
+            count=len(dropped)
+        )
+        try:
+            with llm_budget(scheduler) as llm_kwargs:
+                response = llm.invoke(prompt, **llm_kwargs)
+        except Exception as e:
+            if config.verbose:
+                print(f"Erro ao pedir subtópicos substitutos: {str(e)}")
+            return kept, trace
+        response_text = response.content if hasattr(response, 'content') else str(response)
+        
+        # Substitutos também não podem repetir os mantidos (nem entre si)
+        candidates = parse_subtopics(response_text, len(dropped))
+        replacements, rejected = deduplicate_subtopics(
+            candidates, embeddings, config.subtopic_dedup_threshold, kept_before=kept
+        )
+        trace.append({
+            "node": "supervisor",
+            "event": "subtopics_replaced",
+            "replacements": replacements,
+            "rejected": rejected
+        })
+        if config.verbose and replacements:
+            print(f"{len(replacements)} subtópico(s) substituto(s) gerado(s)")
+        
+        return kept + replacements, trace
+
     def supervisor_node(state: ResearchState) -> dict:
         """
         Node supervisor: divide pergunta em subtópicos
@@ -45,39 +181,49 @@ def create_supervisor_agent(llm, config: Config):
         
         question = state["user_question"]
         
+        # Quantos subtópicos cabem no orçamento (deadline / chamadas ao LLM)
+        max_subagents = config.max_subagents
+        if scheduler is not None:
+            max_subagents = scheduler.plan_subtopics(config.max_subagents)
+            if config.verbose and max_subagents < config.max_subagents:
+                print(f"\nOrçamento: reduzindo de {config.max_subagents} para {max_subagents} subtópicos")
+        
         if config.verbose:
             print(f"\nPergunta: {question}")
-            print(f"Gerando {config.max_subagents} subtópicos...")
+            print(f"Gerando {max_subagents} subtópicos...")
         
         # LLM gera subtópicos
         prompt = SUPERVISOR_PROMPT.format(
             question=question,
-            max_subagents=config.max_subagents
+            max_subagents=max_subagents
         )
         
-        response = llm.invoke(prompt)
+        with llm_budget(scheduler) as llm_kwargs:
+            response = llm.invoke(prompt, **llm_kwargs)
         response_text = response.content if hasattr(response, 'content') else str(response)
         
         # Parse subtópicos
-        subtopics = []
-        for line in response_text.split('\n'):
-            line = line.strip()
-            if line and (line[0].isdigit() or line.startswith('-')):
-                # Remove numeração
-                item = line.split('.', 1)[-1].strip()
-                item = item.lstrip('- ').strip()
-                if item and len(subtopics) < config.max_subagents:
-                    subtopics.append(item)
+        subtopics = parse_subtopics(response_text, max_subagents)
         
         # Garantir que temos exatamente max_subagents
-        if len(subtopics) < config.max_subagents:
+        if len(subtopics) < max_subagents:
             print(f"Apenas {len(subtopics)} subtópicos gerados")
         
+        # Paráfrases custam uma pesquisa e uma chamada ao LLM cada: remover
+        trace = []
+        if embeddings is not None and config.subtopic_dedup_threshold is not None and len(subtopics) > 1:
+            try:
+                subtopics, trace = _deduplicate(question, subtopics)
+            except Exception as e:
+                if config.verbose:
+                    print(f"Erro na deduplicação de subtópicos: {str(e)}")
+        
         if config.verbose:
             print(f"\nSubtópicos gerados:")
             for i, topic in enumerate(subtopics, 1):
                 print(f"   {i}. {topic}")
         
-        return {"subtopics": subtopics}
+        emit("subtopics_ready", subtopics=subtopics)
+        return {"subtopics": subtopics, "trace": trace}
     
     return supervisor_node
\ No newline at end of file
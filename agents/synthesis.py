@@ -1,9 +1,13 @@
 from state import ResearchState, SubtopicState
 from config import Config
+from scheduler import llm_budget
+from events import emit, token_callback
 
-def create_synthesis_agent(llm, config: Config):
+def create_synthesis_agent(llm, config: Config, scheduler=None):
     """
     Cria agente de síntese que compila resultados em resposta única
+    
+    Se `scheduler` for fornecido, a chamada usa o tempo restante do deadline
     """
     
     SYNTHESIS_PROMPT = """You are an agent who answers complex questions by compiling results from multiple internal searches.
@@ -49,11 +53,24 @@ def create_synthesis_agent(llm, config: Config):
         question = state["user_question"]
         subagent_results = state["subagent_results"]
         
+        # Subtópicos sem resultado (ex: cancelados pelo orçamento) também são sinalizados
+        researched = {result['subtopic'] for result in subagent_results}
+        missing = [
+            {"subtopic": subtopic, "research_findings": "Not researched.", "status": "skipped"}
+            for subtopic in state.get("subtopics", [])
+            if subtopic not in researched
+        ]
+        
         # Formatar resultados da pesquisa
         research_results = []
         
-        for i, result in enumerate(subagent_results, 1):
-            status = "ENCONTRADO" if result['status'] == 'completed' else "❌ ERRO"
+        for i, result in enumerate(subagent_results + missing, 1):
+            if result['status'] == 'completed':
+                status = "ENCONTRADO"
+            elif result['status'] == 'skipped':
+                status = "NÃO PESQUISADO (orçamento esgotado)"
+            else:
+                status = "❌ ERRO"
             
             research_results.append(f"""
 PESQUISA {i} - {status}
@@ -73,7 +90,15 @@ Resultado: {result['research_findings']}
                 research_results=research_text
             )
             
-            response = llm.invoke(prompt)
+            # Com um sink de eventos ativo, a resposta sai em streaming ("tokens")
+            on_token = token_callback()
+            if on_token is not None and getattr(llm, "supports_token_callback", False):
+                llm_kwargs_stream = {"on_token": on_token}
+            else:
+                llm_kwargs_stream = {}
+            
+            with llm_budget(scheduler, "synthesis") as llm_kwargs:
+                response = llm.invoke(prompt, **llm_kwargs, **llm_kwargs_stream)
             final_answer = response.content if hasattr(response, 'content') else str(response)
             
             # Limpar resposta (remover markdown excessivo)
@@ -97,6 +122,7 @@ Resultado: {result['research_findings']}
             if config.verbose:
                 print(f"\n✅ Resposta compilada ({len(final_answer)} caracteres)")
             
+            emit("final_answer", final_answer=final_answer)
             return {"final_answer": final_answer}
             
         except Exception as e:
@@ -110,6 +136,7 @@ Resultado: {result['research_findings']}
                 if result['status'] == 'completed':
                     fallback += f"{result['research_findings']}\n\n"
             
+            emit("final_answer", final_answer=fallback)
             return {"final_answer": fallback}
     
     return synthesis_node
\ No newline at end of file
@@ -1,63 +1,68 @@
 """
 Agente de Busca Web - Versão Simplificada
 """
-from state import ResearchState
+from state import ResearchState, pending_subtopics
 from config import Config
+from checkpointing import load_completed_subtopics, record_subtopic_result
+from events import emit_subtopic_done
+from scheduler import llm_budget, skipped_result, BudgetExhausted
+from search_providers import get_search_router
+from utils.evidence import EvidencePool, repeat_excerpt, source_record
+from context_compression import compress_passages
 
 def search_web_simple(query: str, max_results: int = 3, verbose: bool = False) -> list:
     """
-    Busca simples na web usando DDGS (DuckDuckGo)
+    Busca na web pelos provedores configurados (ver search_providers)
+    
+    Com vários provedores, consulta os mais rápidos ao mesmo tempo e usa o
+    primeiro que trouxer resultados suficientes.
     
     Returns:
         list: [{"title": str, "url": str, "snippet": str}, ...]
     """
-    try:
-        from ddgs import DDGS
-        
-        if verbose:
-            print(f"Query: {query[:60]}...")
-        
-        results = []
-        ddgs = DDGS()
-        
-        # Método correto: text(query, region='wt-wt', ...)
-        search_results = ddgs.text(
-            query,  # ← Apenas query como primeiro argumento
-            region='wt-wt',  # Worldwide
-            safesearch='moderate',
-            max_results=max_results
-        )
-        
-        # Processar resultados
-        for result in search_results:
-            results.append({
-                "title": result.get("title", "Sem título"),
-                "url": result.get("href", result.get("link", "")),
-                "snippet": result.get("body", result.get("snippet", ""))
-            })
-            
-            if len(results) >= max_results:
-                break
-        
-        if verbose:
-            print(f"{len(results)} resultados")
-        
-        return results
-    
-    except ImportError:
-        print("ERRO: Pacote 'ddgs' não instalado")
-        print("Execute: pip install ddgs")
-        return []
+    return get_search_router().search(query, max_results=max_results, verbose=verbose)
+
+def format_source(result: dict, label: str, repeat_chars: int, content: str = None) -> str:
+    """
+    Bloco de uma fonte no prompt; fontes já analisadas em outro subtópico vão resumidas
     
-    except Exception as e:
-        if verbose:
-            print(f"Erro na busca: {str(e)}")
-        return []
+    `content` substitui o conteúdo do resultado (ex: versão comprimida)
+    """
+    if content is None:
+        content = source_content(result)
+    if result.get("repeat"):
+        content = f"(already analyzed for another subtopic) {repeat_excerpt(content, repeat_chars)}"
+    return f"""
+{label}:
+Title: {result['title']}
+URL: {result['url']}
+Content: {content}
+"""
 
-def create_web_searcher_agent(llm, config: Config):
+# Separador entre trechos do deep fetch de uma mesma página
+PASSAGE_SEPARATOR = "\n[...]\n"
+
+def source_content(result: dict) -> str:
+    """Conteúdo de um resultado para o prompt: trechos da página (deep fetch) ou snippet"""
+    passages = result.get("passages")
+    if passages:
+        return PASSAGE_SEPARATOR.join(passages)
+    return result['snippet']
+
+def create_web_searcher_agent(llm, config: Config, embeddings=None, checkpoint_store=None, scheduler=None, compressor=None):
     """
     Cria agente que pesquisa na web (igual ao researcher, mas usa web search)
+    
+    Se `config.deep_fetch` e `embeddings` forem fornecidos, baixa as páginas completas
+    e envia ao LLM apenas os trechos mais relevantes de cada uma.
+    Se `checkpoint_store` for fornecido, subtópicos já concluídos no run são reaproveitados.
+    Se `scheduler` for fornecido, nº de resultados e chamadas ao LLM respeitam o orçamento da execução
+    Se `compressor` for fornecido, só as sentenças mais relevantes de cada fonte vão ao prompt
+    
+    Fontes repetidas entre subtópicos (mesma URL canônica ou snippet quase idêntico)
+    são analisadas por completo só na primeira vez.
     """
+    from utils.web_fetcher import deep_fetch_results
     
     WEB_RESEARCH_PROMPT = """You are an experienced researcher tasked with investigating a specific subtopic using web search results.
 
@@ -82,21 +87,41 @@ def create_web_searcher_agent(llm, config: Config):
             print("WEB SEARCHERS - Pesquisando na Internet")
             print("="*70)
         
-        subtopics = state["subtopics"]
+        subtopics = pending_subtopics(state)
         results = []
+        completed = load_completed_subtopics(checkpoint_store, state)
+        
+        # Fontes únicas da execução (IDs S1, S2, ... estáveis entre subtópicos)
+        evidence_pool = EvidencePool(near_duplicate_threshold=config.evidence_near_duplicate_threshold)
+        # Fontes das rodadas anteriores (estado) e do checkpoint mantêm seus IDs
+        evidence_pool.seed(state.get("subagent_results", []) + list(completed.values()))
         
         for i, subtopic in enumerate(subtopics, 1):
+            if subtopic in completed:
+                if config.verbose:
+                    print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic} (retomado do checkpoint)")
+                results.append(completed[subtopic])
+                emit_subtopic_done(results[-1])
+                continue
+            
+            if scheduler is not None and not scheduler.can_start_subtopic():
+                if config.verbose:
+                    print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic} (pulado: orçamento esgotado)")
+                results.append(skipped_result(subtopic))
+                emit_subtopic_done(results[-1])
+                continue
+            
             if config.verbose:
                 print(f"\nSubtópico {i}/{len(subtopics)}: {subtopic}")
             
             try:
-                # Buscar na web (3 primeiros resultados)
+                # Buscar na web (primeiros resultados)
                 if config.verbose:
                     print(f"   🌐 Buscando na web...")
                 
                 search_results = search_web_simple(
                     subtopic, 
-                    max_results=3,
+                    max_results=scheduler.scale_count(config.web_max_results) if scheduler else config.web_max_results,
                     verbose=config.verbose
                 )
                 
@@ -110,22 +135,31 @@ def create_web_searcher_agent(llm, config: Config):
                         "web_sourcers": [],
                         "status": "completed"
                     })
+                    record_subtopic_result(checkpoint_store, state, results[-1])
+                    emit_subtopic_done(results[-1])
                     continue
                 
-                # Construir contexto com os resultados
-                context_parts = []
-                for j, result in enumerate(search_results, 1):
-                    context_parts.append(f"""
-Source {j}:
-Title: {result['title']}
-URL: {result['url']}
-Content: {result['snippet']}
-""")
+                entries = evidence_pool.register(search_results)
+                new_entries = [entry for entry in entries if not entry["repeat"]]
+                
+                # Deep fetch: páginas completas → trechos mais relevantes (só fontes novas)
+                if config.deep_fetch and embeddings is not None and new_entries:
+                    fetched = deep_fetch_results(subtopic, new_entries, embeddings, config, verbose=config.verbose)
+                    by_id = {entry["source_id"]: entry for entry in fetched}
+                    entries = [by_id.get(entry["source_id"], entry) for entry in entries]
                 
-                context = "\n---\n".join(context_parts)
+                # Construir contexto a partir do pool (rótulos, títulos e URLs fora da compressão)
+                contents = compress_passages(
+                    compressor, subtopic, [source_content(entry) for entry in entries], verbose=config.verbose
+                )
+                context = "\n---\n".join(
+                    format_source(entry, f"Source {entry['source_id']}", config.evidence_repeat_chars, content=content)
+                    for entry, content in zip(entries, contents)
+                )
                 
                 if config.verbose:
-                    print(f"{len(search_results)} resultados recuperados")
+                    repeated = len(entries) - len(new_entries)
+                    print(f"{len(search_results)} resultados recuperados ({repeated} já vistos em outros subtópicos)")
                 
                 # Analisar com LLM
                 prompt = WEB_RESEARCH_PROMPT.format(
@@ -133,7 +167,8 @@ Content: {result['snippet']}
                     context=context
                 )
                 
-                response = llm.invoke(prompt)
+                with llm_budget(scheduler) as llm_kwargs:
+                    response = llm.invoke(prompt, **llm_kwargs)
                 findings = response.content if hasattr(response, 'content') else str(response)
                 
                 if config.verbose:
@@ -144,10 +179,19 @@ Content: {result['snippet']}
                 results.append({
                     "subtopic": subtopic,
                     "research_findings": findings,
-                    "web_sources": search_results,
+                    "web_sources": [source_record(entry) for entry in entries],
                     "status": "completed"
                 })
+                record_subtopic_result(checkpoint_store, state, results[-1])
+                emit_subtopic_done(results[-1])
                 
+            except BudgetExhausted:
+                # Orçamento acabou durante o subtópico: pulado, não falha
+                if config.verbose:
+                    print("Pulado: orçamento esgotado")
+                results.append(skipped_result(subtopic))
+                emit_subtopic_done(results[-1])
+
             except Exception as e:
                 if config.verbose:
                     print(f"Erro: {str(e)}")
@@ -158,9 +202,14 @@ Content: {result['snippet']}
                     "web_sources": [], 
                     "status": "failed"
                 })
+                emit_subtopic_done(results[-1])
         
         if config.verbose:
             print(f"\n{len(results)} subtópicos pesquisados")
+            duplicates = evidence_pool.url_duplicates + evidence_pool.near_duplicates
+            if duplicates:
+                print(f"{len(evidence_pool)} fontes únicas ({evidence_pool.url_duplicates} URLs repetidas, "
+                      f"{evidence_pool.near_duplicates} quase duplicadas)")
         
         return {"subagent_results": results}
     
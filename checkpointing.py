@@ -0,0 +1,86 @@
+"""
+Checkpoint durável (SQLite) para retomar pesquisas interrompidas
+
+Dois níveis:
+- Checkpointer do LangGraph: estado do grafo salvo após cada node (supervisor,
+  pesquisa, síntese)
+- SubtopicCheckpointStore: cada subtópico concluído é salvo assim que termina,
+  então um crash no meio da pesquisa só refaz os subtópicos pendentes
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+def new_run_id() -> str:
+    """Gera ID de execução: YYYYMMDDHHMMSS_xxxxxx"""
+    return f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+def create_checkpointer(db_path: str):
+    """
+    Cria checkpointer SQLite do LangGraph
+
+    Raises:
+        ImportError: Se `langgraph-checkpoint-sqlite` não estiver instalado
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    return SqliteSaver(connection)
+
+class SubtopicCheckpointStore:
+    """
+    Resultados de subtópicos concluídos, por run_id
+
+    Thread-safe: uma conexão compartilhada protegida por lock.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS subtopic_results (
+                    run_id TEXT NOT NULL,
+                    subtopic TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (run_id, subtopic)
+                )
+                """
+            )
+
+    def load(self, run_id: str) -> Dict[str, dict]:
+        """Retorna subtópico → resultado salvo para o run"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT subtopic, result FROM subtopic_results WHERE run_id = ?",
+                (run_id,)
+            ).fetchall()
+        return {subtopic: json.loads(result) for subtopic, result in rows}
+
+    def save(self, run_id: str, result: dict):
+        """Salva (ou substitui) o resultado de um subtópico"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO subtopic_results (run_id, subtopic, result, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, result["subtopic"], json.dumps(result, ensure_ascii=False), datetime.now().isoformat())
+            )
+
+def load_completed_subtopics(store: Optional[SubtopicCheckpointStore], state: dict) -> Dict[str, dict]:
+    """Resultados já concluídos do run atual (vazio se checkpoint desativado)"""
+    run_id = state.get("run_id")
+    if store is None or not run_id:
+        return {}
+    return store.load(run_id)
+
+def record_subtopic_result(store: Optional[SubtopicCheckpointStore], state: dict, result: dict):
+    """Salva o resultado se o subtópico foi concluído (falhas são refeitas ao retomar)"""
+    run_id = state.get("run_id")
+    if store is None or not run_id or result.get("status") != "completed":
+        return
+    store.save(run_id, result)
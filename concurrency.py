@@ -0,0 +1,178 @@
+"""
+Recursos compartilhados entre execuções concorrentes do grafo
+
+Garantias para um processo servindo várias perguntas ao mesmo tempo:
+- Embeddings: tokenizers "fast" do HuggingFace não são thread-safe (erro
+  "Already borrowed" com chamadas simultâneas), então cada réplica do modelo
+  é usada por uma thread de cada vez. Chamadas simultâneas usam réplicas
+  diferentes (pool pequeno, criado sob demanda).
+- Vector store: buscas concorrentes no FAISS são seguras, mas `index.add`
+  (e o docstore do LangChain) durante uma busca não é. Leituras em paralelo,
+  escritas exclusivas (ReadWriteLock).
+- LLM: ResilientLLM, circuit breaker, pool de conexões e checkpoint store já
+  são protegidos por locks próprios.
+
+O scheduler de orçamento e o profiler são por execução e não devem ser
+compartilhados.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+class ReadWriteLock:
+    """
+    Lock de leitura/escrita com preferência para escritores
+
+    Vários leitores ao mesmo tempo; um escritor espera os leitores atuais
+    terminarem e bloqueia novos leitores até concluir (sem starvation de escrita).
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+class ThreadSafeEmbeddings(Embeddings):
+    """
+    Pool de réplicas de um modelo de embeddings: cada réplica (e seu tokenizer)
+    atende uma thread por vez
+
+    Args:
+        embeddings: Modelo já carregado (primeira réplica)
+        factory: Cria uma réplica nova (None = só a primeira: chamadas serializadas)
+        max_replicas: Réplicas no máximo; as extras só são criadas quando todas
+            as existentes estão ocupadas (uma execução sozinha nunca as carrega)
+
+    Atributos não cobertos (ex: `warmup`, `model_name`) são delegados ao modelo.
+    """
+
+    def __init__(self, embeddings, factory: Optional[Callable[[], Embeddings]] = None, max_replicas: int = 1):
+        self.embeddings = embeddings
+        self.factory = factory
+        self.max_replicas = max(1, max_replicas) if factory is not None else 1
+        self.replicas = 1
+
+        self._lock = threading.Lock()
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._idle.put(embeddings)
+
+    def __getattr__(self, item):
+        return getattr(self.embeddings, item)
+
+    def _new_replica(self):
+        """Réplica nova se ainda cabe no pool (None = esperar uma livre)"""
+        with self._lock:
+            if self.replicas >= self.max_replicas:
+                return None
+            self.replicas += 1
+        try:
+            return self.factory()
+        except Exception:
+            # Sem réplica extra (ex: modelo indisponível): segue com as atuais
+            with self._lock:
+                self.replicas -= 1
+                self.max_replicas = self.replicas
+            return None
+
+    @contextmanager
+    def _replica(self):
+        try:
+            replica = self._idle.get_nowait()
+        except queue.Empty:
+            replica = self._new_replica() or self._idle.get()
+        try:
+            yield replica
+        finally:
+            self._idle.put(replica)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._replica() as replica:
+            return replica.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._replica() as replica:
+            return replica.embed_query(text)
+
+class ThreadSafeVectorStore:
+    """
+    Vector store (FAISS ou ShardedVectorStore) com buscas em paralelo e
+    escritas exclusivas
+
+    Métodos de escrita do LangChain (`add_texts`, `add_documents`,
+    `add_embeddings`, `delete`, `merge_from`) passam pelo lock de escrita.
+    """
+
+    READ_METHODS = (
+        "similarity_search",
+        "similarity_search_with_score",
+        "similarity_search_by_vector",
+        "similarity_search_with_score_by_vector",
+        "max_marginal_relevance_search",
+        "batch_similarity_search",
+        "save_local",
+    )
+    WRITE_METHODS = ("add_texts", "add_documents", "add_embeddings", "delete", "merge_from")
+
+    def __init__(self, vectorstore):
+        self.vectorstore = vectorstore
+        self.lock = ReadWriteLock()
+
+    def __getattr__(self, item):
+        attribute = getattr(self.vectorstore, item)
+        if item in self.READ_METHODS:
+            return self._guarded(attribute, self.lock.read)
+        if item in self.WRITE_METHODS:
+            return self._guarded(attribute, self.lock.write)
+        return attribute
+
+    @staticmethod
+    def _guarded(method, acquire):
+        def guarded(*args, **kwargs):
+            with acquire():
+                return method(*args, **kwargs)
+        return guarded
+
+def make_thread_safe_embeddings(embeddings, factory: Optional[Callable[[], Embeddings]] = None, max_replicas: int = 1):
+    """Envolve o modelo em ThreadSafeEmbeddings (idempotente)"""
+    if embeddings is None or isinstance(embeddings, ThreadSafeEmbeddings):
+        return embeddings
+    return ThreadSafeEmbeddings(embeddings, factory=factory, max_replicas=max_replicas)
+
+def make_thread_safe_vectorstore(vectorstore):
+    """Envolve o vector store em ThreadSafeVectorStore (idempotente)"""
+    if vectorstore is None or isinstance(vectorstore, ThreadSafeVectorStore):
+        return vectorstore
+    return ThreadSafeVectorStore(vectorstore)
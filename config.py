@@ -1,31 +1,126 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
 @dataclass
 class Config:
     """Configurações do sistema de Deep Research"""
     
     # === MODELOS ===
+    llm_backend: str = "huggingface"     # Ver models.LLM_BACKENDS ("huggingface", "openai_compatible")
     llm_model: str = "meta-llama/Llama-3.2-3B-Instruct"
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = "huggingface"  # "huggingface", "onnx", "onnx_int8", "torch_int8"
+    embedding_batch_size: int = 64
+    embedding_threads: Optional[int] = None  # None = padrão do runtime
+    embedding_onnx_file: Optional[str] = None  # Sobrescreve o arquivo .onnx do modelo
+    embedding_warmup: bool = True
+    embedding_replicas: int = 2          # Cópias do modelo para chamadas simultâneas (extras só sob concorrência)
     hf_token: Optional[str] = None
     
+    # === SERVIDOR LOCAL (backend openai_compatible) ===
+    llm_base_url: str = "http://localhost:8000/v1"
+    llm_api_key: Optional[str] = None
+    llm_pool_size: int = 8               # Conexões keep-alive no pool
+    llm_max_concurrency: int = 8         # Requisições simultâneas ao servidor
+    
     # === RAG ===
     chunk_size: int = 1024
     chunk_overlap: int = 500
+    child_chunk_size: Optional[int] = None  # Small-to-big: filhos sem overlap deste tamanho (None = chunk_size/chunk_overlap)
+    parent_window_chars: int = 1000      # Small-to-big: janela do documento pai enviada por hit
     top_k_retrieval: int = 5
+    embedding_cache: bool = True         # Reaproveitar embeddings de chunks idênticos entre builds (float16)
+    max_cached_indexes: int = 4          # Variantes de índice (modelo/chunking) mantidas em disco (LRU)
+    vector_backend: str = "faiss"        # "faiss", "numpy_f16", "numpy_int8" (ver vector_store.VECTOR_BACKENDS)
+    shard_by_subdirectory: bool = False  # Um índice FAISS por subdiretório de data/
+    search_shards: Optional[List[str]] = None  # Shards consultados por padrão (None = todos)
+    shard_search_workers: int = 4        # Threads para buscar nos shards em paralelo
+    
+    # === RERANK (cross-encoder) ===
+    rerank: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 20          # Candidatos da busca vetorial por subtópico
+    rerank_top_n: int = 3                # Chunks mantidos por subtópico após o rerank
+    rerank_batch_size: int = 32
+    rerank_latency_budget: float = 2.0   # Segundos máximos de scoring por rodada
+    rerank_cache_dir: Optional[str] = None  # None = cache padrão do HuggingFace
+    
+    # === PREFETCH ESPECULATIVO (RAG interno / híbrido) ===
+    prefetch: bool = False               # Buscar candidatos da pergunta em paralelo com o supervisor
+    prefetch_expansions: int = 3         # Expansões por palavras-chave além da pergunta
+    prefetch_candidates: int = 20        # Chunks buscados por query pré-buscada
+    prefetch_min_similarity: float = 0.6  # Subtópico ↔ query pré-buscada para usar o pool
+    
+    # === WEB / HÍBRIDO ===
+    web_max_results: int = 3             # Resultados web por subtópico
+    hybrid_context_chars: int = 4000     # Orçamento de contexto (docs + web) por subtópico no modo híbrido
+    evidence_near_duplicate_threshold: float = 0.8  # Jaccard entre snippets para considerar a mesma fonte
+    evidence_repeat_chars: int = 200     # Trecho enviado de fontes já analisadas em outro subtópico
+    
+    # === PROVEDORES DE BUSCA (ver search_providers.SEARCH_PROVIDERS) ===
+    search_providers: Optional[List[str]] = None  # Ex: ["duckduckgo", "brave", "bing"] (None = ["ddgs"])
+    search_race_width: int = 2           # Provedores consultados ao mesmo tempo por busca
+    search_min_results: Optional[int] = None  # Resultados que encerram a corrida (None = web_max_results)
+    search_timeout: float = 10.0         # Segundos máximos de espera por busca
+    
+    # === COMPRESSÃO DE CONTEXTO ===
+    compress_context: bool = False       # Manter só as sentenças mais relevantes das evidências no prompt
+    compression_ratio: float = 0.5       # Fração do contexto mantida
+    compression_min_chars: int = 200     # Evidências menores que isso vão inteiras
+    
+    # === DEEP FETCH (páginas completas) ===
+    deep_fetch: bool = False             # Baixar páginas e usar os trechos mais relevantes no lugar do snippet
+    fetch_max_connections: int = 10      # Conexões simultâneas no total
+    fetch_per_host: int = 2              # Conexões simultâneas por host
+    fetch_timeout: float = 8.0           # Segundos por página
+    fetch_max_bytes: int = 2_000_000     # Bytes máximos lidos por página
+    fetch_chunk_chars: int = 600         # Tamanho dos trechos indexados
+    fetch_top_passages: int = 4          # Trechos enviados ao LLM por subtópico
     
     # === LLM ===
     temperature: float = 0.7
     max_tokens: int = 1024
     
+    # === RESILIÊNCIA LLM ===
+    llm_timeout: float = 120.0           # Deadline por tentativa (segundos)
+    llm_max_retries: int = 2             # Retries em erros transitórios (429, 5xx, timeout)
+    llm_backoff_base: float = 1.0        # Backoff exponencial: base * 2^tentativa
+    llm_backoff_max: float = 20.0
+    llm_hedge_percentile: Optional[float] = None  # Ex: 95.0 → duplica requisição após o p95 de latência
+    llm_hedge_min_samples: int = 10      # Amostras mínimas antes de ativar hedging
+    llm_max_workers: int = 8             # Threads para chamadas ao LLM
+    circuit_breaker_threshold: int = 5   # Falhas seguidas para abrir o circuito
+    circuit_breaker_reset: float = 30.0  # Segundos até testar o endpoint novamente
+    
+    # === RATE LIMIT (compartilhado por todos os agents/workers do processo) ===
+    llm_rate_limit: Optional[float] = None       # Requisições/s ao LLM (None = sem limite)
+    llm_rate_burst: int = 4
+    llm_rate_max_concurrent: Optional[int] = None  # Chamadas simultâneas ao LLM
+    search_rate_limit: Optional[float] = 1.0     # Buscas/s no DuckDuckGo
+    search_rate_burst: int = 3
+    search_rate_max_concurrent: Optional[int] = 3
+    rate_limit_state_dir: Optional[str] = None   # Pasta para compartilhar os buckets entre processos (POSIX)
+    
     # === SUPERVISOR ===
     max_subagents: int = 3  # Máximo de pesquisas paralelas
+    subtopic_dedup_threshold: Optional[float] = 0.9  # Cosseno a partir do qual subtópicos são paráfrases (None = não deduplicar)
+    subtopic_replacements: bool = False  # Pedir substitutos para as vagas dos duplicados (1 chamada extra)
+    dedup_subtopics_web: bool = False    # Modo web: carregar o modelo de embeddings só para deduplicar subtópicos
+    
+    # === PESQUISA ITERATIVA (reviewer) ===
+    max_research_rounds: int = 1         # Rodadas de pesquisa (1 = passada única, sem reviewer)
+    max_followup_subtopics: int = 2      # Subtópicos de acompanhamento por rodada
+    novelty_threshold: float = 0.15      # Novidade mínima (1 - similaridade) para continuar
+    
+    # === ORÇAMENTO (scheduler) ===
+    deadline: Optional[float] = None     # Segundos totais por execução (None = sem limite)
+    max_llm_calls: Optional[int] = None  # Chamadas ao LLM por execução (None = sem limite)
+    scheduler_call_estimate: float = 8.0 # Estimativa inicial da duração de uma chamada ao LLM
     
     # === DEBUG ===
     verbose: bool = True
     
     def __post_init__(self):
         """Validações"""
-        if self.hf_token is None:
+        if self.hf_token is None and self.llm_backend == "huggingface":
             print("AVISO: HF_TOKEN não configurado")
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Compressão extrativa do contexto antes das chamadas ao LLM
+
+Cada evidência (chunk, snippet ou trechos de página) é dividida em sentenças,
+todas as sentenças do subtópico são pontuadas contra ele num único batch de
+embeddings, e só as melhores ficam no prompt, na ordem original, até
+`config.compression_ratio` do tamanho. Os rótulos (Doc 1, Source S3), títulos e
+URLs ficam fora da compressão, então as citações continuam válidas.
+"""
+import math
+import re
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from config import Config
+
+# Fim de sentença: pontuação seguida de espaço, ou quebra de linha
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens sem tokenizer (~4 caracteres por token)"""
+    return math.ceil(len(text) / 4)
+
+class ContextCompressor:
+    """
+    Seleciona as sentenças mais relevantes de cada evidência (thread-safe)
+
+    Args:
+        embeddings: Modelo de embeddings (sentenças e subtópico no mesmo batch)
+        ratio: Fração do tamanho original mantida no total
+        min_chars: Evidências menores que isso não são comprimidas
+    """
+
+    def __init__(self, embeddings, ratio: float = 0.5, min_chars: int = 200):
+        self.embeddings = embeddings
+        self.ratio = ratio
+        self.min_chars = min_chars
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._original_tokens = 0
+        self._compressed_tokens = 0
+
+    def compress(self, query: str, passages: List[str]) -> List[str]:
+        """
+        Comprime as evidências de um prompt
+
+        Cada evidência mantém pelo menos sua melhor sentença (nenhum rótulo fica
+        vazio); o restante do orçamento vai para as sentenças de maior
+        similaridade com `query`, de qualquer evidência.
+
+        Returns:
+            List[str]: Evidências comprimidas, mesma ordem e quantidade de `passages`
+        """
+        sentences = []  # (evidência, posição, texto)
+        for index, passage in enumerate(passages):
+            if len(passage) < self.min_chars:
+                continue
+            for position, sentence in enumerate(split_sentences(passage)):
+                sentences.append((index, position, sentence))
+
+        if len(sentences) < 2:
+            self._record(passages, passages)
+            return list(passages)
+
+        vectors = np.asarray(
+            self.embeddings.embed_documents([query] + [sentence for _, _, sentence in sentences]),
+            dtype=np.float32
+        )
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scores = vectors[1:] @ vectors[0]
+
+        compressible = sum(len(passage) for passage in passages if len(passage) >= self.min_chars)
+        budget = self.ratio * compressible
+
+        order = [int(i) for i in np.argsort(-scores, kind="stable")]
+
+        # Melhor sentença de cada evidência sempre fica; o orçamento vai para as melhores no geral
+        best_per_passage = {}
+        for i in order:
+            best_per_passage.setdefault(sentences[i][0], i)
+        keep = set(best_per_passage.values())
+        used = sum(len(sentences[i][2]) for i in keep)
+
+        for i in order:
+            length = len(sentences[i][2])
+            if i not in keep and used + length <= budget:
+                keep.add(i)
+                used += length
+
+        kept: Dict[int, List[str]] = {}
+        for i in sorted(keep, key=lambda i: (sentences[i][0], sentences[i][1])):
+            kept.setdefault(sentences[i][0], []).append(sentences[i][2])
+
+        compressed = [
+            " ".join(kept[index]) if index in kept else passage
+            for index, passage in enumerate(passages)
+        ]
+        self._record(passages, compressed)
+        return compressed
+
+    def _record(self, original: List[str], compressed: List[str]):
+        with self._lock:
+            self._calls += 1
+            self._original_tokens += sum(estimate_tokens(text) for text in original)
+            self._compressed_tokens += sum(estimate_tokens(text) for text in compressed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            saved = self._original_tokens - self._compressed_tokens
+            return {
+                "prompts": self._calls,
+                "original_tokens": self._original_tokens,
+                "compressed_tokens": self._compressed_tokens,
+                "saved_tokens": saved,
+                "saved_fraction": round(saved / self._original_tokens, 3) if self._original_tokens else 0.0,
+            }
+
+def create_context_compressor(config: Config, embeddings) -> Optional[ContextCompressor]:
+    """ContextCompressor se `config.compress_context` estiver ativo e houver embeddings"""
+    if not config.compress_context or embeddings is None:
+        return None
+    return ContextCompressor(
+        embeddings,
+        ratio=config.compression_ratio,
+        min_chars=config.compression_min_chars
+    )
+
+def compress_passages(compressor: Optional[ContextCompressor], query: str, passages: List[str], verbose: bool = False) -> List[str]:
+    """`compressor.compress` ou as evidências sem alteração se não houver compressor"""
+    if compressor is None or not passages:
+        return passages
+    compressed = compressor.compress(query, passages)
+    if verbose:
+        before = sum(estimate_tokens(text) for text in passages)
+        after = sum(estimate_tokens(text) for text in compressed)
+        print(f"Compressão: ~{before} → ~{after} tokens de contexto")
+    return compressed
@@ -0,0 +1,129 @@
+"""
+Cache de embeddings endereçado por conteúdo (independente do índice FAISS)
+
+Chave = hash(modelo + texto do chunk). Mudanças de chunk_size/chunk_overlap,
+arquivos renomeados ou duplicados só embedam os chunks realmente novos.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+KEYS_FILENAME = "keys.txt"
+VECTORS_FILENAME = "vectors.f16"
+META_FILENAME = "meta.json"
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrapper de embeddings com cache persistente em float16
+
+    Arquivos em `cache_dir`:
+    - vectors.f16: matriz float16 (uma linha por chunk), só cresce
+    - keys.txt: hash de cada linha, na mesma ordem
+    - meta.json: modelo e dimensão
+
+    Implementa a interface de Embeddings do LangChain; `embed_query` não é cacheado.
+    """
+
+    def __init__(self, embeddings, model_name: str, cache_dir: str):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._stored = np.zeros((0, 0), dtype=np.float16)
+        self._new: List[np.ndarray] = []
+        self._dim = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def __getattr__(self, item):
+        return getattr(self.embeddings, item)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def _load(self):
+        if not os.path.exists(self._path(META_FILENAME)):
+            return
+
+        with open(self._path(META_FILENAME), 'r', encoding='utf-8') as f:
+            self._dim = json.load(f)["dim"]
+
+        keys_content = ""
+        if os.path.exists(self._path(KEYS_FILENAME)):
+            with open(self._path(KEYS_FILENAME), 'r', encoding='utf-8') as f:
+                keys_content = f.read()
+        # Só linhas completas: a última sem "\n" é uma escrita interrompida
+        keys = keys_content.split("\n")[:-1]
+
+        vector_bytes = os.path.getsize(self._path(VECTORS_FILENAME)) if os.path.exists(self._path(VECTORS_FILENAME)) else 0
+        row_bytes = self._dim * 2
+        rows = min(len(keys), vector_bytes // row_bytes)
+
+        # Vetores são gravados antes das chaves: após um crash entre as duas
+        # escritas, sobram linhas sem chave (ou chaves/linhas parciais). Cortar os
+        # dois arquivos em `rows` mantém linha N ↔ chave N para os próximos appends
+        if vector_bytes != rows * row_bytes:
+            with open(self._path(VECTORS_FILENAME), 'r+b') as f:
+                f.truncate(rows * row_bytes)
+        if len(keys) != rows or not keys_content.endswith("\n") and keys_content:
+            with open(self._path(KEYS_FILENAME), 'w', encoding='utf-8') as f:
+                f.write("".join(f"{key}\n" for key in keys[:rows]))
+
+        if rows:
+            self._stored = np.memmap(self._path(VECTORS_FILENAME), dtype=np.float16, mode='r', shape=(rows, self._dim))
+        self._rows = {key: row for row, key in enumerate(keys[:rows])}
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def _vector(self, row: int) -> np.ndarray:
+        stored = len(self._stored)
+        return self._stored[row] if row < stored else self._new[row - stored]
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+            with open(self._path(META_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump({"model": self.model_name, "dim": self._dim}, f)
+
+        with open(self._path(VECTORS_FILENAME), 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(self._path(KEYS_FILENAME), 'a', encoding='utf-8') as f:
+            f.write("".join(f"{key}\n" for key in keys))
+
+        start = len(self._rows)
+        for offset, (key, vector) in enumerate(zip(keys, vectors)):
+            self._rows[key] = start + offset
+            self._new.append(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            # Textos únicos ainda não vistos (duplicatas no mesmo lote embedadas uma vez)
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._rows and key not in missing:
+                    missing[key] = text
+
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                vectors = np.asarray(self.embeddings.embed_documents(list(missing.values())), dtype=np.float16)
+                self._append(list(missing), vectors)
+
+            return [self._vector(self._rows[key]).astype(np.float32).tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
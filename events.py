@@ -0,0 +1,78 @@
+"""
+Eventos de progresso de uma execução (para quem embute o sistema)
+
+Os nodes chamam `emit(...)`; os eventos vão para o sink instalado no contexto
+atual com `event_sink(callback)` (contextvar: execuções concorrentes no mesmo
+processo não se misturam). Sem sink, `emit` não faz nada.
+
+Tipos de evento:
+- "run_started": {"question", "run_id"}
+- "subtopics_ready": {"subtopics"}
+- "subtopic_done": {"subtopic", "status", "research_findings"}
+- "tokens": {"text"} (trechos da resposta final, se o LLM suporta streaming)
+- "tokens_reset": {} (a resposta final vai recomeçar numa nova tentativa do LLM:
+  descarte os "tokens" recebidos até aqui)
+- "final_answer": {"final_answer"}
+- "error": {"error"}
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+EventSink = Callable[[Dict], None]
+
+_SINK: ContextVar[Optional[EventSink]] = ContextVar("research_event_sink", default=None)
+
+@contextmanager
+def event_sink(callback: EventSink):
+    """Envia os eventos emitidos dentro do bloco (e nas threads que herdam o contexto) para `callback`"""
+    token = _SINK.set(callback)
+    try:
+        yield callback
+    finally:
+        _SINK.reset(token)
+
+def make_event(event_type: str, **data) -> Dict:
+    return {"type": event_type, "time": time.time(), **data}
+
+def emit(event_type: str, **data):
+    """Emite um evento para o sink do contexto atual (se houver)"""
+    sink = _SINK.get()
+    if sink is not None:
+        sink(make_event(event_type, **data))
+
+def emit_subtopic_done(result: Dict):
+    emit(
+        "subtopic_done",
+        subtopic=result["subtopic"],
+        status=result["status"],
+        research_findings=result["research_findings"]
+    )
+
+class TokenCallback:
+    """
+    `on_token` do ResilientLLM: emite "tokens" num sink fixo; `reset()` emite
+    "tokens_reset" (chamado antes de uma nova tentativa recomeçar o texto)
+    """
+
+    def __init__(self, sink: EventSink):
+        self._sink = sink
+
+    def __call__(self, text: str):
+        self._sink(make_event("tokens", text=text))
+
+    def reset(self):
+        self._sink(make_event("tokens_reset"))
+
+def token_callback() -> Optional[TokenCallback]:
+    """
+    Callback que emite eventos "tokens" no sink ATUAL
+
+    Capturado aqui porque o streaming roda nas threads do cliente LLM, que não
+    herdam o contexto. None se não há sink (streaming desnecessário).
+    """
+    sink = _SINK.get()
+    if sink is None:
+        return None
+    return TokenCallback(sink)
@@ -0,0 +1,135 @@
+"""
+Embeddings rápidos em CPU: ONNX Runtime e quantização int8 dinâmica
+
+Usa o próprio sentence-transformers (mesmo pooling/normalização do backend
+padrão), trocando apenas o runtime do modelo.
+"""
+import math
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# Arquivos ONNX publicados no repositório do modelo no HuggingFace Hub
+DEFAULT_ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx_int8": "onnx/model_quint8_avx2.onnx",
+}
+
+# Textos usados no warm-up e na checagem de paridade
+SAMPLE_TEXTS = [
+    "What is machine learning?",
+    "OAuth is an open standard for access delegation.",
+    "A rede neural aprende representações a partir dos dados.",
+    "The iPhone 15 Pro Max requires a pentalobe screwdriver to open.",
+    "Nietzsche wrote about the eternal recurrence in The Gay Science.",
+]
+
+
+class FastCPUEmbeddings(Embeddings):
+    """
+    Modelo de embeddings sentence-transformers otimizado para CPU
+
+    Backends:
+    - "onnx": ONNX Runtime (fp32)
+    - "onnx_int8": ONNX Runtime com pesos quantizados em int8
+    - "torch_int8": PyTorch com quantização dinâmica int8 das camadas Linear
+
+    Implementa a interface de Embeddings do LangChain (embed_documents / embed_query).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "onnx",
+        batch_size: int = 64,
+        num_threads: Optional[int] = None,
+        onnx_file: Optional[str] = None
+    ):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+
+        if backend in DEFAULT_ONNX_FILES:
+            model_kwargs = {
+                "provider": "CPUExecutionProvider",
+                "file_name": onnx_file or DEFAULT_ONNX_FILES[backend],
+            }
+            if num_threads:
+                import onnxruntime as ort
+                session_options = ort.SessionOptions()
+                session_options.intra_op_num_threads = num_threads
+                session_options.inter_op_num_threads = 1
+                model_kwargs["session_options"] = session_options
+
+            self.model = SentenceTransformer(
+                model_name,
+                device="cpu",
+                backend="onnx",
+                model_kwargs=model_kwargs
+            )
+
+        elif backend == "torch_int8":
+            import torch
+
+            if num_threads:
+                torch.set_num_threads(num_threads)
+
+            model = SentenceTransformer(model_name, device="cpu")
+            self.model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        else:
+            raise ValueError(f"Backend de embeddings desconhecido: {backend}")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def warmup(self) -> float:
+        """Roda um batch inicial (alocação de buffers / otimização do grafo). Retorna segundos."""
+        start = time.perf_counter()
+        self.embed_documents(SAMPLE_TEXTS)
+        return time.perf_counter() - start
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def embedding_parity(reference, candidate, texts: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Compara dois modelos de embeddings texto a texto
+
+    Args:
+        reference: Backend de referência (ex: HuggingFaceEmbeddings)
+        candidate: Backend a validar (ex: FastCPUEmbeddings)
+        texts: Textos de teste (padrão: SAMPLE_TEXTS)
+
+    Returns:
+        Dict: {'min_cosine': float, 'mean_cosine': float}
+    """
+    texts = texts or SAMPLE_TEXTS
+    ref_vectors = reference.embed_documents(texts)
+    cand_vectors = candidate.embed_documents(texts)
+
+    cosines = [_cosine(a, b) for a, b in zip(ref_vectors, cand_vectors)]
+    return {
+        "min_cosine": min(cosines),
+        "mean_cosine": sum(cosines) / len(cosines),
+    }
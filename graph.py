@@ -6,31 +6,112 @@ from state import ResearchState
 from config import Config
 
 
-def build_supervisor_graph(llm, vectorstore, config: Config, use_web_search: bool = False):
+SEARCH_MODES = ("rag", "web", "hybrid")
+
+def build_supervisor_graph(
+    llm,
+    vectorstore,
+    config: Config,
+    use_web_search: bool = False,
+    search_mode: str = None,
+    embeddings=None,
+    checkpointer=None,
+    checkpoint_store=None,
+    scheduler=None,
+    profiler=None,
+    compressor=None,
+    prefetch_cache=None
+):
     """
-    Constrói grafo: Supervisor → Researchers/WebSearch → Synthesis
+    Constrói grafo: Supervisor → Researchers/WebSearch/Hybrid → Synthesis
+    
+    Com `config.max_research_rounds > 1`, um Reviewer entre a pesquisa e a síntese
+    pode mandar subtópicos de acompanhamento de volta aos researchers.
+    Com `prefetch_cache` (modos rag/hybrid), um node de Prefetch roda em paralelo
+    com o Supervisor e os researchers esperam os dois.
+    
+    Args:
+        search_mode: "rag", "web" ou "hybrid" (se None, usa `use_web_search`)
+        embeddings: Modelo de embeddings (deduplicação de subtópicos, deep fetch nos modos web/hybrid e novidade do reviewer)
+        checkpointer: Checkpointer do LangGraph (estado salvo após cada node)
+        checkpoint_store: SubtopicCheckpointStore (resultados salvos por subtópico)
+        scheduler: ResearchScheduler (orçamento de tempo e de chamadas ao LLM)
+        profiler: NodeProfiler (CPU/memória de cada node, modo --profile)
+        compressor: ContextCompressor (compressão extrativa do contexto dos researchers)
+        prefetch_cache: PrefetchCache (recuperação especulativa durante o supervisor)
     """
     from agents.supervisor import create_supervisor_agent
     from agents.researcher import create_researcher_agent
     from agents.web_searcher import create_web_searcher_agent
+    from agents.hybrid_researcher import create_hybrid_researcher_agent
     from agents.synthesis import create_synthesis_agent
+    from agents.reviewer import create_reviewer_agent, route_after_review
+    from agents.prefetcher import create_prefetch_agent
+    
+    if search_mode is None:
+        search_mode = "web" if use_web_search else "rag"
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(f"Modo de pesquisa inválido: {search_mode}")
     
     if config.verbose:
         print("\n Construindo grafo com Supervisor Pattern...")
-        search_type = "Web Search" if use_web_search else "RAG Interno"
+        search_type = {"rag": "RAG Interno", "web": "Web Search", "hybrid": "Híbrido (RAG + Web)"}[search_mode]
         print(f"Modo de pesquisa: {search_type}")
+        if config.max_research_rounds > 1:
+            print(f"Pesquisa iterativa: até {config.max_research_rounds} rodadas")
+        if prefetch_cache is not None and search_mode != "web":
+            print("Prefetch especulativo: ativo")
     
     # Criar agents
-    supervisor = create_supervisor_agent(llm, config)
-    synthesis = create_synthesis_agent(llm, config)
+    supervisor = create_supervisor_agent(llm, config, scheduler=scheduler, embeddings=embeddings)
+    synthesis = create_synthesis_agent(llm, config, scheduler=scheduler)
 
-    if use_web_search:
-        researcher = create_web_searcher_agent(llm, config)
+    if search_mode == "hybrid":
+        researcher = create_hybrid_researcher_agent(
+            llm, vectorstore, config,
+            embeddings=embeddings,
+            checkpoint_store=checkpoint_store,
+            scheduler=scheduler,
+            compressor=compressor,
+            prefetch_cache=prefetch_cache
+        )
+        researcher_name = "hybrid_researcher"
+    elif search_mode == "web":
+        researcher = create_web_searcher_agent(
+            llm, config,
+            embeddings=embeddings,
+            checkpoint_store=checkpoint_store,
+            scheduler=scheduler,
+            compressor=compressor
+        )
         researcher_name = "web_searcher"
     else:
-        researcher = create_researcher_agent(llm, vectorstore, config)
+        researcher = create_researcher_agent(
+            llm, vectorstore, config,
+            checkpoint_store=checkpoint_store,
+            scheduler=scheduler,
+            compressor=compressor,
+            prefetch_cache=prefetch_cache
+        )
         researcher_name = "researcher"
     
+    iterative = config.max_research_rounds > 1
+    reviewer = create_reviewer_agent(llm, config, embeddings=embeddings, scheduler=scheduler) if iterative else None
+    
+    # Modo web não tem índice para pré-buscar
+    prefetcher = None
+    if prefetch_cache is not None and search_mode != "web":
+        prefetcher = create_prefetch_agent(vectorstore, prefetch_cache, config)
+    
+    if profiler is not None:
+        supervisor = profiler.wrap("supervisor", supervisor)
+        researcher = profiler.wrap(researcher_name, researcher)
+        synthesis = profiler.wrap("synthesis", synthesis)
+        if reviewer is not None:
+            reviewer = profiler.wrap("reviewer", reviewer)
+        if prefetcher is not None:
+            prefetcher = profiler.wrap("prefetch", prefetcher)
+    
     # Construir grafo
     graph = StateGraph(ResearchState)
     
@@ -39,11 +120,27 @@ def build_supervisor_graph(llm, vectorstore, config: Config, use_web_search: boo
     graph.add_node("synthesis", synthesis)
     
     graph.add_edge(START, "supervisor")
-    graph.add_edge("supervisor", researcher_name)
-    graph.add_edge(researcher_name, "synthesis")
+    if prefetcher is not None:
+        # Prefetch em paralelo com o supervisor; researchers esperam os dois
+        graph.add_node("prefetch", prefetcher)
+        graph.add_edge(START, "prefetch")
+        graph.add_edge(["supervisor", "prefetch"], researcher_name)
+    else:
+        graph.add_edge("supervisor", researcher_name)
+    if iterative:
+        # Loop: researchers → reviewer → researchers (só subtópicos novos) | synthesis
+        graph.add_node("reviewer", reviewer)
+        graph.add_edge(researcher_name, "reviewer")
+        graph.add_conditional_edges(
+            "reviewer",
+            route_after_review(researcher_name),
+            {researcher_name: researcher_name, "synthesis": "synthesis"}
+        )
+    else:
+        graph.add_edge(researcher_name, "synthesis")
     graph.add_edge("synthesis", END)
     
     if config.verbose:
         print("Grafo construído")
     
-    return graph.compile()
\ No newline at end of file
+    return graph.compile(checkpointer=checkpointer)
\ No newline at end of file
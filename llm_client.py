@@ -0,0 +1,383 @@
+"""
+Cliente LLM resiliente - deadlines, retries, hedging e circuit breaker
+"""
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Optional
+from config import Config
+from rate_limiter import RateLimitTimeout, get_rate_limiter
+
+# Status HTTP que indicam falha transitória (vale a pena tentar de novo)
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+RETRYABLE_MESSAGES = (
+    "timeout",
+    "timed out",
+    "rate limit",
+    "too many requests",
+    "temporarily unavailable",
+    "connection reset",
+    "connection aborted",
+    "connection refused",
+)
+
+# Status HTTP citado na mensagem de erro ("HTTP 503: ...", "status code 429",
+# "503 Server Error: ..."), quando a exceção não traz `status_code`
+STATUS_IN_MESSAGE = re.compile(
+    r"(?:\bhttp(?:/[\d.]+)?|\bstatus(?:[ _]code)?|\berror code)\s*[:=]?\s*(\d{3})\b|^(\d{3}) (?:client|server) error\b"
+)
+
+
+class LLMTimeoutError(TimeoutError):
+    """Chamada ao LLM excedeu o deadline"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Circuit breaker aberto: endpoint considerado indisponível"""
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Decide se um erro do endpoint é transitório
+
+    Considera timeouts, erros de conexão, status HTTP 408/429/5xx (via
+    atributo `status_code`, `response.status_code` ou citado na mensagem como
+    status) e mensagens típicas.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+
+    if status is not None:
+        try:
+            return int(status) in RETRYABLE_STATUS_CODES
+        except (TypeError, ValueError):
+            pass
+
+    message = str(error).lower()
+    match = STATUS_IN_MESSAGE.search(message)
+    if match:
+        return int(match.group(1) or match.group(2)) in RETRYABLE_STATUS_CODES
+    return any(marker in message for marker in RETRYABLE_MESSAGES)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker thread-safe compartilhado entre workers
+
+    Estados:
+    - closed: chamadas passam normalmente
+    - open: após `failure_threshold` falhas seguidas, rejeita chamadas por `reset_timeout` segundos
+    - half_open: após o timeout, deixa passar UMA chamada de teste
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Retorna True se a chamada pode seguir"""
+        with self._lock:
+            state = self._state_locked()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Libera o probe do half_open sem contar sucesso nem falha (chamada não chegou ao endpoint)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                # Falha no probe (half_open) ou limite atingido: (re)abre o circuito
+                self._opened_at = time.monotonic()
+
+
+# Um breaker por endpoint, compartilhado por todos os clientes do processo
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Retorna o circuit breaker compartilhado de um endpoint (cria se não existir)"""
+    with _BREAKERS_LOCK:
+        if name not in _BREAKERS:
+            _BREAKERS[name] = CircuitBreaker(failure_threshold, reset_timeout)
+        return _BREAKERS[name]
+
+
+class _AttemptTokens:
+    """
+    `on_token` de UMA tentativa: fechado quando ela termina ou é abandonada,
+    para que uma tentativa que estourou o deadline não continue emitindo
+    tokens (intercalados com os da tentativa seguinte)
+    """
+
+    def __init__(self, on_token):
+        self._on_token = on_token
+        self._lock = threading.Lock()
+        self.closed = False
+        self.emitted = False
+
+    def __call__(self, text: str):
+        with self._lock:
+            if self.closed:
+                return
+            self.emitted = True
+            self._on_token(text)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+
+
+class LatencyTracker:
+    """Janela deslizante de latências para calcular percentis"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class ResilientLLM:
+    """
+    Wrapper em volta do LLM com:
+    - deadline por chamada (o grafo nunca fica preso num invoke travado)
+    - retries com backoff exponencial + jitter em erros transitórios
+    - hedging opcional: requisição duplicada após o percentil p de latência
+    - circuit breaker compartilhado entre workers concorrentes
+
+    Expõe a mesma interface `invoke(prompt)` do modelo original.
+    """
+    
+    # `invoke(..., on_token=callback)` faz streaming dos tokens (ver events.token_callback)
+    supports_token_callback = True
+
+    def __init__(self, llm, config: Config, breaker: Optional[CircuitBreaker] = None, name: Optional[str] = None):
+        self.llm = llm
+        self.config = config
+        self.name = name or config.llm_model
+        self.breaker = breaker or get_circuit_breaker(
+            self.name,
+            failure_threshold=config.circuit_breaker_threshold,
+            reset_timeout=config.circuit_breaker_reset
+        )
+        self.latencies = LatencyTracker()
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.llm_max_workers,
+            thread_name_prefix="llm-call"
+        )
+
+    def __getattr__(self, item):
+        # Delega atributos desconhecidos ao modelo original
+        return getattr(self.llm, item)
+
+    def _hedge_delay(self) -> Optional[float]:
+        percentile = self.config.llm_hedge_percentile
+        if percentile is None or len(self.latencies) < self.config.llm_hedge_min_samples:
+            return None
+        return self.latencies.percentile(percentile)
+
+    def _limited_invoke(self, prompt, deadline: float, kwargs: dict, started: threading.Event, on_token: Optional[_AttemptTokens] = None):
+        """
+        Chamada ao modelo passando pelo rate limiter "llm" (hedges também contam)
+
+        `started` é marcado quando a vaga é obtida e a requisição sai de fato.
+        """
+        with get_rate_limiter("llm").slot(timeout=max(0.0, deadline - time.monotonic())):
+            started.set()
+            if getattr(self.llm, "supports_request_timeout", False):
+                # O próprio cliente desiste no deadline: a thread do executor não fica presa
+                kwargs = {**kwargs, "request_timeout": max(0.1, deadline - time.monotonic())}
+            if on_token is None or not hasattr(self.llm, "stream"):
+                return self.llm.invoke(prompt, **kwargs)
+            
+            # Streaming: repassa cada trecho e devolve a mensagem completa, como o invoke
+            message = None
+            for chunk in self.llm.stream(prompt, **kwargs):
+                if on_token.closed:
+                    # Tentativa abandonada: para de consumir o stream e libera a vaga
+                    raise LLMTimeoutError("Tentativa de streaming abandonada")
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                if text:
+                    on_token(text)
+                message = chunk if message is None else message + chunk
+            return message
+
+    def _call_once(self, prompt, attempt_timeout: float, kwargs: dict, on_token: Optional[_AttemptTokens] = None, request_budget=None):
+        """Executa uma tentativa (com possível hedge) respeitando o deadline"""
+        try:
+            return self._attempt(prompt, attempt_timeout, kwargs, on_token, request_budget)
+        finally:
+            if on_token is not None:
+                on_token.close()
+
+    def _attempt(self, prompt, attempt_timeout: float, kwargs: dict, on_token: Optional[_AttemptTokens], request_budget):
+        start = time.monotonic()
+        deadline = start + attempt_timeout
+
+        # Um evento por requisição: "saiu do rate limiter" (timeout só na fila local não é do endpoint)
+        started = [threading.Event()]
+        primary = self._executor.submit(self._limited_invoke, prompt, deadline, kwargs, started[0], on_token)
+        pending = {primary}
+
+        # Sem hedge no streaming: os tokens sairiam duplicados
+        hedge_delay = self._hedge_delay() if on_token is None else None
+        if hedge_delay is not None and hedge_delay < attempt_timeout:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done and (request_budget is None or request_budget()):
+                if self.config.verbose:
+                    print(f"   LLM lento (> p{self.config.llm_hedge_percentile:g} = {hedge_delay:.1f}s), enviando requisição hedge")
+                started.append(threading.Event())
+                pending.add(self._executor.submit(self._limited_invoke, prompt, deadline, kwargs, started[-1]))
+
+        last_error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for other in pending:
+                        other.cancel()
+                    self.latencies.record(time.monotonic() - start)
+                    return future.result()
+                last_error = error
+
+        if last_error is not None and not pending:
+            raise last_error
+
+        for future in pending:
+            future.cancel()
+        if not any(event.is_set() for event in started):
+            # Nenhuma requisição chegou a sair: só espera no rate limiter local
+            raise RateLimitTimeout(f"Rate limiter 'llm': sem vaga em {attempt_timeout:.1f}s")
+        raise LLMTimeoutError(f"LLM não respondeu em {attempt_timeout:.1f}s")
+
+    def invoke(self, prompt, timeout: Optional[float] = None, on_token=None, request_budget=None, **kwargs):
+        """
+        Invoca o LLM com retries
+
+        Args:
+            prompt: Prompt (mesmo formato aceito pelo modelo original)
+            timeout: Deadline TOTAL em segundos (todas as tentativas). Se None,
+                cada tentativa usa `config.llm_timeout`
+            on_token: Callback chamado com cada trecho gerado (streaming, se o
+                modelo suportar). Só a tentativa em andamento emite; antes de uma
+                nova tentativa recomeçar o texto, `on_token.reset()` é chamado (se
+                existir e algo já tiver sido emitido; ver events.TokenCallback)
+            request_budget: Callable sem argumentos consultado antes de cada
+                requisição extra (retry ou hedge); False = não enviar
+                (ver ResearchScheduler.reserve_request)
+            **kwargs: Repassados ao `invoke` do modelo original
+
+        Raises:
+            CircuitOpenError: Endpoint marcado como indisponível
+            LLMTimeoutError: Deadline estourado
+        """
+        overall_deadline = time.monotonic() + timeout if timeout is not None else None
+        max_attempts = self.config.llm_max_retries + 1
+
+        for attempt in range(max_attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker aberto para {self.name}")
+
+            attempt_timeout = self.config.llm_timeout
+            if overall_deadline is not None:
+                attempt_timeout = min(attempt_timeout, overall_deadline - time.monotonic())
+                if attempt_timeout <= 0:
+                    raise LLMTimeoutError(f"Deadline de {timeout:.1f}s estourado")
+
+            tokens = _AttemptTokens(on_token) if on_token is not None else None
+            try:
+                response = self._call_once(prompt, attempt_timeout, kwargs, tokens, request_budget)
+            except RateLimitTimeout as e:
+                # Espera na fila local, não falha do endpoint: não conta para o breaker,
+                # mas libera o probe (senão o half_open nunca mais deixa passar uma chamada)
+                self.breaker.release_probe()
+                raise LLMTimeoutError(str(e)) from e
+            except Exception as e:
+                if not is_retryable_error(e):
+                    # Erro do pedido (ex: 400), não do endpoint: não conta para o breaker
+                    self.breaker.record_success()
+                    raise
+
+                self.breaker.record_failure()
+                if attempt == max_attempts - 1:
+                    raise
+                if request_budget is not None and not request_budget():
+                    # Sem orçamento para mais uma requisição
+                    raise
+
+                backoff = min(self.config.llm_backoff_max, self.config.llm_backoff_base * (2 ** attempt))
+                backoff = random.uniform(0, backoff)  # full jitter
+                if overall_deadline is not None:
+                    backoff = min(backoff, max(0.0, overall_deadline - time.monotonic()))
+
+                if self.config.verbose:
+                    print(f"   Erro transitório no LLM ({e}); tentativa {attempt + 2}/{max_attempts} em {backoff:.1f}s")
+                if tokens is not None and tokens.emitted and hasattr(on_token, "reset"):
+                    on_token.reset()
+                time.sleep(backoff)
+                continue
+
+            self.breaker.record_success()
+            return response
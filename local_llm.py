@@ -0,0 +1,202 @@
+"""
+Cliente HTTP para servidores compatíveis com a API OpenAI (vLLM, llama.cpp server, TGI)
+
+Mantém um pool de conexões keep-alive persistentes e limita a concorrência,
+evitando handshake TLS / setup de conexão a cada chamada.
+"""
+import json
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+# Mapeamento de tipos de mensagem LangChain → roles da API OpenAI
+_ROLE_BY_MESSAGE_TYPE = {
+    "human": "user",
+    "ai": "assistant",
+    "system": "system",
+    "tool": "tool",
+}
+
+
+class OpenAICompatibleError(RuntimeError):
+    """Erro HTTP retornado pelo servidor (status_code usado para decidir retries)"""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"HTTP {status_code}: {body[:200]}")
+        self.status_code = status_code
+        self.body = body
+
+
+@dataclass
+class ChatResponse:
+    """Resposta do servidor (mesma interface `.content` do ChatHuggingFace)"""
+    content: str
+    usage_metadata: Dict[str, int] = field(default_factory=dict)
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de conexões HTTP keep-alive para um único host
+
+    Conexões ociosas são reaproveitadas; no máximo `max_connections` abertas ao mesmo tempo.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 8, timeout: float = 120.0):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"URL inválida para o servidor LLM: {base_url}")
+
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _new_connection(self) -> HTTPConnection:
+        connection_class = HTTPSConnection if self.scheme == "https" else HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout)
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão do pool
+
+        Yields:
+            (HTTPConnection, bool): conexão e se ela foi reaproveitada
+        """
+        self._slots.acquire()
+        try:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._new_connection(), False
+
+            try:
+                yield conn, reused
+            except BaseException:
+                # Estado da conexão desconhecido: descartar
+                conn.close()
+                raise
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class OpenAICompatibleChat:
+    """
+    Chat model para servidores com endpoint `/chat/completions`
+
+    Thread-safe: pode ser compartilhado por vários workers; a concorrência é
+    limitada por `max_concurrency` e as conexões vêm do pool.
+    """
+
+    # `invoke(..., request_timeout=s)`: timeout do socket por chamada (ver ResilientLLM)
+    supports_request_timeout = True
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        max_connections: int = 8,
+        max_concurrency: int = 8,
+        timeout: float = 120.0
+    ):
+        self.model = model
+        self.api_key = api_key
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.pool = ConnectionPool(base_url, max_connections=max_connections, timeout=timeout)
+        self._concurrency = threading.BoundedSemaphore(max_concurrency)
+
+    @staticmethod
+    def _to_messages(prompt) -> List[Dict[str, str]]:
+        """Converte str / lista de mensagens LangChain / tuplas / dicts para o formato OpenAI"""
+        if isinstance(prompt, str):
+            return [{"role": "user", "content": prompt}]
+
+        messages = []
+        for message in prompt:
+            if isinstance(message, dict):
+                messages.append({"role": message["role"], "content": message["content"]})
+            elif isinstance(message, tuple):
+                role, content = message
+                messages.append({"role": _ROLE_BY_MESSAGE_TYPE.get(role, role), "content": content})
+            else:
+                role = _ROLE_BY_MESSAGE_TYPE.get(getattr(message, "type", "human"), "user")
+                messages.append({"role": role, "content": message.content})
+        return messages
+
+    def _post(self, path: str, payload: dict, timeout: Optional[float] = None) -> dict:
+        body = json.dumps(payload).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+        }
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        # Uma conexão reaproveitada pode ter sido fechada pelo servidor:
+        # nesse caso tenta uma vez em conexão nova
+        for attempt in range(2):
+            reused = False
+            try:
+                with self.pool.connection() as (conn, reused):
+                    conn.timeout = timeout or self.pool.timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(conn.timeout)
+                    conn.request("POST", self.pool.base_path + path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+            except (ConnectionError, HTTPException):
+                if attempt == 0 and reused:
+                    continue
+                raise
+
+            if response.status >= 400:
+                raise OpenAICompatibleError(response.status, data.decode("utf-8", errors="replace"))
+            return json.loads(data)
+
+    def invoke(self, prompt, request_timeout: Optional[float] = None, **kwargs) -> ChatResponse:
+        """
+        Gera resposta para o prompt
+
+        Args:
+            prompt: str ou lista de mensagens
+            request_timeout: Timeout do socket desta chamada (None = timeout do pool)
+            **kwargs: Sobrescrevem parâmetros de geração (max_tokens, temperature, stop, ...)
+        """
+        payload = {
+            "model": self.model,
+            "messages": self._to_messages(prompt),
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+        payload.update({key: value for key, value in kwargs.items() if value is not None})
+
+        with self._concurrency:
+            data = self._post("/chat/completions", payload, timeout=request_timeout)
+
+        choice = data["choices"][0]
+        content = choice.get("message", {}).get("content") or choice.get("text", "")
+        return ChatResponse(content=content, usage_metadata=data.get("usage") or {})
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,193 @@
+"""
+Harness do cliente OpenAI-compatível contra um servidor local falso
+
+Sobe um servidor `/chat/completions` mínimo (http.server, localhost, sem
+modelo) e verifica o comportamento do `OpenAICompatibleChat`:
+- Reuso: chamadas seguidas usam UMA conexão keep-alive
+- Conexão velha: se o servidor fecha a conexão ociosa, a chamada seguinte
+  tenta de novo numa conexão nova (sem erro para quem chamou)
+- Pool: chamadas concorrentes nunca abrem mais que `max_connections`
+- Timeout por chamada: `request_timeout` libera a thread de um servidor travado
+- Probe do circuit breaker: um probe (half_open) que só esperou no rate limiter
+  local não trava o breaker; a chamada seguinte ainda passa
+
+Uso:
+    python local_llm_harness.py
+"""
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+from llm_client import CircuitBreaker, LLMTimeoutError, ResilientLLM
+from local_llm import OpenAICompatibleChat
+from rate_limiter import configure_rate_limiters, get_rate_limiter
+
+class FakeChatServer(ThreadingHTTPServer):
+    """Servidor falso: conta conexões; pode atrasar respostas, responder com erro ou fechar a conexão após responder"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeChatHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.delay = 0.0
+        self.status = 200
+        self.close_after_response = False
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+    def reset(self, delay: float = 0.0, close_after_response: bool = False, status: int = 200):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+        self.delay = delay
+        self.status = status
+        self.close_after_response = close_after_response
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        body = json.dumps({
+            "choices": [{"message": {"content": f"echo: {payload['messages'][-1]['content']}"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 2},
+        }).encode("utf-8")
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        # Fecha sem avisar (sem "Connection: close"): o cliente fica com uma conexão velha no pool
+        self.close_connection = self.server.close_after_response
+
+    def log_message(self, format, *args):
+        pass
+
+def check_reuse(server: FakeChatServer, calls: int = 20) -> str:
+    server.reset()
+    chat = OpenAICompatibleChat(server.base_url, "fake", max_connections=4)
+    answers = [chat.invoke(f"q{i}").content for i in range(calls)]
+    chat.close()
+    assert answers == [f"echo: q{i}" for i in range(calls)], "respostas trocadas"
+    assert server.connections == 1, f"{server.connections} conexões para {calls} chamadas seguidas"
+    return f"{calls} chamadas seguidas, {server.connections} conexão"
+
+def check_stale_connection(server: FakeChatServer, calls: int = 10) -> str:
+    server.reset(close_after_response=True)
+    chat = OpenAICompatibleChat(server.base_url, "fake", max_connections=4)
+    for i in range(calls):
+        # Pausa: o fechamento do servidor chega antes da próxima chamada
+        time.sleep(0.02)
+        assert chat.invoke(f"q{i}").content == f"echo: q{i}"
+    chat.close()
+    assert server.requests == calls, f"{server.requests} requisições para {calls} chamadas"
+    assert server.connections == calls, f"{server.connections} conexões (esperado: uma nova por chamada)"
+    return f"{calls} chamadas, todas refeitas em conexão nova sem erro"
+
+def check_pool_limit(server: FakeChatServer, calls: int = 32, max_connections: int = 4) -> str:
+    server.reset(delay=0.02)
+    chat = OpenAICompatibleChat(server.base_url, "fake", max_connections=max_connections, max_concurrency=16)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        answers = list(executor.map(lambda i: chat.invoke(f"q{i}").content, range(calls)))
+    chat.close()
+    assert answers == [f"echo: q{i}" for i in range(calls)], "respostas trocadas"
+    assert server.connections <= max_connections, f"{server.connections} conexões (limite {max_connections})"
+    return f"{calls} chamadas concorrentes, {server.connections} conexões (limite {max_connections})"
+
+def check_request_timeout(server: FakeChatServer, timeout: float = 0.3) -> str:
+    server.reset(delay=2.0)
+    chat = OpenAICompatibleChat(server.base_url, "fake", timeout=30.0)
+    start = time.monotonic()
+    try:
+        chat.invoke("hang", request_timeout=timeout)
+    except TimeoutError:
+        elapsed = time.monotonic() - start
+    else:
+        raise AssertionError("servidor travado respondeu antes do timeout")
+    chat.close()
+    assert elapsed < timeout + 0.5, f"chamada liberada só após {elapsed:.2f}s"
+    return f"servidor travado, chamada liberada em {elapsed:.2f}s (request_timeout={timeout}s)"
+
+def check_breaker_probe_released(server: FakeChatServer, reset_timeout: float = 0.2) -> str:
+    config = replace(Config(), llm_timeout=0.3, llm_max_retries=0, llm_rate_max_concurrent=1, verbose=False)
+    configure_rate_limiters(config)
+    chat = OpenAICompatibleChat(server.base_url, "fake")
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    llm = ResilientLLM(chat, config, breaker=breaker, name="harness-probe")
+    try:
+        # Falha do endpoint: o circuito abre
+        server.reset(status=503)
+        try:
+            llm.invoke("down")
+        except Exception:
+            pass
+        assert breaker.state == "open", f"breaker {breaker.state} após a falha"
+
+        # Half_open: o probe fica preso na fila do rate limiter (vaga ocupada)
+        time.sleep(reset_timeout + 0.05)
+        server.reset()
+        with get_rate_limiter("llm").slot():
+            try:
+                llm.invoke("probe")
+            except LLMTimeoutError:
+                pass
+            else:
+                raise AssertionError("probe passou com a vaga do limiter ocupada")
+
+        answer = llm.invoke("after").content
+        assert answer == "echo: after", f"resposta inesperada: {answer}"
+        assert breaker.state == "closed", f"breaker {breaker.state} após o sucesso"
+    finally:
+        chat.close()
+        configure_rate_limiters(Config())
+    return "probe preso no rate limiter liberado; chamada seguinte fechou o circuito"
+
+CHECKS = [
+    ("Reuso de conexão", check_reuse),
+    ("Conexão velha", check_stale_connection),
+    ("Limite do pool", check_pool_limit),
+    ("Timeout por chamada", check_request_timeout),
+    ("Probe do circuit breaker", check_breaker_probe_released),
+]
+
+def main():
+    server = FakeChatServer()
+    threading.Thread(target=server.serve_forever, name="fake-chat-server", daemon=True).start()
+
+    failures = 0
+    try:
+        for name, check in CHECKS:
+            try:
+                print(f"✅ {name}: {check(server)}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {name}: {type(e).__name__}: {e}")
+    finally:
+        server.shutdown()
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
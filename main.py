@@ -3,17 +3,32 @@ Script principal de execução
 """
 import argparse
 import os
+import time
 from dotenv import load_dotenv
 from config import Config
-from models import initialize_llm, initialize_embeddings
-from utils.document_loader import load_documents_from_data
-from utils.file_saver import save_research_results, list_research_files
-from vector_store import create_vector_store
+from models import initialize_llm, initialize_embeddings, LLM_BACKENDS, EMBEDDING_BACKENDS
+from utils.document_loader import load_corpus
+from utils.file_saver import save_research_results, list_research_files, export_archived_run
+from utils.archive import RunArchive, build_run_record
+from vector_store import create_vector_store, create_sharded_vector_store, VECTOR_BACKENDS
 from state import create_initial_state
 from graph import build_supervisor_graph
+from checkpointing import new_run_id, create_checkpointer, SubtopicCheckpointStore
+from scheduler import ResearchScheduler
+from profiling import NodeProfiler, profile_section
+from concurrency import make_thread_safe_vectorstore
+from rate_limiter import configure_rate_limiters, rate_limiter_stats
+from context_compression import create_context_compressor
+from prefetch import create_prefetch_cache
+from search_providers import SEARCH_PROVIDERS, configure_search_router
 
 load_dotenv()
 
+CHECKPOINT_DB = ".checkpoints.sqlite"  # Dentro de --data-dir
+SEARCH_LATENCY_FILE = ".search_latency.json"  # Dentro de --data-dir
+ARCHIVE_DIR = "archive"               # Dentro de --data-dir
+PROFILES_DIR = ".profiles"            # Dentro de --data-dir (oculto: fora do corpus)
+
 def parse_arguments():
     """
     Parse argumentos da linha de comando
@@ -33,8 +48,21 @@ def parse_arguments():
         # Usar RAG interno
         python main.py --question "Como funciona OAuth?" --no-web
         
+        # RAG interno + busca web
+        python main.py --question "Como funciona OAuth?" --hybrid
+        
         # Listar pesquisas anteriores
         python main.py --list
+        
+        # Salvar no arquivo comprimido e exportar depois como TXT
+        python main.py --question "Test query" --archive
+        python main.py --export 20260109113225_a1b2c3
+        
+        # Retomar execução interrompida
+        python main.py --resume 20260109113225_a1b2c3
+        
+        # Perfil de CPU/memória por node
+        python main.py --question "Test query" --no-web --profile
         """
     )
     
@@ -42,14 +70,47 @@ def parse_arguments():
     parser.add_argument('-q', '--question', type=str, default=None, help='Pergunta para pesquisar')
     parser.add_argument('--web', action='store_true', default=True, help='Usar busca web (padrão)')
     parser.add_argument('--no-web', action='store_true', help='Usar RAG interno')
+    parser.add_argument('--hybrid', action='store_true', help='RAG interno + busca web ao mesmo tempo (uma análise por subtópico)')
+    parser.add_argument('--sharded', action='store_true', help='Um índice por subdiretório de --data-dir, buscados em paralelo')
+    parser.add_argument('--shards', type=str, default=None, help='Shards a consultar, separados por vírgula (com --sharded)')
+    parser.add_argument('--vector-backend', type=str, default='faiss', choices=sorted(VECTOR_BACKENDS), help='Índice vetorial: FAISS ou NumPy compacto float16/int8 (padrão: faiss)')
+    parser.add_argument('--child-chunks', type=int, default=None, help='Small-to-big: indexar chunks filhos deste tamanho e expandir para janelas do pai (RAG interno)')
+    parser.add_argument('--check-vector-store', action='store_true', help='Comparar o índice de --vector-backend com o FAISS (recall@k) e sair')
+    parser.add_argument('--rerank', action='store_true', help='Reordenar chunks recuperados com cross-encoder (RAG interno)')
+    parser.add_argument('--prefetch', action='store_true', help='Buscar candidatos da pergunta no índice enquanto o supervisor gera os subtópicos (RAG interno/híbrido)')
+    parser.add_argument('--dedup-subtopics', action='store_true', help='Modo web: carregar o modelo de embeddings para deduplicar subtópicos (RAG/híbrido já deduplicam)')
+    parser.add_argument('--compress', action='store_true', help='Comprimir o contexto dos researchers (só as sentenças mais relevantes ao subtópico)')
+    parser.add_argument('--compression-ratio', type=float, default=0.5, help='Fração do contexto mantida com --compress (padrão: 0.5)')
+    parser.add_argument('--deep-fetch', action='store_true', help='Baixar páginas completas dos resultados web e usar os trechos mais relevantes')
     parser.add_argument('-s', '--subagents', type=int, default=3, help='Número de subtópicos (padrão: 3)')
+    parser.add_argument('--rounds', type=int, default=1, help='Rodadas de pesquisa: o reviewer pede subtópicos de acompanhamento para lacunas (padrão: 1)')
+    parser.add_argument('--deadline', type=float, default=None, help='Tempo máximo da execução em segundos (responde com o que terminar)')
+    parser.add_argument('--max-llm-calls', type=int, default=None, help='Número máximo de chamadas ao LLM na execução')
     parser.add_argument('--quiet', action='store_true', help='Modo silencioso')
     parser.add_argument('--data-dir', type=str, default='data', help='Diretório de dados')
     parser.add_argument('--no-save', action='store_true', help='Não salvar resultado')
     parser.add_argument('--save-sources', action='store_true', default=True, help='Salvar fontes web (padrão: True)')
     parser.add_argument('--no-save-sources', action='store_true', help='Não salvar fontes web')
     parser.add_argument('--list', action='store_true', help='Listar pesquisas anteriores')
+    parser.add_argument('--archive', action='store_true', help='Salvar no arquivo comprimido (data/archive) em vez de TXT/JSON avulsos')
+    parser.add_argument('--export', type=str, default=None, metavar='RUN_ID', help='Exportar execução do arquivo comprimido como TXT')
+    parser.add_argument('--resume', type=str, default=None, metavar='RUN_ID', help='Retomar execução interrompida (use as mesmas flags de modo)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='Não salvar checkpoints da execução')
     parser.add_argument('--token', type=str, default=None, help='HuggingFace token')
+    parser.add_argument('--backend', type=str, default='huggingface', choices=sorted(LLM_BACKENDS), help='Backend do LLM (padrão: huggingface)')
+    parser.add_argument('--model', type=str, default=None, help='Modelo LLM (sobrescreve config.py)')
+    parser.add_argument('--base-url', type=str, default=None, help='URL do servidor OpenAI-compatible (ex: http://localhost:8000/v1)')
+    parser.add_argument('--embedding-backend', type=str, default='huggingface', choices=sorted(EMBEDDING_BACKENDS), help='Backend de embeddings (padrão: huggingface)')
+    parser.add_argument('--embedding-threads', type=int, default=None, help='Threads de CPU para embeddings')
+    parser.add_argument('--embedding-replicas', type=int, default=2, help='Cópias do modelo de embeddings para chamadas simultâneas (padrão: 2)')
+    parser.add_argument('--check-embeddings', action='store_true', help='Comparar o backend de embeddings com o padrão (cosseno) e sair')
+    parser.add_argument('--llm-timeout', type=float, default=120.0, help='Deadline por chamada ao LLM em segundos (padrão: 120)')
+    parser.add_argument('--llm-rps', type=float, default=None, help='Limite de requisições/s ao LLM (padrão: sem limite)')
+    parser.add_argument('--search-providers', type=str, default=None, help=f'Provedores de busca em corrida, separados por vírgula ({", ".join(sorted(SEARCH_PROVIDERS))})')
+    parser.add_argument('--search-rps', type=float, default=None, help='Limite de buscas/s no DuckDuckGo (padrão: 1; 0 = sem limite)')
+    parser.add_argument('--rate-limit-dir', type=str, default=None, help='Pasta para compartilhar os limites entre processos')
+    parser.add_argument('--profile', action='store_true', help='Perfil de CPU/memória por node (grava _profile.txt e .collapsed em data/.profiles/)')
+    parser.add_argument('--hedge-percentile', type=float, default=None, help='Duplicar chamadas ao LLM mais lentas que este percentil (ex: 95)')
     
     return parser.parse_args()
 
@@ -89,6 +150,46 @@ def show_previous_researches(data_dir: str = "data", limit: int = 10):
                 print(f"   🌐 {file_info['filename']} (Fontes Web, {file_info['size']:,} bytes)")
         print()
 
+def check_embedding_parity(config: Config, min_cosine: float = 0.99):
+    """Compara o backend de embeddings configurado com o backend padrão"""
+    from dataclasses import replace
+    from fast_embeddings import embedding_parity
+    
+    reference = initialize_embeddings(replace(config, embedding_backend="huggingface"))
+    candidate = initialize_embeddings(config)
+    
+    parity = embedding_parity(reference, candidate)
+    ok = parity['min_cosine'] >= min_cosine
+    
+    print(f"\nParidade {config.embedding_backend} vs huggingface:")
+    print(f"   Cosseno mínimo: {parity['min_cosine']:.4f}")
+    print(f"   Cosseno médio:  {parity['mean_cosine']:.4f}")
+    print(f"   {'✅ OK' if ok else '❌ ABAIXO'} (limite: {min_cosine})")
+
+def check_vector_store_parity(config: Config, data_dir: str, k: int = 5, min_recall: float = 0.9):
+    """Compara o índice do backend configurado com o FAISS nas mesmas queries"""
+    from dataclasses import replace
+    from numpy_store import search_parity
+    
+    corpus = load_corpus(data_dir, verbose=False)
+    if not corpus:
+        print(f"\n❌ ERRO: Nenhum documento encontrado em {data_dir}/")
+        return
+    
+    embeddings = initialize_embeddings(config)
+    reference = create_vector_store(corpus, embeddings, replace(config, vector_backend="faiss"), data_dir=data_dir)
+    candidate = create_vector_store(corpus, embeddings, config, data_dir=data_dir)
+    
+    # Queries: início de documentos do corpus (sem depender do LLM)
+    queries = [" ".join(doc.page_content.split()[:12]) for doc in corpus[:50]]
+    parity = search_parity(reference, candidate, queries, k=k)
+    ok = parity['recall_at_k'] >= min_recall
+    
+    print(f"\nParidade {config.vector_backend} vs faiss ({parity['queries']} queries, k={k}):")
+    print(f"   Recall@{k}:      {parity['recall_at_k']:.3f}")
+    print(f"   Top-1 igual:    {parity['top1_agreement']:.3f}")
+    print(f"   {'✅ OK' if ok else '❌ ABAIXO'} (limite: {min_recall})")
+
 def main():
     """Execução principal"""
     
@@ -100,8 +201,23 @@ def main():
         show_previous_researches(args.data_dir)
         return
     
+    # Se --export, gerar TXT a partir do arquivo comprimido e sair
+    if args.export:
+        archive = RunArchive(os.path.join(args.data_dir, ARCHIVE_DIR))
+        if args.export not in archive:
+            print(f"❌ ERRO: Execução não encontrada no arquivo: {args.export}")
+            return
+        print(f"📄 Exportado: {export_archived_run(archive, args.export, args.data_dir)}")
+        return
+    
     # Configurar
-    USE_WEB_SEARCH = not args.no_web
+    if args.hybrid:
+        SEARCH_MODE = 'hybrid'
+    elif args.no_web:
+        SEARCH_MODE = 'rag'
+    else:
+        SEARCH_MODE = 'web'
+    USE_WEB_SEARCH = SEARCH_MODE == 'web'
     VERBOSE = not args.quiet
     SAVE_RESULTS = not args.no_save
     SAVE_SOURCES = args.save_sources and not args.no_save_sources  # ← CORREÇÃO
@@ -113,63 +229,190 @@ def main():
     
     # === 1. CONFIGURAÇÃO ===
     hf_token = args.token or os.getenv('HF_TOKEN')
+    backend_overrides = {}
+    if args.model:
+        backend_overrides['llm_model'] = args.model
+    if args.base_url:
+        backend_overrides['llm_base_url'] = args.base_url
+    if args.search_rps is not None:
+        backend_overrides['search_rate_limit'] = args.search_rps or None
+    
     config = Config(
         hf_token=hf_token,
+        llm_backend=args.backend,
+        llm_api_key=os.getenv('LLM_API_KEY'),
         verbose=VERBOSE,
-        max_subagents=args.subagents
+        max_subagents=args.subagents,
+        max_research_rounds=args.rounds,
+        llm_timeout=args.llm_timeout,
+        llm_hedge_percentile=args.hedge_percentile,
+        embedding_backend=args.embedding_backend,
+        embedding_threads=args.embedding_threads,
+        embedding_replicas=args.embedding_replicas,
+        deep_fetch=args.deep_fetch,
+        compress_context=args.compress,
+        dedup_subtopics_web=args.dedup_subtopics,
+        compression_ratio=args.compression_ratio,
+        rerank=args.rerank,
+        prefetch=args.prefetch,
+        deadline=args.deadline,
+        max_llm_calls=args.max_llm_calls,
+        vector_backend=args.vector_backend,
+        child_chunk_size=args.child_chunks,
+        shard_by_subdirectory=args.sharded,
+        search_shards=args.shards.split(',') if args.shards else None,
+        llm_rate_limit=args.llm_rps,
+        rate_limit_state_dir=args.rate_limit_dir,
+        search_providers=args.search_providers.split(',') if args.search_providers else None,
+        **backend_overrides
     )
     
+    # Limites por backend, compartilhados por todos os agents e workers
+    configure_rate_limiters(config)
+    
+    # Provedores de busca: latências de execuções anteriores decidem quem é consultado primeiro
+    try:
+        search_router = configure_search_router(config)
+    except ValueError as e:
+        print(f"\n❌ ERRO: {e}")
+        return
+    search_latency_path = os.path.join(args.data_dir, SEARCH_LATENCY_FILE)
+    search_router.load_histograms(search_latency_path)
+    
     if VERBOSE:
-        print(f"\nModo: {'BUSCA WEB' if USE_WEB_SEARCH else 'RAG INTERNO'}")
+        mode_label = {'web': 'BUSCA WEB', 'rag': 'RAG INTERNO', 'hybrid': 'HÍBRIDO (RAG + WEB)'}[SEARCH_MODE]
+        print(f"\nModo: {mode_label}")
         print(f"Subtópicos: {args.subagents}")
+        if args.rounds > 1:
+            print(f"Rodadas de pesquisa: até {args.rounds}")
         print(f"Auto-save: {'Sim' if SAVE_RESULTS else 'Não'}")
         if SAVE_SOURCES:  # ← CORREÇÃO (era SAVE_RAW)
             print(f"Salvar fontes web: Sim")
     
+    # Se --check-embeddings, validar backend de embeddings e sair
+    if args.check_embeddings:
+        check_embedding_parity(config)
+        return
+    
+    # Se --check-vector-store, validar índice compacto contra o FAISS e sair
+    if args.check_vector_store:
+        check_vector_store_parity(config, args.data_dir)
+        return
+    
+    # Checkpoint durável (estado do grafo + subtópicos concluídos)
+    checkpointer = None
+    checkpoint_store = None
+    if not args.no_checkpoint:
+        os.makedirs(args.data_dir, exist_ok=True)
+        checkpoint_db = os.path.join(args.data_dir, CHECKPOINT_DB)
+        try:
+            checkpointer = create_checkpointer(checkpoint_db)
+            checkpoint_store = SubtopicCheckpointStore(checkpoint_db)
+        except ImportError:
+            print("AVISO: Pacote 'langgraph-checkpoint-sqlite' não instalado, checkpoint desativado")
+            print("Execute: pip install langgraph-checkpoint-sqlite")
+    
+    if args.resume and checkpointer is None:
+        print("\n❌ ERRO: --resume requer checkpoint ativo (sem --no-checkpoint)")
+        return
+    
     # === 2. INICIALIZAR MODELOS ===
     if VERBOSE:
         print("\nInicializando modelos...")
     
     llm = initialize_llm(config)
     
+    profiler = NodeProfiler() if args.profile else None
+    if profiler is not None:
+        profiler.start()
+    
     # === 3. CARREGAR DOCUMENTOS E CRIAR VECTOR STORE ===
     if USE_WEB_SEARCH:
         embeddings = None
         vectorstore = None
-        documents = []
         
         if VERBOSE:
             print("   Modo Web Search: RAG desabilitado")
+    elif config.shard_by_subdirectory:
+        # Cada shard carrega os próprios arquivos (só os shards modificados são lidos)
+        embeddings = initialize_embeddings(config)
+        with profile_section(profiler, "index_build"):
+            vectorstore = create_sharded_vector_store(embeddings, config, data_dir=args.data_dir)
+        
+        if not vectorstore.shards:
+            print(f"\n❌ ERRO: Nenhum documento encontrado em {args.data_dir}/")
+            return
     else:
         if VERBOSE:
             print(f"   Carregando documentos de: {args.data_dir}/")
         
-        documents = load_documents_from_data(args.data_dir)
+        # Documents com metadata (arquivo de origem e página), um por página
+        try:
+            with profile_section(profiler, "document_extraction"):
+                corpus = load_corpus(args.data_dir, verbose=VERBOSE)
+        except (FileNotFoundError, ValueError):
+            corpus = []
         
-        if not documents:
+        if not corpus:
             print(f"\n❌ ERRO: Nenhum documento encontrado em {args.data_dir}/")
-            print(f"   Por favor, adicione arquivos .txt no diretório {args.data_dir}/")
+            print(f"   Por favor, adicione arquivos .txt, .md, .html, .pdf ou .docx no diretório {args.data_dir}/")
             print(f"   Ou use --web para busca web")
             return
         
         embeddings = initialize_embeddings(config)
-        vectorstore = create_vector_store(
-            documents, 
-            embeddings, 
-            config, 
-            data_dir=args.data_dir
-        )
+        with profile_section(profiler, "index_build"):
+            vectorstore = create_vector_store(
+                corpus, 
+                embeddings, 
+                config, 
+                data_dir=args.data_dir
+            )
+    
+    # Buscas em paralelo, escritas no índice exclusivas
+    vectorstore = make_thread_safe_vectorstore(vectorstore)
+    
+    # Deep fetch (índice efêmero de trechos), compressão (pontuação de sentenças) e
+    # deduplicação de subtópicos (supervisor e reviewer) precisam de embeddings
+    # (esta só com --dedup-subtopics: o modelo custa segundos e centenas de MB na busca web)
+    wants_dedup = config.dedup_subtopics_web and config.subtopic_dedup_threshold is not None
+    if embeddings is None and (config.deep_fetch or config.compress_context or wants_dedup):
+        if VERBOSE and not (config.deep_fetch or config.compress_context):
+            print("   Carregando embeddings para deduplicar subtópicos (--dedup-subtopics)")
+        embeddings = initialize_embeddings(config)
+    
+    compressor = create_context_compressor(config, embeddings)
+    prefetch_cache = create_prefetch_cache(config, embeddings) if SEARCH_MODE != 'web' else None
     
     # === 4. CONSTRUIR GRAFO ===
+    scheduler = None
+    if config.deadline is not None or config.max_llm_calls is not None:
+        scheduler = ResearchScheduler(config, deadline=config.deadline, max_llm_calls=config.max_llm_calls)
+    
     graph = build_supervisor_graph(
         llm, 
         vectorstore, 
         config, 
-        use_web_search=USE_WEB_SEARCH
+        search_mode=SEARCH_MODE,
+        embeddings=embeddings,
+        checkpointer=checkpointer,
+        checkpoint_store=checkpoint_store,
+        scheduler=scheduler,
+        profiler=profiler,
+        compressor=compressor,
+        prefetch_cache=prefetch_cache
     )
     
     # === 5. PERGUNTA ===
-    if args.question:
+    run_id = args.resume or new_run_id()
+    run_config = {"configurable": {"thread_id": run_id}}
+    
+    if args.resume:
+        snapshot = graph.get_state(run_config)
+        if not snapshot.values:
+            print(f"\n❌ ERRO: Execução não encontrada: {run_id}")
+            return
+        question = snapshot.values['user_question']
+    elif args.question:
         question = args.question
     else:
         question = "What are the tools I need to repair an iPhone 15 Pro Max?"
@@ -179,23 +422,81 @@ def main():
     if VERBOSE:
         print("\n" + "="*70)
         print(f"PERGUNTA: {question}")
+        if checkpointer is not None:
+            print(f"Run ID: {run_id} (retome com --resume {run_id})")
         print("="*70)
     
     # === 6. EXECUTAR ===
-    initial_state = create_initial_state(question, documents)
-    result = graph.invoke(initial_state)
+    if scheduler is not None:
+        scheduler.start()
+    
+    run_start = time.perf_counter()
+    
+    if args.resume:
+        if snapshot.next:
+            if VERBOSE:
+                print(f"\nRetomando a partir de: {', '.join(snapshot.next)}")
+            result = graph.invoke(None, run_config)
+        else:
+            if VERBOSE:
+                print("\nExecução já concluída, usando resultado salvo")
+            result = snapshot.values
+    else:
+        initial_state = create_initial_state(question, run_id=run_id)
+        result = graph.invoke(initial_state, run_config)
+    
+    timings = {"total_seconds": round(time.perf_counter() - run_start, 3)}
+    if scheduler is not None:
+        timings["budget"] = scheduler.summary()
+    timings["rate_limits"] = rate_limiter_stats()
+    if SEARCH_MODE != 'rag':
+        timings["search_providers"] = search_router.stats()
+        try:
+            search_router.save_histograms(search_latency_path)
+        except OSError as e:
+            if VERBOSE:
+                print(f"\n⚠️  Erro ao salvar latências de busca: {str(e)}")
+    if compressor is not None:
+        timings["context_compression"] = compressor.stats()
     
     # === 7. SALVAR RESULTADOS ===
-    if SAVE_RESULTS:
+    # Base dos arquivos de profiling: pasta oculta para não entrar no corpus
+    # (mesmo nome do relatório, quando houver)
+    profiles_dir = os.path.join(args.data_dir, PROFILES_DIR)
+    profile_base = os.path.join(profiles_dir, f"profile_{run_id}")
+    
+    if SAVE_RESULTS and args.archive:
         try:
-            saved_paths = save_research_results(
-                question=result['user_question'],
-                subtopics=result['subtopics'],
-                subagent_results=result['subagent_results'],
-                final_answer=result['final_answer'],
-                output_dir=args.data_dir,
-                save_web_sources=SAVE_SOURCES
-            )
+            archive = RunArchive(os.path.join(args.data_dir, ARCHIVE_DIR))
+            with profile_section(profiler, "save_results"):
+                archive.append(build_run_record(
+                    run_id=run_id,
+                    question=result['user_question'],
+                    subtopics=result['subtopics'],
+                    subagent_results=result['subagent_results'],
+                    final_answer=result['final_answer'],
+                    timings=timings,
+                    trace=result.get('trace', [])
+                ))
+            
+            if VERBOSE:
+                print(f"\n💾 Execução arquivada: {run_id}")
+                print(f"   📦 {archive.archive_dir} (exporte com --export {run_id})")
+        except Exception as e:
+            if VERBOSE:
+                print(f"\n⚠️  Erro ao arquivar: {str(e)}")
+    elif SAVE_RESULTS:
+        try:
+            with profile_section(profiler, "save_results"):
+                saved_paths = save_research_results(
+                    question=result['user_question'],
+                    subtopics=result['subtopics'],
+                    subagent_results=result['subagent_results'],
+                    final_answer=result['final_answer'],
+                    output_dir=args.data_dir,
+                    save_web_sources=SAVE_SOURCES
+                )
+            profile_base = os.path.join(profiles_dir, os.path.splitext(os.path.basename(saved_paths['formatted']))[0])
             
             if VERBOSE:
                 print(f"\n💾 Resultados salvos:")
@@ -206,6 +507,19 @@ def main():
             if VERBOSE:
                 print(f"\n⚠️  Erro ao salvar: {str(e)}")
     
+    if profiler is not None:
+        profiler.stop()
+        try:
+            os.makedirs(profiles_dir, exist_ok=True)
+            profile_paths = profiler.write_report(profile_base)
+            if VERBOSE:
+                print(f"\n🔬 Profiling salvo:")
+                print(f"   📄 Por node: {profile_paths['report']}")
+                print(f"   🔥 Flamegraph (collapsed): {profile_paths['collapsed']}")
+        except Exception as e:
+            if VERBOSE:
+                print(f"\n⚠️  Erro ao salvar profiling: {str(e)}")
+    
     # === 8. EXIBIR RESULTADO ===
     if VERBOSE:
         print("\n" + "="*70)
@@ -220,9 +534,28 @@ def main():
         
         print(f"\nPesquisas ({len(result['subagent_results'])}):")
         for res in result['subagent_results']:
-            status = "✅" if res['status'] == 'completed' else "❌"
+            status = {"completed": "✅", "skipped": "⏭️ "}.get(res['status'], "❌")
             print(f"   {status} {res['subtopic']}")
         
+        if scheduler is not None:
+            budget = scheduler.summary()
+            print(f"\nOrçamento: {budget['elapsed_seconds']}s, {budget['llm_calls']} chamadas ao LLM")
+        
+        for name, stats in timings["rate_limits"].items():
+            if stats["throttled"]:
+                print(f"Rate limit ({name}): {stats['throttled']}/{stats['requests']} requisições esperaram "
+                      f"(média {stats['mean_wait']:.2f}s, máx {stats['max_wait']:.2f}s)")
+        
+        if len(timings.get("search_providers", {})) > 1:
+            for name, stats in timings["search_providers"].items():
+                print(f"Busca ({name}): {stats['wins']}/{stats['requests']} vitórias, "
+                      f"{stats['failures']} falhas, {stats['short']} curtas, p50 ~{stats['p50_seconds'] or 0:.2f}s")
+        
+        if compressor is not None:
+            compression = timings["context_compression"]
+            print(f"Compressão de contexto: ~{compression['saved_tokens']} tokens economizados "
+                  f"em {compression['prompts']} prompts ({compression['saved_fraction']:.0%})")
+        
         print(f"\nRESPOSTA FINAL:")
         print("-" * 70)
     
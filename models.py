@@ -1,46 +1,146 @@
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint, HuggingFaceEmbeddings
+from typing import Callable, Dict
 from config import Config
+from llm_client import ResilientLLM
+from concurrency import make_thread_safe_embeddings
 
-def initialize_llm(config: Config):
+# Registro de backends de LLM: nome → função que recebe Config e retorna um chat model
+LLM_BACKENDS: Dict[str, Callable[[Config], object]] = {}
+
+def register_llm_backend(name: str):
     """
-    Inicializa o modelo LLM HuggingFace
-    
-    Returns:
-        ChatHuggingFace: Modelo pronto para uso
+    Decorator para registrar um backend de LLM selecionável via `Config.llm_backend`
     """
-    if config.verbose:
-        print(f"Carregando LLM: {config.llm_model}")
+    def decorator(factory):
+        LLM_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+@register_llm_backend("huggingface")
+def create_huggingface_llm(config: Config):
+    """HuggingFace Inference Endpoint via ChatHuggingFace"""
+    import math
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
     
     endpoint = HuggingFaceEndpoint(
         repo_id=config.llm_model,
         huggingfacehub_api_token=config.hf_token,
         temperature=config.temperature,
         max_new_tokens=config.max_tokens,
-        task="conversational"
+        task="conversational",
+        # Requisição abandonada pelo ResilientLLM não segura a thread além do deadline
+        timeout=int(math.ceil(config.llm_timeout))
+    )
+    
+    return ChatHuggingFace(llm=endpoint)
+
+@register_llm_backend("openai_compatible")
+def create_openai_compatible_llm(config: Config):
+    """Servidor local compatível com OpenAI (vLLM, llama.cpp server, TGI)"""
+    from local_llm import OpenAICompatibleChat
+    
+    return OpenAICompatibleChat(
+        base_url=config.llm_base_url,
+        model=config.llm_model,
+        api_key=config.llm_api_key,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        max_connections=config.llm_pool_size,
+        max_concurrency=config.llm_max_concurrency,
+        timeout=config.llm_timeout
     )
+
+def initialize_llm(config: Config):
+    """
+    Inicializa o modelo LLM do backend configurado em `config.llm_backend`
     
-    llm = ChatHuggingFace(llm=endpoint)
+    Returns:
+        ResilientLLM: Chat model com deadlines, retries e circuit breaker
+    """
+    if config.llm_backend not in LLM_BACKENDS:
+        raise ValueError(
+            f"Backend de LLM desconhecido: {config.llm_backend} "
+            f"(disponíveis: {', '.join(sorted(LLM_BACKENDS))})"
+        )
+    
+    if config.verbose:
+        print(f"Carregando LLM: {config.llm_model} ({config.llm_backend})")
+    
+    llm = LLM_BACKENDS[config.llm_backend](config)
+    llm = ResilientLLM(llm, config, name=f"{config.llm_backend}:{config.llm_model}")
     
     if config.verbose:
         print("LLM carregado")
     
     return llm
 
+# Registro de backends de embeddings: nome → função que recebe Config e retorna o modelo
+EMBEDDING_BACKENDS: Dict[str, Callable[[Config], object]] = {}
+
+def register_embedding_backend(name: str):
+    """
+    Decorator para registrar um backend de embeddings selecionável via `Config.embedding_backend`
+    """
+    def decorator(factory):
+        EMBEDDING_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+@register_embedding_backend("huggingface")
+def create_huggingface_embeddings(config: Config):
+    """sentence-transformers em PyTorch (backend original)"""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    
+    if config.embedding_threads:
+        import torch
+        torch.set_num_threads(config.embedding_threads)
+    
+    return HuggingFaceEmbeddings(
+        model_name=config.embedding_model,
+        encode_kwargs={"batch_size": config.embedding_batch_size}
+    )
+
+def _create_fast_embeddings(config: Config):
+    from fast_embeddings import FastCPUEmbeddings
+    
+    return FastCPUEmbeddings(
+        config.embedding_model,
+        backend=config.embedding_backend,
+        batch_size=config.embedding_batch_size,
+        num_threads=config.embedding_threads,
+        onnx_file=config.embedding_onnx_file
+    )
+
+for _name in ("onnx", "onnx_int8", "torch_int8"):
+    register_embedding_backend(_name)(_create_fast_embeddings)
+
 def initialize_embeddings(config: Config):
     """
-    Inicializa modelo de embeddings MiniLM
+    Inicializa modelo de embeddings MiniLM no backend configurado em `config.embedding_backend`
     
     Returns:
-        HuggingFaceEmbeddings: Modelo de embeddings
+        Embeddings: Modelo de embeddings (interface LangChain)
     """
+    if config.embedding_backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Backend de embeddings desconhecido: {config.embedding_backend} "
+            f"(disponíveis: {', '.join(sorted(EMBEDDING_BACKENDS))})"
+        )
+    
     if config.verbose:
-        print(f"Carregando embeddings: {config.embedding_model}")
+        print(f"Carregando embeddings: {config.embedding_model} ({config.embedding_backend})")
     
-    embeddings = HuggingFaceEmbeddings(
-        model_name=config.embedding_model
-    )
+    embeddings = EMBEDDING_BACKENDS[config.embedding_backend](config)
+    
+    if config.embedding_warmup:
+        from fast_embeddings import SAMPLE_TEXTS
+        embeddings.embed_documents(SAMPLE_TEXTS)
     
     if config.verbose:
         print("Embeddings carregados")
     
-    return embeddings
\ No newline at end of file
+    # Compartilhado por todas as threads: tokenizer não é thread-safe, então
+    # chamadas simultâneas usam réplicas (carregadas só quando há concorrência)
+    def create_replica():
+        return EMBEDDING_BACKENDS[config.embedding_backend](config)
+
+    return make_thread_safe_embeddings(embeddings, factory=create_replica, max_replicas=config.embedding_replicas)
@@ -0,0 +1,253 @@
+"""
+Vector store compacto em NumPy (alternativa ao FAISS para corpora pequenos/médios)
+
+- Vetores em float16 ou int8 com escala por linha (1/2 ou 1/4 da memória do
+  float32 do FAISS), abertos com memmap: carregar o índice é instantâneo
+- Busca exata por produto de matrizes, em blocos, para várias queries de uma vez
+- Textos e metadata dos chunks num arquivo JSONL indexado por offsets
+  (nenhum docstore em pickle para desserializar)
+
+Mesma métrica do FAISS padrão do LangChain (IndexFlatL2): score = distância
+L2 ao quadrado, menor = mais similar.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+VECTOR_DTYPES = ("float16", "int8")
+
+META_FILENAME = "numpy_store.json"
+VECTORS_FILENAME = "vectors.bin"
+SCALES_FILENAME = "scales.f32"
+NORMS_FILENAME = "norms.f32"
+CHUNKS_FILENAME = "chunks.jsonl"
+OFFSETS_FILENAME = "offsets.i64"
+
+# Linhas por bloco na busca (limita a memória temporária do dequantize)
+SEARCH_BLOCK_ROWS = 65536
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Converte vetores float32 para o formato de armazenamento
+
+    Returns:
+        Tuple: (vetores armazenados, escala por linha ou None)
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        # Quantização escalar simétrica por linha: x ≈ codes * scale
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"dtype inválido: {dtype} (disponíveis: {', '.join(VECTOR_DTYPES)})")
+
+class NumpyVectorStore:
+    """
+    Índice exato em NumPy com a interface de busca usada pelo projeto
+    (`similarity_search*`, compatível com `search_documents` e ShardedVectorStore)
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray],
+        norms: np.ndarray,
+        chunks,
+        embeddings,
+        dtype: str
+    ):
+        self.vectors = vectors
+        self.scales = scales
+        self.norms = norms
+        self.embeddings = embeddings
+        self.dtype = dtype
+        # Lista de (texto, metadata) em memória ou _ChunkFile (memmap)
+        self._chunks = chunks
+
+    def __len__(self) -> int:
+        return len(self.norms)
+
+    # === CONSTRUÇÃO / PERSISTÊNCIA ===
+
+    @classmethod
+    def from_documents(cls, documents: List[Document], embeddings, dtype: str = "float16") -> "NumpyVectorStore":
+        vectors = np.asarray(
+            embeddings.embed_documents([doc.page_content for doc in documents]),
+            dtype=np.float32
+        ).reshape(len(documents), -1)
+        stored, scales = quantize(vectors, dtype)
+
+        # Normas calculadas dos vetores JÁ quantizados (consistentes com a busca)
+        dequantized = stored.astype(np.float32)
+        if scales is not None:
+            dequantized *= scales[:, None]
+        norms = np.einsum("ij,ij->i", dequantized, dequantized).astype(np.float32)
+
+        chunks = [(doc.page_content, dict(doc.metadata)) for doc in documents]
+        return cls(stored, scales, norms, chunks, embeddings, dtype)
+
+    def save_local(self, folder_path: str):
+        os.makedirs(folder_path, exist_ok=True)
+
+        np.ascontiguousarray(self.vectors).tofile(os.path.join(folder_path, VECTORS_FILENAME))
+        np.ascontiguousarray(self.norms, dtype=np.float32).tofile(os.path.join(folder_path, NORMS_FILENAME))
+        if self.scales is not None:
+            np.ascontiguousarray(self.scales, dtype=np.float32).tofile(os.path.join(folder_path, SCALES_FILENAME))
+
+        offsets = [0]
+        with open(os.path.join(folder_path, CHUNKS_FILENAME), 'wb') as f:
+            for index in range(len(self)):
+                text, metadata = self._chunk(index)
+                line = (json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False) + "\n").encode('utf-8')
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.asarray(offsets, dtype=np.int64).tofile(os.path.join(folder_path, OFFSETS_FILENAME))
+
+        # Metadados por último: marcam o índice como completo
+        with open(os.path.join(folder_path, META_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump({"dtype": self.dtype, "count": len(self), "dim": int(self.vectors.shape[1]) if len(self) else 0}, f)
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings) -> "NumpyVectorStore":
+        """Abre o índice com memmap (nada é lido até a primeira busca)"""
+        with open(os.path.join(folder_path, META_FILENAME), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        count, dim, dtype = meta["count"], meta["dim"], meta["dtype"]
+
+        def mapped(filename, np_dtype, shape):
+            if not count:
+                return np.zeros(shape, dtype=np_dtype)
+            return np.memmap(os.path.join(folder_path, filename), dtype=np_dtype, mode='r', shape=shape)
+
+        vectors = mapped(VECTORS_FILENAME, np.dtype(dtype), (count, dim))
+        norms = mapped(NORMS_FILENAME, np.float32, (count,))
+        scales = mapped(SCALES_FILENAME, np.float32, (count,)) if dtype == "int8" else None
+        chunks = _ChunkFile(folder_path, count)
+
+        return cls(vectors, scales, norms, chunks, embeddings, dtype)
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        return os.path.exists(os.path.join(folder_path, META_FILENAME))
+
+    # === BUSCA ===
+
+    def _chunk(self, index: int) -> Tuple[str, Dict]:
+        return self._chunks[index]
+
+    def _document(self, index: int) -> Document:
+        text, metadata = self._chunk(index)
+        return Document(page_content=text, metadata=metadata)
+
+    def search_vectors(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k exato para um batch de queries
+
+        Args:
+            queries: Matriz (m, dim) float32
+
+        Returns:
+            Tuple: (índices (m, k), distâncias L2² (m, k)), ordenados por distância
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.vectors.shape[1] if len(self) else queries.shape[-1])
+        k = min(k, len(self))
+        if k == 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        best_indices = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            products = queries @ block.T  # (m, rows)
+            if self.scales is not None:
+                products *= np.asarray(self.scales[start:start + SEARCH_BLOCK_ROWS])[None, :]
+
+            # ||q - x||² = ||q||² + ||x||² - 2 q·x
+            scores = query_norms[:, None] + np.asarray(self.norms[start:start + SEARCH_BLOCK_ROWS])[None, :] - 2.0 * products
+
+            block_k = min(k, scores.shape[1])
+            top = np.argpartition(scores, block_k - 1, axis=1)[:, :block_k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+
+            # Junta com o melhor dos blocos anteriores e mantém k
+            best_indices = np.concatenate([best_indices, top + start], axis=1)
+            best_scores = np.concatenate([best_scores, top_scores], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(best_scores, k - 1, axis=1)[:, :k]
+                best_indices = np.take_along_axis(best_indices, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(best_scores, axis=1, kind="stable")
+        best_indices = np.take_along_axis(best_indices, order, axis=1)
+        best_scores = np.maximum(np.take_along_axis(best_scores, order, axis=1), 0.0)
+        return best_indices, best_scores
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        indices, scores = self.search_vectors(np.asarray([embedding], dtype=np.float32), k)
+        return [(self._document(int(i)), float(score)) for i, score in zip(indices[0], scores[0])]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def batch_similarity_search(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """Várias queries num único embed + produto de matrizes"""
+        if not queries:
+            return []
+        vectors = np.asarray(self.embeddings.embed_documents(list(queries)), dtype=np.float32)
+        indices, _ = self.search_vectors(vectors, k)
+        return [[self._document(int(i)) for i in row] for row in indices]
+
+class _ChunkFile:
+    """Textos/metadata dos chunks lidos sob demanda de um JSONL via offsets (memmap, thread-safe)"""
+
+    def __init__(self, folder_path: str, count: int):
+        self.count = count
+        if count:
+            self._offsets = np.memmap(os.path.join(folder_path, OFFSETS_FILENAME), dtype=np.int64, mode='r', shape=(count + 1,))
+            self._data = np.memmap(os.path.join(folder_path, CHUNKS_FILENAME), dtype=np.uint8, mode='r')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Tuple[str, Dict]:
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        record = json.loads(self._data[start:end].tobytes().decode('utf-8'))
+        return record["text"], record["metadata"]
+
+def search_parity(reference, candidate, queries: List[str], k: int = 5) -> Dict[str, float]:
+    """
+    Compara os resultados de dois vector stores (ex: FAISS x NumpyVectorStore)
+
+    Returns:
+        Dict: recall@k médio (fração dos chunks do reference também retornados
+            pelo candidate) e concordância do top-1
+    """
+    recalls = []
+    top1 = []
+    for query in queries:
+        expected = [doc.page_content for doc in reference.similarity_search(query, k=k)]
+        found = [doc.page_content for doc in candidate.similarity_search(query, k=k)]
+        if not expected:
+            continue
+        recalls.append(len(set(expected) & set(found)) / len(expected))
+        top1.append(1.0 if found and found[0] == expected[0] else 0.0)
+
+    return {
+        "recall_at_k": sum(recalls) / len(recalls) if recalls else 1.0,
+        "top1_agreement": sum(top1) / len(top1) if top1 else 1.0,
+        "queries": len(recalls),
+    }
@@ -0,0 +1,191 @@
+"""
+Prefetch especulativo de recuperação (RAG interno e modo híbrido)
+
+Enquanto o supervisor espera o LLM, embeddings e índice ficam ociosos. O node
+de prefetch roda em paralelo com ele: busca candidatos para a pergunta
+original e para expansões baratas por palavras-chave (sem LLM) e guarda os
+chunks com seus embeddings. Quando os subtópicos chegam, cada um próximo o
+bastante de uma query pré-buscada (similaridade ≥ `prefetch_min_similarity`)
+é respondido reordenando esse pool, sem nova busca no índice.
+
+O cache é por execução (`run_id`) e compartilhado pelo grafo: nada de vetores
+no estado do LangGraph (checkpoint).
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from vector_store import search_documents_by_vector
+
+# Palavras sem conteúdo descartadas das expansões (perguntas em inglês ou português)
+STOPWORDS = frozenset("""
+    a an and are as at be but by can do does for from how i in is it its me my of on or
+    should that the their there these this to use used using was what when where which who
+    why will with you your
+    as ao aos com como da das de do dos e em na nas no nos o os ou para pela pelo por qual
+    quais quando que se sem ser sobre um uma umas uns é são
+""".split())
+
+# Palavras-chave consecutivas por expansão
+EXPANSION_WINDOW = 3
+
+# Execuções mantidas no cache (execuções concorrentes na mesma sessão)
+MAX_CACHED_RUNS = 16
+
+def keyword_expansions(question: str, max_expansions: int = 3) -> List[str]:
+    """
+    Queries alternativas baratas: palavras-chave da pergunta e janelas delas
+
+    Ex: "How do OAuth refresh tokens expire in mobile apps?" →
+    ["oauth refresh tokens expire mobile apps", "oauth refresh tokens", "tokens expire mobile"]
+    """
+    keywords = []
+    for word in re.findall(r"[\w-]+", question.lower()):
+        if len(word) > 2 and word not in STOPWORDS and word not in keywords:
+            keywords.append(word)
+
+    candidates = [" ".join(keywords)]
+    step = max(1, EXPANSION_WINDOW - 1)
+    for start in range(0, max(1, len(keywords) - 1), step):
+        candidates.append(" ".join(keywords[start:start + EXPANSION_WINDOW]))
+
+    expansions = []
+    for candidate in candidates:
+        if candidate and candidate != question.lower().strip() and candidate not in expansions:
+            expansions.append(candidate)
+    return expansions[:max_expansions]
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+class PrefetchCache:
+    """
+    Candidatos pré-buscados por execução (thread-safe)
+
+    Args:
+        embeddings: Modelo de embeddings (queries, chunks do pool e subtópicos)
+        candidates: Chunks buscados por query pré-buscada
+        max_expansions: Expansões por palavras-chave além da pergunta
+        min_similarity: Similaridade mínima subtópico ↔ query pré-buscada para usar o pool
+    """
+
+    def __init__(self, embeddings, candidates: int = 20, max_expansions: int = 3, min_similarity: float = 0.6):
+        self.embeddings = embeddings
+        self.candidates = candidates
+        self.max_expansions = max_expansions
+        self.min_similarity = min_similarity
+
+        self._lock = threading.Lock()
+        self._runs: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def prefetch(self, run_id: str, question: str, vectorstore) -> Dict:
+        """
+        Busca e guarda o pool de candidatos da execução
+
+        Returns:
+            Dict: Resumo para o trace (queries, candidatos, segundos)
+        """
+        start = time.perf_counter()
+        queries = [question] + keyword_expansions(question, self.max_expansions)
+
+        # Um batch de embeddings para todas as queries
+        query_vectors = self.embeddings.embed_documents(queries)
+
+        chunks = []
+        for vector in query_vectors:
+            for chunk in search_documents_by_vector(vectorstore, vector, k=self.candidates):
+                if chunk not in chunks:
+                    chunks.append(chunk)
+
+        pool = {
+            "queries": queries,
+            "query_vectors": _normalize(query_vectors),
+            "chunks": chunks,
+            "chunk_vectors": _normalize(self.embeddings.embed_documents(chunks)) if chunks else None,
+        }
+        with self._lock:
+            self._runs[run_id] = pool
+            self._runs.move_to_end(run_id)
+            while len(self._runs) > MAX_CACHED_RUNS:
+                self._runs.popitem(last=False)
+
+        return {
+            "queries": queries,
+            "candidates": len(chunks),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def lookup(self, run_id: str, subtopics: List[str], k: int) -> Dict[str, List[str]]:
+        """
+        Top-k do pool para os subtópicos cobertos pelo prefetch
+
+        Returns:
+            Dict[str, List[str]]: subtópico → chunks (mais similar primeiro),
+                só para os hits; os demais devem ser buscados no índice
+        """
+        with self._lock:
+            pool = self._runs.get(run_id)
+        if pool is None or not subtopics or len(pool["chunks"]) < k:
+            return {}
+
+        vectors = _normalize(self.embeddings.embed_documents(subtopics))
+        coverage = (vectors @ pool["query_vectors"].T).max(axis=1)
+        scores = vectors @ pool["chunk_vectors"].T
+
+        hits = {}
+        for i, subtopic in enumerate(subtopics):
+            if coverage[i] < self.min_similarity:
+                continue
+            order = np.argsort(-scores[i], kind="stable")[:k]
+            hits[subtopic] = [pool["chunks"][j] for j in order]
+        return hits
+
+def create_prefetch_cache(config: Config, embeddings) -> Optional[PrefetchCache]:
+    """PrefetchCache se `config.prefetch` estiver ativo e houver embeddings"""
+    if not config.prefetch or embeddings is None:
+        return None
+    return PrefetchCache(
+        embeddings,
+        candidates=config.prefetch_candidates,
+        max_expansions=config.prefetch_expansions,
+        min_similarity=config.prefetch_min_similarity
+    )
+
+def prefetched_candidates(
+    prefetch_cache: Optional[PrefetchCache],
+    state: Dict,
+    node: str,
+    subtopics: List[str],
+    k: int,
+    verbose: bool = False
+) -> Tuple[Dict[str, List[str]], List[Dict]]:
+    """
+    `prefetch_cache.lookup` para um node de pesquisa, com a taxa de acerto no trace
+
+    Returns:
+        Tuple: (subtópico → chunks para os hits, entradas do trace)
+    """
+    if prefetch_cache is None or not subtopics:
+        return {}, []
+    try:
+        hits = prefetch_cache.lookup(state["run_id"], subtopics, k)
+    except Exception as e:
+        if verbose:
+            print(f"Erro ao consultar o prefetch ({str(e)}), buscando no índice")
+        return {}, []
+
+    if verbose:
+        print(f"Prefetch: {len(hits)}/{len(subtopics)} subtópicos atendidos pelo pool")
+
+    return hits, [{
+        "node": node,
+        "event": "prefetch_lookup",
+        "round": state.get("research_round", 1),
+        "hits": len(hits),
+        "misses": len(subtopics) - len(hits),
+        "hit_rate": round(len(hits) / len(subtopics), 3),
+    }]
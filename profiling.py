@@ -0,0 +1,209 @@
+"""
+Profiling de CPU e memória por node do grafo (modo --profile)
+
+Cada seção (node do grafo, construção do índice, gravação dos resultados) é
+medida com:
+- cProfile: hotspots da thread que executa a seção
+- amostragem de pilhas (todas as threads, inclusive os workers dos agents):
+  arquivo collapsed compatível com flamegraph.pl / speedscope
+- tracemalloc: pico de memória e linhas que mais alocaram
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+class NodeProfiler:
+    """
+    Profiler por seção nomeada
+
+    Uso:
+        profiler.start()
+        with profiler.profile("index_build"):
+            ...
+        node = profiler.wrap("supervisor", node)
+        profiler.stop()
+        profiler.write_report("data/minha_pesquisa")
+    """
+
+    def __init__(self, sample_interval: float = 0.005, top_functions: int = 20, top_allocations: int = 10):
+        self.sample_interval = sample_interval
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+
+        self.sections: List[Dict] = []
+        self.stacks: Counter = Counter()
+
+        self._lock = threading.Lock()
+        self._active: List[str] = []
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    # === CICLO DE VIDA ===
+
+    def start(self):
+        """Inicia tracemalloc e a thread de amostragem"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # === AMOSTRAGEM ===
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.sample_interval):
+            with self._lock:
+                if not self._active:
+                    continue
+                section = self._active[-1]
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._frame_label(frame))
+                    frame = frame.f_back
+                # Threads ociosas (esperando em locks/filas) não interessam
+                if labels and labels[0].startswith(("wait (", "_wait_for_tstate_lock", "select (", "poll (")):
+                    continue
+                stack = ";".join([section] + labels[::-1])
+                with self._lock:
+                    self.stacks[stack] += 1
+
+    # === SEÇÕES ===
+
+    @contextmanager
+    def profile(self, name: str):
+        """Mede uma seção (cProfile da thread atual + memória + amostras de todas as threads)"""
+        profile = cProfile.Profile()
+        snapshot_before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+
+        with self._lock:
+            self._active.append(name)
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+            with self._lock:
+                self._active.remove(name)
+
+            section = {"name": name, "wall_seconds": wall, "cpu_seconds": cpu, "profile": profile}
+            if snapshot_before is not None:
+                # Pico acima da memória já alocada no início da seção
+                section["peak_bytes"] = tracemalloc.get_traced_memory()[1] - memory_start
+                section["allocations"] = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")[:self.top_allocations]
+
+            with self._lock:
+                self.sections.append(section)
+
+    def wrap(self, name: str, node):
+        """Envolve um node do grafo numa seção com o nome dele"""
+        @functools.wraps(node)
+        def profiled_node(state):
+            with self.profile(name):
+                return node(state)
+        return profiled_node
+
+    # === RELATÓRIO ===
+
+    def _format_section(self, section: Dict) -> str:
+        lines = [
+            "=" * 80,
+            f"NODE: {section['name']}",
+            "=" * 80,
+            f"Tempo (wall): {section['wall_seconds']:.3f}s",
+            f"CPU (processo): {section['cpu_seconds']:.3f}s",
+        ]
+        if "peak_bytes" in section:
+            lines.append(f"Pico de memória (tracemalloc, acima do início do node): {section['peak_bytes'] / 1024 / 1024:.1f} MB")
+
+        samples = sum(count for stack, count in self.stacks.items() if stack.split(";", 1)[0] == section["name"])
+        lines.append(f"Amostras de pilha: {samples}")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(section["profile"], stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top_functions)
+        lines += ["", "Hotspots (cProfile, thread do node, por tempo acumulado):", stream.getvalue().strip()]
+
+        if section.get("allocations"):
+            lines += ["", "Maiores alocações (tracemalloc, diferença na seção):"]
+            for stat in section["allocations"]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"   {stat.size_diff / 1024:+10.1f} KB  {stat.count_diff:+8d} blocos  "
+                    f"{frame.filename}:{frame.lineno}"
+                )
+
+        return "\n".join(lines)
+
+    def write_report(self, base_path: str) -> Dict[str, str]:
+        """
+        Grava `<base_path>_profile.txt` (tabelas por node) e
+        `<base_path>_profile.collapsed` (pilhas para flamegraph)
+
+        Returns:
+            Dict[str, str]: Caminhos dos arquivos gravados
+        """
+        with self._lock:
+            sections = list(self.sections)
+            stacks = dict(self.stacks)
+
+        report_path = f"{base_path}_profile.txt"
+        collapsed_path = f"{base_path}_profile.collapsed"
+
+        summary = ["RESUMO", "-" * 80]
+        for section in sections:
+            peak = f"{section['peak_bytes'] / 1024 / 1024:8.1f} MB" if "peak_bytes" in section else "        -"
+            summary.append(
+                f"{section['name']:<24} wall {section['wall_seconds']:8.3f}s   "
+                f"cpu {section['cpu_seconds']:8.3f}s   pico {peak}"
+            )
+
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(summary) + "\n\n")
+            f.write("\n\n".join(self._format_section(section) for section in sections))
+            f.write("\n")
+
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        return {"report": report_path, "collapsed": collapsed_path}
+
+def profile_section(profiler: Optional[NodeProfiler], name: str):
+    """`profiler.profile(name)` ou um contexto vazio se o profiling estiver desligado"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.profile(name)
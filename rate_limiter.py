@@ -0,0 +1,234 @@
+"""
+Rate limiter (token bucket) compartilhado por backend: LLM e busca web
+
+Um limiter por nome ("llm", "search"), compartilhado por todos os agents e
+workers do processo. Opcionalmente o bucket é compartilhado entre processos
+por um arquivo de estado com lock (fcntl).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+from config import Config
+
+class RateLimitTimeout(TimeoutError):
+    """Não foi possível obter vaga no rate limiter dentro do prazo"""
+
+class _FileBucketState:
+    """Estado do token bucket num arquivo com lock exclusivo (compartilhado entre processos)"""
+
+    def __init__(self, path: str):
+        import fcntl  # POSIX
+
+        self._fcntl = fcntl
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    @contextmanager
+    def locked(self, burst: float):
+        """Yields o estado {'tokens', 'updated'}; alterações são gravadas ao sair"""
+        with open(self.path, 'a+', encoding='utf-8') as f:
+            self._fcntl.flock(f.fileno(), self._fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                except ValueError:
+                    state = {"tokens": burst, "updated": time.time()}
+
+                yield state
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                self._fcntl.flock(f.fileno(), self._fcntl.LOCK_UN)
+
+class RateLimiter:
+    """
+    Token bucket com limite de requisições simultâneas
+
+    Args:
+        name: Nome do backend (métricas)
+        rate: Requisições por segundo (None = sem limite de taxa)
+        burst: Requisições permitidas de uma vez após um período ocioso
+        max_concurrent: Requisições em andamento ao mesmo tempo (None = sem limite)
+        state_file: Arquivo para compartilhar o bucket entre processos
+            (o limite de concorrência continua por processo)
+
+    Reservas em ordem de chegada: cada requisição reserva o próximo token e
+    dorme até ele existir, então ninguém fica em busy-wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        max_concurrent: Optional[int] = None,
+        state_file: Optional[str] = None
+    ):
+        self.name = name
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = max(1, burst)
+        self.max_concurrent = max_concurrent
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._file_state = _FileBucketState(state_file) if state_file and self.rate else None
+
+        # Métricas
+        self._requests = 0
+        self._in_flight = 0
+        self._waits = deque(maxlen=1000)
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _reserve(self, tokens: float, updated: float, now: float, max_wait: Optional[float]):
+        """Reserva um token: retorna (espera, tokens, updated) ou None se a espera passar de max_wait"""
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        wait = max(0.0, (1.0 - tokens) / self.rate)
+        if max_wait is not None and wait > max_wait:
+            return None
+        return wait, tokens - 1.0, now
+
+    def _reserve_token(self, max_wait: Optional[float]) -> float:
+        """Reserva o próximo token e retorna quantos segundos esperar por ele"""
+        if self.rate is None:
+            return 0.0
+
+        if self._file_state is not None:
+            # Relógio de parede: comparável entre processos
+            with self._file_state.locked(self.burst) as state:
+                reservation = self._reserve(state["tokens"], state["updated"], time.time(), max_wait)
+                if reservation is not None:
+                    state["tokens"], state["updated"] = reservation[1], reservation[2]
+        else:
+            with self._lock:
+                reservation = self._reserve(self._tokens, self._updated, time.monotonic(), max_wait)
+                if reservation is not None:
+                    self._tokens, self._updated = reservation[1], reservation[2]
+
+        if reservation is None:
+            raise RateLimitTimeout(f"Rate limiter '{self.name}': fila maior que {max_wait:.1f}s")
+        return reservation[0]
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        Aguarda vaga (concorrência + token) e mantém a requisição em andamento
+
+        Args:
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Raises:
+            RateLimitTimeout: Vaga não disponível dentro do prazo
+        """
+        start = time.monotonic()
+
+        if self._slots is not None:
+            if not self._slots.acquire(timeout=timeout):
+                raise RateLimitTimeout(f"Rate limiter '{self.name}': {self.max_concurrent} requisições em andamento")
+
+        try:
+            remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+            wait = self._reserve_token(remaining)
+            if wait > 0:
+                time.sleep(wait)
+        except BaseException:
+            if self._slots is not None:
+                self._slots.release()
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._waits.append(waited)
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> Dict:
+        """Métricas de espera na fila (segundos)"""
+        with self._lock:
+            waits = sorted(self._waits)
+            requests = self._requests
+            return {
+                "requests": requests,
+                "in_flight": self._in_flight,
+                "throttled": sum(1 for wait in waits if wait > 0.001),
+                "mean_wait": round(self._total_wait / requests, 4) if requests else 0.0,
+                "p95_wait": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 4) if waits else 0.0,
+                "max_wait": round(self._max_wait, 4),
+            }
+
+
+# Limiters por backend, compartilhados pelo processo inteiro
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Retorna o limiter do backend (sem limites se não configurado)"""
+    with _LIMITERS_LOCK:
+        if name not in _LIMITERS:
+            _LIMITERS[name] = RateLimiter(name)
+        return _LIMITERS[name]
+
+def configure_rate_limiters(config: Config):
+    """Cria os limiters "llm", "search" e "search:<motor>" a partir da configuração (substitui os atuais)"""
+    def state_file(name: str) -> Optional[str]:
+        if not config.rate_limit_state_dir:
+            return None
+        return os.path.join(config.rate_limit_state_dir, f"{name}.ratelimit")
+
+    limiters = {
+        "llm": RateLimiter(
+            "llm",
+            rate=config.llm_rate_limit,
+            burst=config.llm_rate_burst,
+            max_concurrent=config.llm_rate_max_concurrent,
+            state_file=state_file("llm")
+        ),
+        "search": RateLimiter(
+            "search",
+            rate=config.search_rate_limit,
+            burst=config.search_rate_burst,
+            max_concurrent=config.search_rate_max_concurrent,
+            state_file=state_file("search")
+        ),
+    }
+    # Motores de busca além do DuckDuckGo (search_providers): um bucket cada, mesmos limites
+    for provider in config.search_providers or []:
+        if provider in ("ddgs", "duckduckgo"):
+            continue
+        name = f"search:{provider}"
+        limiters[name] = RateLimiter(
+            name,
+            rate=config.search_rate_limit,
+            burst=config.search_rate_burst,
+            max_concurrent=config.search_rate_max_concurrent,
+            state_file=state_file(f"search_{provider}")
+        )
+    
+    with _LIMITERS_LOCK:
+        _LIMITERS.update(limiters)
+
+def rate_limiter_stats() -> Dict[str, Dict]:
+    """Métricas de todos os limiters do processo"""
+    with _LIMITERS_LOCK:
+        limiters = dict(_LIMITERS)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
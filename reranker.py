@@ -0,0 +1,102 @@
+"""
+Reranking com cross-encoder (CPU) após a busca vetorial
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+from config import Config
+
+class CrossEncoderReranker:
+    """
+    Reordena candidatos da busca vetorial com um cross-encoder
+
+    Todos os pares (subtópico, chunk) de uma rodada são pontuados juntos,
+    em batches, respeitando um orçamento de latência.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, max_length: int = 512, cache_dir: Optional[str] = None):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        # Tokenizer do cross-encoder não é thread-safe: um scoring por vez
+        self._lock = threading.Lock()
+        self.model = CrossEncoder(
+            model_name,
+            device="cpu",
+            max_length=max_length,
+            cache_folder=cache_dir
+        )
+
+    def rerank(
+        self,
+        candidates: Dict[str, List[str]],
+        top_n: int,
+        latency_budget: Optional[float] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Reordena os candidatos de cada query
+
+        Args:
+            candidates: query → chunks na ordem da busca vetorial
+            top_n: Quantos chunks manter por query
+            latency_budget: Segundos máximos de scoring. Pares não pontuados a tempo
+                mantêm a ordem original, depois dos pontuados
+
+        Returns:
+            Dict[str, List[str]]: query → melhores `top_n` chunks
+        """
+        # Intercala por posição (rank 0 de todas as queries, depois rank 1, ...) para que,
+        # se o orçamento estourar, os melhores candidatos de cada query já tenham sido pontuados
+        pairs = []
+        max_len = max((len(chunks) for chunks in candidates.values()), default=0)
+        for rank in range(max_len):
+            for query, chunks in candidates.items():
+                if rank < len(chunks):
+                    pairs.append((query, rank))
+
+        scores: Dict[tuple, float] = {}
+        start = time.perf_counter()
+
+        for offset in range(0, len(pairs), self.batch_size):
+            if latency_budget is not None and time.perf_counter() - start > latency_budget:
+                break
+            batch = pairs[offset:offset + self.batch_size]
+            with self._lock:
+                batch_scores = self.model.predict(
+                    [(query, candidates[query][rank]) for query, rank in batch],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
+            for pair, score in zip(batch, batch_scores):
+                scores[pair] = float(score)
+
+        reranked = {}
+        for query, chunks in candidates.items():
+            scored = sorted(
+                (rank for rank in range(len(chunks)) if (query, rank) in scores),
+                key=lambda rank: scores[(query, rank)],
+                reverse=True
+            )
+            unscored = [rank for rank in range(len(chunks)) if (query, rank) not in scores]
+            reranked[query] = [chunks[rank] for rank in (scored + unscored)[:top_n]]
+
+        return reranked
+
+
+# Modelos carregados uma única vez por processo
+_RERANKERS: Dict[str, CrossEncoderReranker] = {}
+_RERANKERS_LOCK = threading.Lock()
+
+def get_reranker(config: Config) -> CrossEncoderReranker:
+    """Retorna o reranker do modelo configurado (carrega na primeira chamada)"""
+    with _RERANKERS_LOCK:
+        if config.rerank_model not in _RERANKERS:
+            if config.verbose:
+                print(f"Carregando reranker: {config.rerank_model}")
+            _RERANKERS[config.rerank_model] = CrossEncoderReranker(
+                config.rerank_model,
+                batch_size=config.rerank_batch_size,
+                cache_dir=config.rerank_cache_dir
+            )
+        return _RERANKERS[config.rerank_model]
@@ -0,0 +1,225 @@
+"""
+Scheduler de pesquisa com orçamento de latência (deadline) e de chamadas ao LLM
+
+Decide quantos subtópicos pesquisar, reduz contexto / max_tokens quando o
+tempo aperta e interrompe subtópicos atrasados, sempre reservando tempo e uma
+chamada para a síntese.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+from config import Config
+
+class BudgetExhausted(RuntimeError):
+    """Orçamento de tempo ou de chamadas ao LLM esgotado"""
+
+class ResearchScheduler:
+    """
+    Controla o orçamento de uma execução
+
+    Thread-safe: pode ser consultado por vários workers ao mesmo tempo.
+    """
+
+    # Fração mínima do contexto / max_tokens quando o tempo está quase no fim
+    MIN_SCALE = 0.4
+
+    def __init__(self, config: Config, deadline: Optional[float] = None, max_llm_calls: Optional[int] = None):
+        self.config = config
+        self.deadline = deadline
+        self.max_llm_calls = max_llm_calls
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._calls = 0
+        self._call_durations = []
+
+    def start(self):
+        """Reinicia o relógio e os contadores (início de uma execução)"""
+        with self._lock:
+            self._start = time.monotonic()
+            self._calls = 0
+            self._call_durations = []
+
+    # === ESTIMATIVAS ===
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def estimated_call_seconds(self) -> float:
+        """Duração média observada das chamadas (ou estimativa da config)"""
+        with self._lock:
+            if self._call_durations:
+                return sum(self._call_durations) / len(self._call_durations)
+        return self.config.scheduler_call_estimate
+
+    def remaining_time(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - self.elapsed()
+
+    def remaining_calls(self) -> Optional[int]:
+        if self.max_llm_calls is None:
+            return None
+        with self._lock:
+            return self.max_llm_calls - self._calls
+
+    def synthesis_reserve(self) -> float:
+        """Tempo reservado para a síntese no fim do deadline"""
+        if self.deadline is None:
+            return 0.0
+        return max(self.estimated_call_seconds(), 0.15 * self.deadline)
+
+    def research_time_left(self) -> Optional[float]:
+        """Tempo restante para a fase de pesquisa (descontada a reserva da síntese)"""
+        remaining = self.remaining_time()
+        if remaining is None:
+            return None
+        return remaining - self.synthesis_reserve()
+
+    # === DECISÕES ===
+
+    def plan_subtopics(self, requested: int) -> int:
+        """
+        Quantos subtópicos cabem no orçamento
+
+        Reserva uma chamada para o supervisor e uma para a síntese.
+        """
+        planned = requested
+
+        calls = self.remaining_calls()
+        if calls is not None:
+            planned = min(planned, calls - 2)
+
+        research_time = self.research_time_left()
+        if research_time is not None:
+            # Desconta a chamada do próprio supervisor
+            research_time -= self.estimated_call_seconds()
+            planned = min(planned, math.floor(research_time / self.estimated_call_seconds()))
+
+        return max(1, planned)
+
+    def can_start_subtopic(self) -> bool:
+        """False quando não há mais tempo/chamadas para pesquisar sem comprometer a síntese"""
+        calls = self.remaining_calls()
+        if calls is not None and calls <= 1:
+            return False
+
+        research_time = self.research_time_left()
+        if research_time is not None and research_time <= 0:
+            return False
+
+        return True
+
+    def scale(self) -> float:
+        """
+        Fator de redução de contexto e max_tokens (1.0 = sem pressão)
+
+        Cai linearmente de 1.0 para MIN_SCALE quando o tempo restante de pesquisa
+        passa de duas chamadas estimadas para meia chamada.
+        """
+        research_time = self.research_time_left()
+        if research_time is None:
+            return 1.0
+
+        estimate = self.estimated_call_seconds()
+        comfortable, critical = 2 * estimate, 0.5 * estimate
+        if research_time >= comfortable:
+            return 1.0
+        if research_time <= critical:
+            return self.MIN_SCALE
+
+        fraction = (research_time - critical) / (comfortable - critical)
+        return self.MIN_SCALE + fraction * (1.0 - self.MIN_SCALE)
+
+    def scale_count(self, value: int, minimum: int = 1) -> int:
+        """Aplica `scale()` a uma quantidade (top_k, nº de resultados, caracteres)"""
+        return max(minimum, int(round(value * self.scale())))
+
+    def _llm_kwargs(self, phase: str) -> Dict:
+        kwargs = {}
+
+        if phase == "synthesis":
+            remaining = self.remaining_time()
+        else:
+            remaining = self.research_time_left()
+            scale = self.scale()
+            if scale < 1.0:
+                kwargs["max_tokens"] = max(128, int(self.config.max_tokens * scale))
+
+        if remaining is not None:
+            if remaining <= 0:
+                raise BudgetExhausted(f"Deadline de {self.deadline:.0f}s esgotado")
+            kwargs["timeout"] = remaining
+
+        if self.max_llm_calls is not None:
+            # Retries e hedges do ResilientLLM também são requisições
+            kwargs["request_budget"] = lambda: self.reserve_request(phase)
+
+        return kwargs
+
+    def reserve_request(self, phase: str = "research") -> bool:
+        """
+        Reserva uma requisição extra (retry ou hedge) para a chamada em andamento
+
+        Fora da síntese, a última requisição fica reservada para ela.
+        """
+        if self.max_llm_calls is None:
+            return True
+        limit = self.max_llm_calls if phase == "synthesis" else self.max_llm_calls - 1
+        with self._lock:
+            if self._calls >= limit:
+                return False
+            self._calls += 1
+            return True
+
+    @contextmanager
+    def llm_call(self, phase: str = "research"):
+        """
+        Reserva uma chamada ao LLM
+
+        Yields:
+            Dict: kwargs para `llm.invoke` (`timeout`, `request_budget` e, sob
+                pressão, `max_tokens` reduzido)
+
+        Raises:
+            BudgetExhausted: Sem chamadas ou tempo restantes
+        """
+        kwargs = self._llm_kwargs(phase)
+
+        with self._lock:
+            if self.max_llm_calls is not None and self._calls >= self.max_llm_calls:
+                raise BudgetExhausted(f"Limite de {self.max_llm_calls} chamadas ao LLM atingido")
+            self._calls += 1
+
+        start = time.monotonic()
+        try:
+            yield kwargs
+        finally:
+            with self._lock:
+                self._call_durations.append(time.monotonic() - start)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            calls = self._calls
+        return {
+            "elapsed_seconds": round(self.elapsed(), 2),
+            "deadline_seconds": self.deadline,
+            "llm_calls": calls,
+            "max_llm_calls": self.max_llm_calls,
+        }
+
+def llm_budget(scheduler: Optional[ResearchScheduler], phase: str = "research"):
+    """`scheduler.llm_call(phase)` ou um contexto vazio (sem kwargs) se não houver scheduler"""
+    if scheduler is None:
+        return nullcontext({})
+    return scheduler.llm_call(phase)
+
+def skipped_result(subtopic: str) -> dict:
+    """Resultado de um subtópico não pesquisado por falta de orçamento"""
+    return {
+        "subtopic": subtopic,
+        "research_findings": "Not researched: time or LLM call budget exhausted.",
+        "web_sources": [],
+        "status": "skipped"
+    }
@@ -0,0 +1,416 @@
+"""
+Provedores de busca web com corrida entre provedores e roteamento por latência
+
+- Registro de provedores por nome (`register_search_provider`): os motores do
+  DDGS (duckduckgo, bing, brave, ...) e provedores locais para testes
+  (`StaticSearchProvider`)
+- Por subtópico, consulta os `search_race_width` provedores mais rápidos ao
+  mesmo tempo e retorna assim que um deles traz resultados suficientes; as
+  requisições que ainda não começaram são canceladas e as em andamento deixam
+  de ser esperadas
+- Histograma de latência por provedor (inclusive de quem perdeu a corrida),
+  usado para escolher os provedores das próximas buscas e salvo entre execuções
+"""
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Union
+from config import Config
+from rate_limiter import get_rate_limiter
+from utils.evidence import canonicalize_url
+
+# Registro de provedores: nome → fábrica que recebe a Config
+SEARCH_PROVIDERS: Dict[str, Callable[[Config], "SearchProvider"]] = {}
+
+# Fração mínima de respostas suficientes no roteamento (evita divisão por zero)
+MIN_SUFFICIENT_RATE = 0.05
+
+# Motores do DDGS expostos como provedores ("ddgs" = rotação automática do pacote)
+DDGS_BACKENDS = ("ddgs", "duckduckgo", "bing", "brave", "google", "mojeek", "yahoo", "yandex", "wikipedia", "startpage")
+
+def register_search_provider(name: str):
+    """Decorator que registra a fábrica de um provedor"""
+    def decorator(factory: Callable[[Config], "SearchProvider"]):
+        SEARCH_PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+class SearchProvider:
+    """
+    Interface de um provedor: `search` retorna [{"title", "url", "snippet"}, ...]
+
+    `limiter_name`: rate limiter em que o router obtém vaga antes de chamar
+    `search` (None = sem limite); a espera na fila não entra na latência medida.
+    """
+
+    name = "base"
+    limiter_name: Optional[str] = None
+
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        raise NotImplementedError
+
+class DDGSProvider(SearchProvider):
+    """Um motor do pacote `ddgs` (backend=None usa a rotação automática)"""
+
+    def __init__(self, name: str, backend: Optional[str] = None, limiter_name: str = "search"):
+        self.name = name
+        self.backend = backend
+        self.limiter_name = limiter_name
+
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        from ddgs import DDGS
+
+        kwargs = {"backend": self.backend} if self.backend else {}
+        # A vaga no limiter do motor é obtida pelo router (SearchRouter._run)
+        search_results = DDGS().text(
+            query,
+            region='wt-wt',  # Worldwide
+            safesearch='moderate',
+            max_results=max_results,
+            **kwargs
+        )
+
+        results = []
+        for result in search_results:
+            results.append({
+                "title": result.get("title", "Sem título"),
+                "url": result.get("href", result.get("link", "")),
+                "snippet": result.get("body", result.get("snippet", ""))
+            })
+            if len(results) >= max_results:
+                break
+        return results
+
+def _register_ddgs_backend(name: str):
+    # "duckduckgo" e a rotação automática usam o limiter "search" (search_rate_limit)
+    limiter_name = "search" if name in ("ddgs", "duckduckgo") else f"search:{name}"
+    backend = None if name == "ddgs" else name
+    register_search_provider(name)(lambda config: DDGSProvider(name, backend, limiter_name))
+
+for _backend in DDGS_BACKENDS:
+    _register_ddgs_backend(_backend)
+
+class StaticSearchProvider(SearchProvider):
+    """
+    Provedor local para testes e benchmarks (sem rede)
+
+    Args:
+        results: Lista fixa de resultados ou função query → resultados
+        latency: Segundos de espera simulada por busca
+        error: Exceção levantada em toda busca (simula provedor fora do ar)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        results: Union[List[Dict], Callable[[str], List[Dict]]] = None,
+        latency: float = 0.0,
+        error: Optional[Exception] = None
+    ):
+        self.name = name
+        self.results = results or []
+        self.latency = latency
+        self.error = error
+
+    def search(self, query: str, max_results: int) -> List[Dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        results = self.results(query) if callable(self.results) else self.results
+        return [dict(result) for result in results[:max_results]]
+
+class LatencyHistogram:
+    """Histograma de latências em buckets logarítmicos (10ms a ~41s), thread-safe"""
+
+    BOUNDS = tuple(0.01 * 2 ** i for i in range(13))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        bucket = next((i for i, bound in enumerate(self.BOUNDS) if seconds <= bound), len(self.BOUNDS))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += seconds
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(self.counts)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Limite superior do bucket que contém o percentil (None sem amostras)"""
+        with self._lock:
+            counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        target = percent / 100.0 * total
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.BOUNDS[-1] * 2
+        return self.BOUNDS[-1] * 2
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {"counts": list(self.counts), "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        if len(data.get("counts", [])) == len(histogram.counts):
+            histogram.counts = list(data["counts"])
+            histogram.total = float(data.get("total", 0.0))
+        return histogram
+
+class SearchRouter:
+    """
+    Corrida entre provedores com roteamento pela latência observada
+
+    Args:
+        race_width: Provedores consultados ao mesmo tempo
+        min_results: Resultados que encerram a corrida (None = `max_results` da busca)
+        timeout: Segundos máximos de espera por busca
+        min_samples: Buscas de um provedor antes de confiar na sua latência
+            (provedores com menos amostras são priorizados para serem medidos)
+    """
+
+    # Percentil usado para ordenar os provedores (cauda, não a média)
+    ROUTING_PERCENTILE = 75.0
+
+    def __init__(
+        self,
+        providers: List[SearchProvider],
+        race_width: int = 2,
+        min_results: Optional[int] = None,
+        timeout: float = 10.0,
+        min_samples: int = 3
+    ):
+        if not providers:
+            raise ValueError("Nenhum provedor de busca configurado")
+        self.providers = {provider.name: provider for provider in providers}
+        self.race_width = max(1, race_width)
+        self.min_results = min_results
+        self.timeout = timeout
+        self.min_samples = min_samples
+
+        self.histograms = {name: LatencyHistogram() for name in self.providers}
+        self._lock = threading.Lock()
+        self._counters = {name: {"requests": 0, "wins": 0, "failures": 0, "short": 0} for name in self.providers}
+        self._executor = ThreadPoolExecutor(
+            max_workers=4 * len(self.providers),
+            thread_name_prefix="search-provider"
+        )
+
+    # === ROTEAMENTO ===
+
+    def ranked_providers(self) -> List[str]:
+        """
+        Provedores do mais rápido ao mais lento
+
+        Os com menos de `min_samples` amostras vêm primeiro (na ordem configurada)
+        para serem medidos; um provedor que nunca respondeu conta como timeout.
+        A latência é dividida pela fração de respostas suficientes: quem costuma
+        responder com poucos resultados raramente encerra a corrida.
+        """
+        with self._lock:
+            counters = {name: dict(counter) for name, counter in self._counters.items()}
+
+        def key(item):
+            position, name = item
+            requests = counters[name]["requests"]
+            # Histogramas carregados de execuções anteriores também contam como amostras
+            if max(requests, self.histograms[name].count()) < self.min_samples:
+                return (0, 0.0, position)
+            latency = self.histograms[name].percentile(self.ROUTING_PERCENTILE)
+            latency = latency if latency is not None else self.timeout
+            short_rate = counters[name]["short"] / requests if requests else 0.0
+            return (1, latency / max(1.0 - short_rate, MIN_SUFFICIENT_RATE), position)
+
+        return [name for _, name in sorted(enumerate(self.providers), key=key)]
+
+    # === BUSCA ===
+
+    def _run(self, name: str, query: str, max_results: int, sufficient: int) -> List[Dict]:
+        """
+        Executa no pool: busca num provedor e registra a latência
+
+        A latência é medida depois de obter a vaga no rate limiter do provedor
+        (a fila local não é lentidão do provedor). Erros contam como timeout;
+        respostas com menos de `sufficient` resultados registram a latência real
+        e o contador "short".
+        """
+        provider = self.providers[name]
+        with self._lock:
+            self._counters[name]["requests"] += 1
+        # Limiter compartilhado: fica abaixo do limite do motor em vez de ser bloqueado
+        limiter = get_rate_limiter(provider.limiter_name) if provider.limiter_name else None
+        with limiter.slot() if limiter is not None else nullcontext():
+            start = time.monotonic()
+            try:
+                results = provider.search(query, max_results)
+            except Exception:
+                self.histograms[name].record(self.timeout)
+                with self._lock:
+                    self._counters[name]["failures"] += 1
+                raise
+            self.histograms[name].record(time.monotonic() - start)
+        if len(results) < sufficient:
+            with self._lock:
+                self._counters[name]["short"] += 1
+        return results
+
+    def search(self, query: str, max_results: int = 3, verbose: bool = False) -> List[Dict]:
+        """
+        Busca com corrida entre provedores
+
+        Returns:
+            List[Dict]: Resultados do primeiro provedor suficiente; se nenhum for,
+                a união (sem URLs repetidas) do que chegou até o timeout
+        """
+        if verbose:
+            print(f"Query: {query[:60]}...")
+        
+        sufficient = min(self.min_results or max_results, max_results)
+        queue = self.ranked_providers()
+        deadline = time.monotonic() + self.timeout
+        in_flight = {}
+        collected = []
+
+        def launch():
+            while queue and len(in_flight) < self.race_width:
+                name = queue.pop(0)
+                in_flight[self._executor.submit(self._run, name, query, max_results, sufficient)] = name
+
+        launch()
+        winner = None
+        while in_flight:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(in_flight), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = in_flight.pop(future)
+                try:
+                    results = future.result()
+                except ImportError as e:
+                    print(f"ERRO: Pacote '{e.name or 'ddgs'}' não instalado")
+                    print(f"Execute: pip install {e.name or 'ddgs'}")
+                    continue
+                except Exception as e:
+                    # Bloqueio por excesso de requisições sempre é avisado (resultado vazio não é "sem resultados")
+                    if verbose or "ratelimit" in type(e).__name__.lower():
+                        print(f"Erro na busca ({name}): {type(e).__name__}: {str(e)}")
+                    continue
+                collected.append((name, results))
+                if len(results) >= sufficient and winner is None:
+                    winner = name
+            if winner is not None:
+                break
+            launch()
+
+        # Os mais lentos não são mais esperados (e os que não começaram nem rodam)
+        for future in in_flight:
+            future.cancel()
+
+        if winner is not None:
+            with self._lock:
+                self._counters[winner]["wins"] += 1
+            collected.sort(key=lambda item: item[0] != winner)
+
+        merged = []
+        seen = set()
+        for _, results in collected:
+            for result in results:
+                key = canonicalize_url(result.get("url", ""))
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(result)
+
+        if verbose:
+            source = winner or ", ".join(name for name, _ in collected) or "nenhum provedor"
+            print(f"{min(len(merged), max_results)} resultados ({source})")
+
+        return merged[:max_results]
+
+    # === MÉTRICAS ===
+
+    def stats(self) -> Dict[str, Dict]:
+        """Requisições, vitórias, falhas, respostas curtas e latência (p50/p95 aproximados) por provedor"""
+        with self._lock:
+            counters = {name: dict(counter) for name, counter in self._counters.items()}
+        stats = {}
+        for name, counter in counters.items():
+            histogram = self.histograms[name]
+            stats[name] = {
+                **counter,
+                "p50_seconds": histogram.percentile(50.0),
+                "p95_seconds": histogram.percentile(95.0),
+            }
+        return stats
+
+    def load_histograms(self, path: str):
+        """Carrega as latências de execuções anteriores (roteamento começa informado)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, histogram in data.items():
+            if name in self.histograms:
+                self.histograms[name] = LatencyHistogram.from_dict(histogram)
+
+    def save_histograms(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({name: histogram.to_dict() for name, histogram in self.histograms.items()}, f)
+        os.replace(tmp_path, path)
+
+# Router do processo (compartilhado por todos os agents)
+_ROUTER: Optional[SearchRouter] = None
+_ROUTER_LOCK = threading.Lock()
+
+def create_search_router(config: Config, providers: Optional[List[SearchProvider]] = None) -> SearchRouter:
+    """
+    Cria o router a partir de `config.search_providers` (ou de instâncias já prontas)
+
+    Os limiters "search:<motor>" são criados por `configure_rate_limiters`.
+    """
+    if providers is None:
+        names = config.search_providers or ["ddgs"]
+        unknown = [name for name in names if name not in SEARCH_PROVIDERS]
+        if unknown:
+            raise ValueError(f"Provedor de busca desconhecido: {', '.join(unknown)} (disponíveis: {', '.join(sorted(SEARCH_PROVIDERS))})")
+        providers = [SEARCH_PROVIDERS[name](config) for name in names]
+
+    return SearchRouter(
+        providers,
+        race_width=config.search_race_width,
+        min_results=config.search_min_results,
+        timeout=config.search_timeout
+    )
+
+def configure_search_router(config: Config, providers: Optional[List[SearchProvider]] = None) -> SearchRouter:
+    """Cria e instala o router do processo (substitui o atual)"""
+    global _ROUTER
+    router = create_search_router(config, providers)
+    with _ROUTER_LOCK:
+        _ROUTER = router
+    return router
+
+def get_search_router() -> SearchRouter:
+    """Router do processo (só o provedor "ddgs" se não configurado)"""
+    global _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            _ROUTER = SearchRouter([SEARCH_PROVIDERS["ddgs"](None)], race_width=1)
+        return _ROUTER
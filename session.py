@@ -0,0 +1,167 @@
+"""
+API Python para embutir o sistema em outros serviços
+
+`ResearchSession` monta LLM, embeddings, vector store e grafo UMA vez a partir
+de uma `Config` e atende várias perguntas (inclusive concorrentes) sem
+recarregar modelos:
+
+    session = ResearchSession(Config(...), search_mode="rag", data_dir="data")
+    result = session.research("Como funciona OAuth?")
+    print(result["final_answer"])
+
+    async for event in session.stream("Como funciona OAuth?"):
+        print(event["type"])  # subtopics_ready, subtopic_done, tokens, final_answer
+
+Eventos: ver events.py.
+"""
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Optional
+from config import Config
+from events import emit, event_sink
+
+class ResearchSession:
+    """
+    Sessão reutilizável (modelos e índice carregados uma vez)
+
+    Args:
+        config: Configurações
+        search_mode: "rag", "web" ou "hybrid"
+        data_dir: Pasta dos documentos (modos rag/hybrid) e dos caches
+        llm, embeddings, vectorstore: Instâncias prontas (ex: compartilhadas
+            entre sessões); se None, são criadas a partir da config
+
+    Sem checkpoint nem arquivos de saída: o resultado é retornado. Com
+    `config.deadline`/`config.max_llm_calls`, as perguntas são atendidas uma por
+    vez (o orçamento é por execução).
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        search_mode: str = "web",
+        data_dir: str = "data",
+        llm=None,
+        embeddings=None,
+        vectorstore=None
+    ):
+        from models import initialize_llm, initialize_embeddings
+        from graph import build_supervisor_graph, SEARCH_MODES
+        from vector_store import create_vector_store, create_sharded_vector_store
+        from utils.document_loader import load_corpus
+        from concurrency import make_thread_safe_vectorstore
+        from rate_limiter import configure_rate_limiters
+        from search_providers import configure_search_router
+        from scheduler import ResearchScheduler
+        from context_compression import create_context_compressor
+        from prefetch import create_prefetch_cache
+
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Modo de pesquisa inválido: {search_mode}")
+
+        self.config = config
+        self.search_mode = search_mode
+        self.data_dir = data_dir
+
+        configure_rate_limiters(config)
+        if search_mode != "rag":
+            configure_search_router(config)
+
+        self.llm = llm if llm is not None else initialize_llm(config)
+
+        needs_embeddings = (
+            search_mode != "web"
+            or config.deep_fetch
+            or config.compress_context
+            or (config.dedup_subtopics_web and config.subtopic_dedup_threshold is not None)
+        )
+        if embeddings is None and needs_embeddings:
+            embeddings = initialize_embeddings(config)
+        self.embeddings = embeddings
+
+        if vectorstore is None and search_mode != "web":
+            if config.shard_by_subdirectory:
+                vectorstore = create_sharded_vector_store(embeddings, config, data_dir=data_dir)
+            else:
+                corpus = load_corpus(data_dir, verbose=config.verbose)
+                if not corpus:
+                    raise ValueError(f"Nenhum documento encontrado em {data_dir}/")
+                vectorstore = create_vector_store(corpus, embeddings, config, data_dir=data_dir)
+        # Várias perguntas ao mesmo tempo: buscas em paralelo, escritas exclusivas
+        self.vectorstore = make_thread_safe_vectorstore(vectorstore) if vectorstore is not None else None
+
+        self.scheduler = None
+        if config.deadline is not None or config.max_llm_calls is not None:
+            self.scheduler = ResearchScheduler(config, deadline=config.deadline, max_llm_calls=config.max_llm_calls)
+        self._run_lock = threading.Lock() if self.scheduler is not None else None
+
+        self.compressor = create_context_compressor(config, self.embeddings)
+        self.prefetch_cache = create_prefetch_cache(config, self.embeddings) if search_mode != "web" else None
+
+        self.graph = build_supervisor_graph(
+            self.llm,
+            self.vectorstore,
+            config,
+            search_mode=search_mode,
+            embeddings=self.embeddings,
+            scheduler=self.scheduler,
+            compressor=self.compressor,
+            prefetch_cache=self.prefetch_cache
+        )
+
+    def research(self, question: str, run_id: Optional[str] = None) -> Dict:
+        """
+        Pesquisa uma pergunta (thread-safe)
+
+        Eventos vão para o sink do contexto atual (ver `events.event_sink` e `stream`).
+
+        Returns:
+            Dict: Estado final (`final_answer`, `subtopics`, `subagent_results`, `trace`, ...)
+        """
+        from checkpointing import new_run_id
+        from state import create_initial_state
+
+        run_id = run_id or new_run_id()
+        emit("run_started", question=question, run_id=run_id)
+
+        if self._run_lock is None:
+            return self.graph.invoke(create_initial_state(question, run_id=run_id))
+
+        with self._run_lock:
+            self.scheduler.start()
+            return self.graph.invoke(create_initial_state(question, run_id=run_id))
+
+    async def stream(self, question: str, run_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Pesquisa uma pergunta emitindo os eventos conforme acontecem
+
+        A execução roda numa thread do executor padrão do loop; o último evento
+        é "final_answer" (ou "error", seguido da exceção).
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def sink(event: Dict):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        def run():
+            # O sink é instalado na thread da execução (contextvar)
+            with event_sink(sink):
+                try:
+                    return self.research(question, run_id=run_id)
+                except Exception as e:
+                    emit("error", error=f"{type(e).__name__}: {e}")
+                    raise
+                finally:
+                    loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        future = loop.run_in_executor(None, run)
+        while True:
+            event = await queue.get()
+            if event is done:
+                break
+            yield event
+
+        # Propaga a exceção da execução, se houve
+        await future
@@ -0,0 +1,192 @@
+"""
+Recuperação small-to-big (chunks filhos pequenos, janelas do documento pai)
+
+O índice guarda chunks filhos pequenos e SEM overlap (embedding mais preciso,
+menos vetores, build mais rápido). Cada filho guarda o id do documento pai
+(página) e seus offsets nele; os pais ficam num JSONL indexado por offsets,
+lido sob demanda. Na busca, só os pais dos filhos vencedores são lidos e cada
+hit vira uma janela de `parent_window_chars` ao redor do filho; hits próximos
+no mesmo pai são fundidos numa única janela (sem texto repetido no prompt).
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+PARENTS_FILENAME = "parents.jsonl"
+PARENT_OFFSETS_FILENAME = "parents.i64"
+
+# Filhos buscados por janela pedida (hits fundidos liberam vagas para outros trechos)
+CHILD_OVERFETCH = 2
+
+# Pais lidos mantidos em memória
+PARENT_CACHE_SIZE = 256
+
+def split_child_chunks(documents: List[Document], child_chunk_size: int, separators: List[str]) -> Tuple[List[Document], List[Document]]:
+    """
+    Divide cada documento em filhos sem overlap com offsets no pai
+
+    Returns:
+        Tuple: (filhos com metadata `parent`/`start`/`end` além da do pai, pais)
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=child_chunk_size,
+        chunk_overlap=0,
+        separators=separators
+    )
+
+    children = []
+    for parent_id, document in enumerate(documents):
+        text = document.page_content
+        cursor = 0
+        for piece in splitter.split_text(text):
+            start = text.find(piece, cursor)
+            if start < 0:
+                continue
+            end = start + len(piece)
+            cursor = end
+            metadata = {**document.metadata, "parent": parent_id, "start": start, "end": end}
+            children.append(Document(page_content=piece, metadata=metadata))
+
+    return children, documents
+
+class ParentStore:
+    """Documentos pais: em memória após o build, ou lidos sob demanda do disco (memmap, thread-safe)"""
+
+    def __init__(self, documents: List[Document] = None, folder_path: str = None):
+        self._documents = documents
+        if documents is None:
+            self._offsets = np.memmap(os.path.join(folder_path, PARENT_OFFSETS_FILENAME), dtype=np.int64, mode='r')
+            self._data = np.memmap(os.path.join(folder_path, PARENTS_FILENAME), dtype=np.uint8, mode='r')
+            self.get = lru_cache(maxsize=PARENT_CACHE_SIZE)(self._read)
+
+    def __len__(self) -> int:
+        return len(self._documents) if self._documents is not None else len(self._offsets) - 1
+
+    def get(self, parent_id: int) -> Tuple[str, Dict]:
+        document = self._documents[parent_id]
+        return document.page_content, document.metadata
+
+    def _read(self, parent_id: int) -> Tuple[str, Dict]:
+        start, end = int(self._offsets[parent_id]), int(self._offsets[parent_id + 1])
+        record = json.loads(self._data[start:end].tobytes().decode('utf-8'))
+        return record["text"], record["metadata"]
+
+    def save(self, folder_path: str):
+        os.makedirs(folder_path, exist_ok=True)
+        offsets = [0]
+        with open(os.path.join(folder_path, PARENTS_FILENAME), 'wb') as f:
+            for parent_id in range(len(self)):
+                text, metadata = self.get(parent_id)
+                line = (json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False) + "\n").encode('utf-8')
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.asarray(offsets, dtype=np.int64).tofile(os.path.join(folder_path, PARENT_OFFSETS_FILENAME))
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        return os.path.exists(os.path.join(folder_path, PARENT_OFFSETS_FILENAME))
+
+def _window_bounds(start: int, end: int, window_chars: int, length: int) -> Tuple[int, int]:
+    """Janela de `window_chars` centrada no trecho [start, end), limitada ao pai"""
+    pad = max(0, window_chars - (end - start)) // 2
+    left = max(0, start - pad)
+    right = min(length, end + pad)
+    # Sobra de um lado (início/fim do pai) vai para o outro
+    if left == 0:
+        right = min(length, max(right, window_chars))
+    if right == length:
+        left = max(0, min(left, length - window_chars))
+    return left, right
+
+class SmallToBigStore:
+    """
+    Índice de filhos (FAISS ou NumpyVectorStore) que retorna janelas dos pais
+
+    Mesma interface de busca dos vector stores (inclusive `_by_vector`, usado
+    pelo ShardedVectorStore). Score de uma janela = melhor score dos seus filhos.
+    """
+
+    def __init__(self, index, parents: ParentStore, window_chars: int):
+        self.index = index
+        self.parents = parents
+        self.window_chars = window_chars
+
+    @property
+    def embeddings(self):
+        return self.index.embeddings
+
+    def expand(self, hits: List[Tuple[Document, float]], k: int) -> List[Tuple[Document, float]]:
+        """
+        Converte hits de filhos (melhor primeiro) em até `k` janelas dos pais
+
+        Um filho entra numa janela já aberta do mesmo pai se os dois cabem em
+        `window_chars`; senão abre outra (até `k`).
+        """
+        groups = []  # {"parent", "start", "end", "score", "children"}
+        for doc, score in hits:
+            parent_id, start, end = doc.metadata["parent"], doc.metadata["start"], doc.metadata["end"]
+            for group in groups:
+                if group["parent"] != parent_id:
+                    continue
+                if max(group["end"], end) - min(group["start"], start) <= self.window_chars:
+                    group["start"], group["end"] = min(group["start"], start), max(group["end"], end)
+                    group["children"] += 1
+                    break
+            else:
+                if len(groups) < k:
+                    groups.append({"parent": parent_id, "start": start, "end": end, "score": score, "children": 1})
+
+        # Janelas do mesmo pai não se sobrepõem: o limite fica entre os trechos encontrados
+        bounds = {}
+        by_parent = {}
+        for position, group in enumerate(groups):
+            by_parent.setdefault(group["parent"], []).append(position)
+        for parent_id, positions in by_parent.items():
+            text, _ = self.parents.get(parent_id)
+            positions.sort(key=lambda position: groups[position]["start"])
+            previous = None
+            for position in positions:
+                group = groups[position]
+                left, right = _window_bounds(group["start"], group["end"], self.window_chars, len(text))
+                if previous is not None and bounds[previous][1] > left:
+                    before_end = groups[previous]["end"]
+                    cut = max(before_end, (before_end + group["start"]) // 2)
+                    bounds[previous] = (bounds[previous][0], cut)
+                    left = min(cut, group["start"])
+                bounds[position] = (left, right)
+                previous = position
+
+        windows = []
+        for position, group in enumerate(groups):
+            text, metadata = self.parents.get(group["parent"])
+            left, right = bounds[position]
+            window_metadata = {**metadata, "parent": group["parent"], "start": left, "end": right, "children": group["children"]}
+            windows.append((Document(page_content=text[left:right].strip(), metadata=window_metadata), group["score"]))
+        return windows
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 5, **kwargs):
+        hits = self.index.similarity_search_with_score_by_vector(embedding, k=k * CHILD_OVERFETCH, **kwargs)
+        return self.expand(hits, k)
+
+    def similarity_search_with_score(self, query: str, k: int = 5, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k: int = 5, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 5, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def save_local(self, folder_path: str):
+        # Pais antes do índice: o índice salvo marca a pasta como completa
+        self.parents.save(folder_path)
+        self.index.save_local(folder_path)
+
+    @classmethod
+    def load_local(cls, index, folder_path: str, window_chars: int) -> "SmallToBigStore":
+        return cls(index, ParentStore(folder_path=folder_path), window_chars)
@@ -11,8 +11,8 @@ class ResearchState(TypedDict):
     """Estado global do sistema"""
     
     # === INPUT ===
-    user_question: str               # Pergunta original
-    documents: List[str]             # Documentos para pesquisar
+    run_id: str                      # ID da execução (checkpoint / --resume)
+    user_question: str               # Pergunta original (o corpus fica no vector store, fora do checkpoint)
     
     # === SUPERVISOR ===
     subtopics: List[str]             # Lista de subtópicos gerados
@@ -21,15 +21,33 @@ class ResearchState(TypedDict):
     # Annotated com operator.add permite acumular resultados de múltiplos agentes
     subagent_results: Annotated[List[SubtopicState], operator.add]
     
+    # === REVISÃO (pesquisa iterativa) ===
+    research_round: int              # Rodada atual (1 = primeira passada)
+    reviewed_results: int            # Resultados em subagent_results já avaliados pelo reviewer
+    research_complete: bool          # True quando o reviewer encerra o loop
+    
     # === SYNTHESIS ===
     final_answer: str                # Resposta final compilada
+    
+    # === TRACE ===
+    # Decisões dos nodes (ex: subtópicos deduplicados), acumuladas entre nodes e rodadas
+    trace: Annotated[List[Dict], operator.add]
 
-def create_initial_state(question: str, documents: List[str]) -> ResearchState:
+def create_initial_state(question: str, run_id: str = "") -> ResearchState:
     """Cria estado inicial"""
     return {
+        "run_id": run_id,
         "user_question": question,
-        "documents": documents,
         "subtopics": [],
         "subagent_results": [],
-        "final_answer": ""
-    }
\ No newline at end of file
+        "research_round": 1,
+        "reviewed_results": 0,
+        "research_complete": False,
+        "final_answer": "",
+        "trace": []
+    }
+
+def pending_subtopics(state: ResearchState) -> List[str]:
+    """Subtópicos ainda sem resultado (rodadas seguintes só pesquisam os novos)"""
+    researched = {result["subtopic"] for result in state.get("subagent_results") or []}
+    return [subtopic for subtopic in state["subtopics"] if subtopic not in researched]
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""
+Stress harness de concorrência: N perguntas simultâneas no mesmo processo
+
+Um único LLM, modelo de embeddings e vector store são compartilhados por
+todas as execuções do grafo (como num servidor), com backends falsos (sem
+rede nem modelos) e um escritor adicionando chunks ao índice durante as buscas.
+
+Verifica:
+- Integridade: cada resposta final só contém dados da própria pergunta
+  (nenhum vazamento entre execuções), todos os subtópicos concluídos
+- Escalabilidade: perguntas/s para cada nível de concorrência, e chamadas de
+  embeddings/s com 1 réplica do modelo vs o pool (`--embedding-replicas`)
+
+Uso:
+    python stress_harness.py --questions 32 --concurrency 1,4,16
+    python stress_harness.py --unsafe   # sem os wrappers thread-safe (deve falhar)
+"""
+import argparse
+import hashlib
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from config import Config
+from llm_client import ResilientLLM
+from concurrency import make_thread_safe_embeddings, make_thread_safe_vectorstore
+from state import create_initial_state
+from graph import build_supervisor_graph
+
+TAG_PATTERN = re.compile(r"\[(Q\d+)\]")
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+class FakeLLM:
+    """
+    LLM determinístico com latência simulada (I/O, libera o GIL)
+
+    - Supervisor: subtópicos marcados com a tag da pergunta
+    - Pesquisa: "FINDING <subtópico>"
+    - Síntese: "ANSWER <tags encontradas no prompt>"
+    """
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+
+    def invoke(self, prompt: str, **kwargs) -> FakeResponse:
+        time.sleep(self.latency)
+
+        if "SUBTOPICS:" in prompt:
+            question = prompt.split("USER QUESTION:", 1)[1].strip().split("\n", 1)[0]
+            tag = TAG_PATTERN.search(question).group(1)
+            return FakeResponse("\n".join(f"{i}. [{tag}] aspect {i}" for i in range(1, 4)))
+
+        if "RESEARCH RESULTS" in prompt:
+            tags = sorted(set(TAG_PATTERN.findall(prompt)))
+            return FakeResponse("ANSWER " + ",".join(tags))
+
+        subtopic = prompt.split("SUBTOPIC:", 1)[1].strip().split("\n", 1)[0].strip()
+        return FakeResponse(f"FINDING {subtopic}")
+
+class FakeTokenizerEmbeddings(Embeddings):
+    """
+    Embeddings por hash que, como os tokenizers fast do HuggingFace, falham
+    com "Already borrowed" se usados por duas threads ao mesmo tempo
+
+    Custo simulado de um encoder pequeno em CPU (MiniLM): `latency` por
+    chamada + `per_text` por texto, fora do GIL (como o runtime nativo)
+    """
+
+    def __init__(self, dim: int = 64, latency: float = 0.005, per_text: float = 0.0002):
+        self.dim = dim
+        self.latency = latency
+        self.per_text = per_text
+        self._busy = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = sum(x * x for x in vector) ** 0.5 or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("Already borrowed")
+        try:
+            time.sleep(self.latency + self.per_text * len(texts))
+            return [self._vector(text) for text in texts]
+        finally:
+            self._busy.release()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def check_result(tag: str, result: Dict, expected_subtopics: int) -> List[str]:
+    """Problemas de integridade de uma execução (lista vazia = ok)"""
+    problems = []
+
+    if result["final_answer"] != f"ANSWER {tag}":
+        problems.append(f"resposta final inesperada: {result['final_answer']!r}")
+
+    subtopics = result["subtopics"]
+    if len(subtopics) != expected_subtopics or any(f"[{tag}]" not in s for s in subtopics):
+        problems.append(f"subtópicos de outra pergunta: {subtopics}")
+
+    researched = {res["subtopic"] for res in result["subagent_results"]}
+    if researched != set(subtopics):
+        problems.append(f"resultados não batem com os subtópicos: {sorted(researched)}")
+
+    for res in result["subagent_results"]:
+        if res["status"] != "completed":
+            problems.append(f"{res['subtopic']}: {res['status']} ({res['research_findings'][:80]})")
+        elif res["research_findings"] != f"FINDING {res['subtopic']}":
+            problems.append(f"{res['subtopic']}: achado de outro subtópico")
+
+    return problems
+
+def run_level(graph, concurrency: int, questions: int, offset: int) -> Dict:
+    """Executa `questions` perguntas com `concurrency` execuções simultâneas"""
+    def run_one(index: int):
+        tag = f"Q{offset + index:05d}"
+        question = f"[{tag}] How does component {index} work?"
+        start = time.perf_counter()
+        try:
+            result = graph.invoke(create_initial_state(question, run_id=tag))
+            problems = check_result(tag, result, expected_subtopics=3)
+        except Exception as e:
+            problems = [f"exceção: {type(e).__name__}: {e}"]
+        return tag, time.perf_counter() - start, problems
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(run_one, range(questions)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency, _ in outcomes)
+    return {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "throughput": questions / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "failures": {tag: problems for tag, _, problems in outcomes if problems},
+    }
+
+def measure_embeddings(embeddings, threads: int, calls: int) -> float:
+    """Chamadas de `embed_query`/s com `threads` threads (como buscas de execuções simultâneas)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda i: embeddings.embed_query(f"query {i} about component {i % 50}"), range(calls)))
+    return calls / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress test de concorrência com backends falsos')
+    parser.add_argument('--questions', type=int, default=32, help='Perguntas por nível de concorrência')
+    parser.add_argument('--concurrency', type=str, default='1,4,16', help='Níveis de concorrência, separados por vírgula')
+    parser.add_argument('--latency', type=float, default=0.05, help='Latência simulada de cada chamada ao LLM (segundos)')
+    parser.add_argument('--embedding-latency', type=float, default=0.005, help='Custo simulado de cada chamada de embeddings (segundos)')
+    parser.add_argument('--embedding-replicas', type=int, default=4, help='Réplicas do modelo de embeddings no pool')
+    parser.add_argument('--unsafe', action='store_true', help='Não usar os wrappers thread-safe (demonstra as falhas)')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    # Pool do LLM dimensionado para o pico: cada execução faz até 3 chamadas em paralelo
+    config = Config(hf_token="stress", verbose=False, max_subagents=3, llm_max_workers=3 * max(levels))
+
+    from langchain_community.vectorstores import FAISS
+
+    def create_embeddings():
+        return FakeTokenizerEmbeddings(latency=args.embedding_latency)
+
+    embeddings = create_embeddings()
+    if not args.unsafe:
+        embeddings = make_thread_safe_embeddings(embeddings, factory=create_embeddings, max_replicas=args.embedding_replicas)
+
+    corpus = [f"Document {i} describes component {i % 50} and its aspect {i % 3 + 1}." for i in range(500)]
+    vectorstore = FAISS.from_texts(corpus, embeddings)
+    if not args.unsafe:
+        vectorstore = make_thread_safe_vectorstore(vectorstore)
+
+    llm = ResilientLLM(FakeLLM(latency=args.latency), config, name="stress-fake")
+    graph = build_supervisor_graph(llm, vectorstore, config, search_mode="rag")
+
+    # Escritor concorrente: índice muda enquanto as buscas acontecem
+    stop = threading.Event()
+    writes = [0]
+
+    def writer():
+        while not stop.is_set():
+            vectorstore.add_texts([f"Live update {writes[0]} about component {writes[0] % 50}."])
+            writes[0] += 1
+            time.sleep(0.002)
+
+    writer_thread = threading.Thread(target=writer, name="stress-writer", daemon=True)
+    writer_thread.start()
+
+    print(f"Modo: {'SEM wrappers thread-safe' if args.unsafe else 'thread-safe'}")
+    print(f"{args.questions} perguntas por nível, latência simulada do LLM {args.latency * 1000:.0f} ms\n")
+    print(f"{'concorrência':>12} {'tempo':>8} {'perg/s':>8} {'speedup':>8} {'p50':>7} {'p95':>7} {'falhas':>7}")
+
+    results = []
+    try:
+        for offset, concurrency in enumerate(levels):
+            level = run_level(graph, concurrency, args.questions, offset * args.questions)
+            results.append(level)
+            speedup = level["throughput"] / results[0]["throughput"]
+            print(
+                f"{concurrency:>12} {level['elapsed']:>7.2f}s {level['throughput']:>8.1f} {speedup:>7.1f}x "
+                f"{level['p50']:>6.2f}s {level['p95']:>6.2f}s {len(level['failures']):>7}"
+            )
+    finally:
+        stop.set()
+        writer_thread.join()
+
+    print(f"\nEscritas concorrentes no índice: {writes[0]}")
+
+    if not args.unsafe:
+        # Só embeddings: o lock único (1 réplica) vs o pool, mesmo custo por chamada
+        threads = max(levels)
+        calls = 40 * threads
+        single = measure_embeddings(make_thread_safe_embeddings(create_embeddings()), threads, calls)
+        pooled = measure_embeddings(
+            make_thread_safe_embeddings(create_embeddings(), factory=create_embeddings, max_replicas=args.embedding_replicas),
+            threads, calls
+        )
+        print(f"Réplicas de embeddings criadas no grafo: {embeddings.replicas}/{args.embedding_replicas}")
+        print(f"Embeddings ({threads} threads, {args.embedding_latency * 1000:.0f} ms/chamada): "
+              f"1 réplica {single:.0f}/s, {args.embedding_replicas} réplicas {pooled:.0f}/s ({pooled / single:.1f}x)")
+
+    failures = {tag: problems for level in results for tag, problems in level["failures"].items()}
+    if failures:
+        print(f"\n❌ {len(failures)} execuções com problemas de integridade:")
+        for tag, problems in list(failures.items())[:10]:
+            print(f"   {tag}: {problems[0]}")
+        sys.exit(1)
+
+    print("\n✅ Integridade ok em todas as execuções")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,33 @@
 """
 Utilitários do sistema
 """
-from .document_loader import load_documents_from_data
+from .document_loader import load_documents_from_data, load_corpus
 from .file_saver import (
     save_research_results, 
     list_research_files,
     generate_filename,
     sanitize_filename,
-    save_web_sources_json
+    save_web_sources_json,
+    format_research_report,
+    export_archived_run,
+    collect_web_sources
 )
+from .archive import RunArchive, build_run_record
+from .evidence import EvidencePool, canonicalize_url
 
 __all__ = [
     'load_documents_from_data',
+    'load_corpus',
     'save_research_results',
     'list_research_files',
     'generate_filename',
     'sanitize_filename',
-    'save_web_sources_json'
+    'save_web_sources_json',
+    'format_research_report',
+    'export_archived_run',
+    'collect_web_sources',
+    'RunArchive',
+    'build_run_record',
+    'EvidencePool',
+    'canonicalize_url'
 ]
\ No newline at end of file
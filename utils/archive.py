@@ -0,0 +1,149 @@
+"""
+Arquivo append-only de execuções: segmentos JSONL comprimidos + índice de offsets
+"""
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+INDEX_FILENAME = "index.tsv"
+SEGMENT_PATTERN = "runs-{:05d}.jsonl.gz"
+
+class RunArchive:
+    """
+    Arquivo de execuções em segmentos `runs-NNNNN.jsonl.gz`
+
+    Cada execução é um membro gzip independente anexado ao segmento atual, então:
+    - o segmento inteiro continua legível com `zcat`/`zgrep` (membros concatenados)
+    - o índice lateral (`index.tsv`: run_id, segmento, offset, tamanho) permite
+      ler uma execução em O(1) com um único seek
+    """
+
+    def __init__(self, archive_dir: str, max_segment_bytes: int = 64 * 1024 * 1024):
+        self.archive_dir = archive_dir
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+
+        os.makedirs(archive_dir, exist_ok=True)
+        self._index_path = os.path.join(archive_dir, INDEX_FILENAME)
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != 4:
+                    continue  # Linha incompleta (escrita interrompida)
+                run_id, segment, offset, length = parts
+                self._index[run_id] = (segment, int(offset), int(length))
+
+    def _current_segment(self, incoming_bytes: int) -> str:
+        segments = sorted(
+            name for name in os.listdir(self.archive_dir)
+            if name.startswith("runs-") and name.endswith(".jsonl.gz")
+        )
+        if not segments:
+            return SEGMENT_PATTERN.format(1)
+
+        last = segments[-1]
+        size = os.path.getsize(os.path.join(self.archive_dir, last))
+        if size > 0 and size + incoming_bytes > self.max_segment_bytes:
+            number = int(last[len("runs-"):-len(".jsonl.gz")]) + 1
+            return SEGMENT_PATTERN.format(number)
+        return last
+
+    def append(self, record: Dict) -> str:
+        """
+        Anexa uma execução ao arquivo
+
+        Args:
+            record: Dicionário com pelo menos `run_id`
+
+        Returns:
+            str: run_id gravado
+        """
+        run_id = record["run_id"]
+        if not run_id or '\t' in run_id or '\n' in run_id:
+            raise ValueError(f"run_id inválido: {run_id!r}")
+
+        payload = gzip.compress((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+
+        with self._lock:
+            segment = self._current_segment(len(payload))
+            segment_path = os.path.join(self.archive_dir, segment)
+
+            with open(segment_path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Índice gravado depois dos dados: um crash no meio nunca aponta para bytes inexistentes
+            with open(self._index_path, 'a', encoding='utf-8') as f:
+                f.write(f"{run_id}\t{segment}\t{offset}\t{len(payload)}\n")
+
+            self._index[run_id] = (segment, offset, len(payload))
+
+        return run_id
+
+    def get(self, run_id: str) -> Dict:
+        """
+        Lê uma execução pelo ID (um seek + uma leitura)
+
+        Raises:
+            KeyError: run_id não encontrado
+        """
+        segment, offset, length = self._index[run_id]
+        with open(os.path.join(self.archive_dir, segment), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        return json.loads(gzip.decompress(data))
+
+    def __contains__(self, run_id: str) -> bool:
+        return run_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def run_ids(self) -> List[str]:
+        """IDs na ordem de gravação"""
+        return list(self._index)
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Percorre todas as execuções, segmento a segmento (streaming)"""
+        segments = sorted(
+            name for name in os.listdir(self.archive_dir)
+            if name.startswith("runs-") and name.endswith(".jsonl.gz")
+        )
+        for segment in segments:
+            with gzip.open(os.path.join(self.archive_dir, segment), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+def build_run_record(
+    run_id: str,
+    question: str,
+    subtopics: List[str],
+    subagent_results: List[Dict],
+    final_answer: str,
+    timings: Dict = None,
+    timestamp: str = None,
+    trace: List[Dict] = None
+) -> Dict:
+    """Monta o registro de uma execução para o arquivo"""
+    return {
+        "run_id": run_id,
+        "timestamp": timestamp or datetime.now().isoformat(),
+        "question": question,
+        "subtopics": subtopics,
+        "results": subagent_results,
+        "final_answer": final_answer,
+        "timings": timings or {},
+        "trace": trace or [],
+    }
@@ -1,20 +1,22 @@
 """
-Carregador simples de documentos TXT
+Carregador de documentos (TXT, Markdown, HTML, PDF, DOCX)
 """
-import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from .extractors import iter_corpus_files, extract_files, to_langchain_documents, supported_extensions
 
-def load_documents_from_data(data_dir: str = "data", verbose: bool = True) -> List[str]:
+def load_corpus(data_dir: str = "data", verbose: bool = True, max_workers: Optional[int] = None) -> List:
     """
-    Carrega TODOS os arquivos .txt da pasta data/
+    Carrega TODOS os documentos suportados de data/ (recursivo)
     
     Args:
         data_dir: Caminho para a pasta (padrão: "data")
         verbose: Mostrar logs
+        max_workers: Processos de extração (None = nº de CPUs)
         
     Returns:
-        List[str]: Lista com o conteúdo de cada arquivo
+        List[Document]: Um Document por página (ou por arquivo), com metadata
+            `source` (caminho relativo) e `page` (PDFs)
     """
     if verbose:
         print("\n" + "="*70)
@@ -27,42 +29,38 @@ def load_documents_from_data(data_dir: str = "data", verbose: bool = True) -> Li
     if not data_path.exists():
         raise FileNotFoundError(f"❌ Pasta não encontrada: {data_dir}/")
     
-    # Buscar todos os .txt
-    txt_files = sorted(data_path.glob("*.txt"))
+    # Buscar todos os arquivos suportados (recursivo)
+    files = iter_corpus_files(data_dir)
     
-    if not txt_files:
-        raise ValueError(f"❌ Nenhum arquivo .txt encontrado em {data_dir}/")
+    if not files:
+        raise ValueError(f"❌ Nenhum documento ({', '.join(supported_extensions())}) encontrado em {data_dir}/")
     
-    # Carregar cada arquivo
-    documents = []
+    extracted = extract_files(files, data_dir=data_dir, max_workers=max_workers, verbose=verbose)
     
-    for filepath in txt_files:
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-            
-            if content:  # Apenas se não estiver vazio
-                documents.append(content)
-                
-                if verbose:
-                    filename = filepath.name
-                    char_count = len(content)
-                    line_count = content.count('\n') + 1
-                    print(f"{filename:<30} ({char_count:>6} chars, {line_count:>4} linhas)")
-            else:
-                if verbose:
-                    print(f"{filepath.name} (vazio, ignorado)")
-                    
-        except Exception as e:
-            if verbose:
-                print(f"{filepath.name}: Erro - {str(e)}")
+    if verbose:
+        for item in extracted:
+            char_count = sum(len(text) for _, text in item["pages"])
+            pages = len(item["pages"])
+            page_info = f", {pages:>4} páginas" if item["pages"][0][0] is not None else ""
+            print(f"{item['source']:<30} ({char_count:>6} chars{page_info})")
     
-    if not documents:
+    if not extracted:
         raise ValueError(f"Nenhum documento válido carregado de {data_dir}/")
     
+    documents = to_langchain_documents(extracted)
+    
     if verbose:
-        total_chars = sum(len(doc) for doc in documents)
-        print(f"\nTotal: {len(documents)} documentos ({total_chars:,} caracteres)")
+        total_chars = sum(len(doc.page_content) for doc in documents)
+        print(f"\nTotal: {len(extracted)} documentos ({total_chars:,} caracteres)")
         print("="*70)
     
-    return documents
\ No newline at end of file
+    return documents
+
+def load_documents_from_data(data_dir: str = "data", verbose: bool = True) -> List[str]:
+    """
+    Carrega TODOS os documentos de data/ como texto (um por página/arquivo)
+    
+    Returns:
+        List[str]: Lista com o conteúdo de cada documento
+    """
+    return [doc.page_content for doc in load_corpus(data_dir, verbose=verbose)]
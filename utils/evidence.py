@@ -0,0 +1,176 @@
+"""
+Pool de evidências compartilhado entre os subtópicos de uma execução
+
+Cada fonte web entra no pool uma única vez (URL canônica ou snippet quase
+idêntico) e recebe um ID estável (S1, S2, ...). O primeiro subtópico que a
+encontra envia o conteúdo completo ao LLM; os seguintes só um trecho curto
+com a referência, e os arquivos de saída guardam a fonte uma vez.
+"""
+import re
+import threading
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Parâmetros de rastreamento que não mudam o conteúdo da página
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "ref", "ref_src", "mc_cid", "mc_eid", "igshid", "spm"}
+
+def canonicalize_url(url: str) -> str:
+    """
+    Forma canônica de uma URL para deduplicação
+
+    Ignora esquema (http/https), `www.`, porta padrão, fragmento, barra final,
+    parâmetros de rastreamento (utm_*, fbclid, ...) e a ordem dos parâmetros.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = re.sub(r"/+", "/", parts.path).rstrip("/")
+
+    return urlunsplit(("", host, path, urlencode(query), ""))
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """Conjunto de sequências de `size` palavras (normalizadas)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class EvidencePool:
+    """
+    Fontes web únicas de uma execução (thread-safe)
+
+    Args:
+        near_duplicate_threshold: Similaridade de Jaccard (shingles de palavras)
+            a partir da qual snippets de URLs diferentes são a mesma fonte
+            (espelhos, agregadores, versões AMP)
+    """
+
+    def __init__(self, near_duplicate_threshold: float = 0.8, shingle_size: int = 5):
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.shingle_size = shingle_size
+        self.url_duplicates = 0
+        self.near_duplicates = 0
+
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._sources: Dict[str, Dict] = {}
+        self._by_url: Dict[str, str] = {}
+        self._shingles: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def get(self, source_id: str) -> Dict:
+        return self._sources[source_id]
+
+    def _match(self, canonical: str, snippet_shingles: Set[str]) -> Optional[str]:
+        if canonical in self._by_url:
+            self.url_duplicates += 1
+            return self._by_url[canonical]
+
+        for source_id, existing in self._shingles.items():
+            if jaccard(snippet_shingles, existing) >= self.near_duplicate_threshold:
+                self.near_duplicates += 1
+                return source_id
+        return None
+
+    def _insert(self, source_id: str, result: Dict, canonical: str, snippet_shingles: Set[str]):
+        self._sources[source_id] = {
+            "source_id": source_id,
+            "title": result.get("title", ""),
+            "url": result.get("url", ""),
+            "snippet": result.get("snippet", ""),
+        }
+        self._by_url[canonical] = source_id
+        if snippet_shingles:
+            self._shingles[source_id] = snippet_shingles
+
+    def register(self, search_results: List[Dict]) -> List[Dict]:
+        """
+        Registra os resultados de um subtópico
+
+        Returns:
+            List[Dict]: Cópias dos resultados (sem duplicatas internas) com
+                `source_id` e `repeat` (True se a fonte já veio de outro subtópico)
+        """
+        entries = []
+        seen_here = set()
+
+        with self._lock:
+            for result in search_results:
+                canonical = canonicalize_url(result.get("url", ""))
+                snippet_shingles = shingles(result.get("snippet", ""), self.shingle_size)
+
+                source_id = self._match(canonical, snippet_shingles)
+                repeat = source_id is not None
+                if source_id is None:
+                    source_id = f"S{self._next_id}"
+                    self._next_id += 1
+                    self._insert(source_id, result, canonical, snippet_shingles)
+                else:
+                    self._by_url.setdefault(canonical, source_id)
+
+                if source_id in seen_here:
+                    continue  # Mesma fonte duas vezes na mesma busca
+                seen_here.add(source_id)
+
+                entries.append({**result, "source_id": source_id, "repeat": repeat})
+
+        return entries
+
+    def seed(self, subagent_results: List[Dict]):
+        """
+        Reaproveita as fontes de subtópicos já concluídos (rodadas anteriores do
+        reviewer ou retomada de checkpoint): mantêm seus IDs e contam como repetidas
+        """
+        with self._lock:
+            for result in subagent_results:
+                for source in result.get("web_sources") or []:
+                    source_id = source.get("source_id")
+                    if not source_id or source_id in self._sources or "snippet" not in source:
+                        continue
+                    self._insert(
+                        source_id,
+                        source,
+                        canonicalize_url(source.get("url", "")),
+                        shingles(source.get("snippet", ""), self.shingle_size)
+                    )
+
+                    # Próximos IDs continuam depois dos reaproveitados
+                    if source_id[1:].isdigit():
+                        self._next_id = max(self._next_id, int(source_id[1:]) + 1)
+
+def repeat_excerpt(content: str, max_chars: int) -> str:
+    """Trecho curto de uma fonte já analisada em outro subtópico"""
+    content = " ".join(content.split())
+    if len(content) <= max_chars:
+        return content
+    return content[:max_chars].rsplit(" ", 1)[0] + "..."
+
+def source_record(entry: Dict) -> Dict:
+    """
+    Fonte como salva no resultado do subtópico
+
+    A primeira ocorrência guarda o snippet; repetições só a referência.
+    """
+    record = {"source_id": entry["source_id"], "title": entry["title"], "url": entry["url"]}
+    if not entry.get("repeat"):
+        record["snippet"] = entry.get("snippet", "")
+    return record
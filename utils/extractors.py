@@ -0,0 +1,227 @@
+"""
+Extração de texto de documentos (TXT, Markdown, HTML, PDF, DOCX)
+
+- Registro de extratores por extensão (`register_extractor`)
+- Varredura recursiva de data/ (ignora pastas e arquivos ocultos)
+- Extração em paralelo num pool de processos (PDFs são CPU-bound)
+- Cache do texto extraído por hash do conteúdo em data/.extract_cache:
+  arquivos inalterados nunca são lidos pelo parser de novo, mesmo se
+  renomeados ou movidos
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Página (1-based; None se o formato não tem páginas) e texto
+Page = Tuple[Optional[int], str]
+
+# Registro de extratores: extensão → função que recebe o caminho e retorna as páginas
+EXTRACTORS: Dict[str, Callable[[str], List[Page]]] = {}
+
+# Muda quando a saída de algum extrator muda (invalida o cache de extração)
+EXTRACTOR_VERSION = 1
+
+EXTRACT_CACHE_DIRNAME = ".extract_cache"
+
+def register_extractor(*extensions: str):
+    """Decorator que registra um extrator para as extensões (com ponto, minúsculas)"""
+    def decorator(func: Callable[[str], List[Page]]):
+        for extension in extensions:
+            EXTRACTORS[extension] = func
+        return func
+    return decorator
+
+def supported_extensions() -> List[str]:
+    return sorted(EXTRACTORS)
+
+@register_extractor(".txt")
+def extract_txt(path: str) -> List[Page]:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return [(None, f.read())]
+
+@register_extractor(".md", ".markdown")
+def extract_markdown(path: str) -> List[Page]:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    # Front matter YAML não é conteúdo
+    text = re.sub(r"\A---\n.*?\n---\n", "", text, flags=re.DOTALL)
+    # Imagens e links: mantém só o texto
+    text = re.sub(r"!\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    text = re.sub(r"\[([^\]]+)\]\([^)]*\)", r"\1", text)
+    return [(None, text)]
+
+@register_extractor(".html", ".htm")
+def extract_html(path: str) -> List[Page]:
+    from utils.web_fetcher import extract_main_text
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        html = f.read()
+    # Exports locais: títulos e itens curtos também são conteúdo
+    return [(None, extract_main_text(html, min_words=1))]
+
+@register_extractor(".pdf")
+def extract_pdf(path: str) -> List[Page]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return [(number, page.extract_text() or "") for number, page in enumerate(reader.pages, 1)]
+
+@register_extractor(".docx")
+def extract_docx(path: str) -> List[Page]:
+    import docx
+
+    document = docx.Document(path)
+    paragraphs = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            paragraphs.append(" | ".join(cell.text for cell in row.cells))
+    return [(None, "\n".join(paragraphs))]
+
+# Pacote pip de cada extrator com dependência opcional
+OPTIONAL_PACKAGES = {".pdf": "pypdf", ".docx": "python-docx"}
+
+def iter_corpus_files(data_dir: str = "data") -> List[Path]:
+    """
+    Arquivos suportados em data_dir, recursivamente (ordenados)
+
+    Ignora pastas/arquivos ocultos (caches, checkpoints).
+    """
+    data_path = Path(data_dir)
+    if not data_path.exists():
+        return []
+
+    files = []
+    for path in data_path.rglob("*"):
+        relative = path.relative_to(data_path)
+        if any(part.startswith('.') for part in relative.parts):
+            continue
+        if path.is_file() and path.suffix.lower() in EXTRACTORS:
+            files.append(path)
+    return sorted(files)
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _extract_worker(path: str) -> Dict:
+    """Executa no pool de processos: extrai um arquivo (nunca levanta exceção)"""
+    extension = Path(path).suffix.lower()
+    try:
+        pages = EXTRACTORS[extension](path)
+        return {"pages": [[page, text] for page, text in pages]}
+    except ImportError:
+        package = OPTIONAL_PACKAGES.get(extension, extension)
+        return {"error": f"Pacote '{package}' não instalado", "missing_package": package}
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+class ExtractCache:
+    """Texto extraído por hash do conteúdo (um JSON por arquivo)"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.json")
+
+    def get(self, content_hash: str) -> Optional[List[Page]]:
+        try:
+            with open(self._path(content_hash), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != EXTRACTOR_VERSION:
+            return None
+        return [(page, text) for page, text in data["pages"]]
+
+    def put(self, content_hash: str, pages: List[Page]):
+        tmp_path = self._path(content_hash) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": EXTRACTOR_VERSION, "pages": [[page, text] for page, text in pages]}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(content_hash))
+
+def extract_files(
+    files: List[Path],
+    data_dir: str = "data",
+    max_workers: Optional[int] = None,
+    verbose: bool = False
+) -> List[Dict]:
+    """
+    Extrai o texto dos arquivos (cache por hash + pool de processos)
+
+    Returns:
+        List[Dict]: [{"source": caminho relativo a data_dir, "pages": [(página, texto), ...]}, ...]
+            na ordem de `files`; arquivos com erro ou vazios são omitidos
+    """
+    cache = ExtractCache(os.path.join(data_dir, EXTRACT_CACHE_DIRNAME))
+    data_path = Path(data_dir)
+
+    hashes = {}
+    extracted: Dict[Path, List[Page]] = {}
+    misses = []
+
+    for path in files:
+        try:
+            hashes[path] = file_hash(str(path))
+        except OSError as e:
+            if verbose:
+                print(f"{path}: Erro - {e}")
+            continue
+        pages = cache.get(hashes[path])
+        if pages is None:
+            misses.append(path)
+        else:
+            extracted[path] = pages
+
+    if misses:
+        if len(misses) > 1 and max_workers != 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                outputs = list(executor.map(_extract_worker, [str(path) for path in misses]))
+        else:
+            outputs = [_extract_worker(str(path)) for path in misses]
+
+        missing_packages = set()
+        for path, output in zip(misses, outputs):
+            package = output.get("missing_package")
+            if package and package not in missing_packages:
+                missing_packages.add(package)
+                print(f"ERRO: Pacote '{package}' não instalado (arquivos {path.suffix} ignorados)")
+                print(f"Execute: pip install {package}")
+            if "error" in output:
+                if verbose and not package:
+                    print(f"{path.relative_to(data_path)}: Erro - {output['error']}")
+                continue
+            pages = [(page, text) for page, text in output["pages"]]
+            cache.put(hashes[path], pages)
+            extracted[path] = pages
+
+    if verbose:
+        print(f"Extração: {len(files) - len(misses)} do cache, {len(misses)} extraídos")
+
+    documents = []
+    for path in files:
+        pages = [(page, text.strip()) for page, text in extracted.get(path, []) if text and text.strip()]
+        if pages:
+            documents.append({"source": str(path.relative_to(data_path)), "pages": pages})
+    return documents
+
+def to_langchain_documents(extracted: List[Dict]) -> List:
+    """Converte para Documents do LangChain (um por página) com metadata `source` e `page`"""
+    from langchain_core.documents import Document
+
+    documents = []
+    for item in extracted:
+        for page, text in item["pages"]:
+            metadata = {"source": item["source"]}
+            if page is not None:
+                metadata["page"] = page
+            documents.append(Document(page_content=text, metadata=metadata))
+    return documents
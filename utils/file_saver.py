@@ -4,8 +4,9 @@ Utilitários para salvar resultados de pesquisa
 import os
 import json
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import re
+from .evidence import canonicalize_url
 
 def sanitize_filename(text: str, max_length: int = 50) -> str:
     """Sanitiza texto para usar como nome de arquivo"""
@@ -28,6 +29,43 @@ def generate_filename(topic: str, extension: str = "txt") -> str:
     filename = f"{clean_topic}_{time_str}_{date_str}.{extension}"
     return filename
 
+def collect_web_sources(subagent_results: List[Dict]) -> Tuple[List[Dict], List[List[str]]]:
+    """
+    Fontes web únicas de todas as pesquisas
+    
+    Usa o `source_id` do EvidencePool; resultados antigos (sem ID) são
+    deduplicados pela URL canônica.
+    
+    Returns:
+        Tuple: (fontes únicas com `source_id`, IDs usados por cada pesquisa)
+    """
+    sources: Dict[str, Dict] = {}
+    ids_by_key: Dict[str, str] = {}
+    ids_per_result = []
+    
+    for result in subagent_results:
+        ids = []
+        for source in result.get('web_sources') or []:
+            key = source.get('source_id') or canonicalize_url(source.get('url', ''))
+            source_id = ids_by_key.get(key)
+            if source_id is None:
+                source_id = source.get('source_id') or f"S{len(sources) + 1}"
+                ids_by_key[key] = source_id
+                sources[source_id] = {
+                    'source_id': source_id,
+                    'title': source.get('title', ''),
+                    'url': source.get('url', ''),
+                    'snippet': source.get('snippet', '')
+                }
+            elif not sources[source_id]['snippet'] and source.get('snippet'):
+                sources[source_id]['snippet'] = source['snippet']
+            
+            if source_id not in ids:
+                ids.append(source_id)
+        ids_per_result.append(ids)
+    
+    return list(sources.values()), ids_per_result
+
 def save_web_sources_json(
     question: str,
     subtopics: List[str],
@@ -39,6 +77,9 @@ def save_web_sources_json(
     
     ← RENOMEADO de save_web_sources para save_web_sources_json
     
+    Cada fonte aparece uma vez em `sources`; cada pesquisa referencia as
+    suas por `source_ids`.
+    
     Args:
         question: Pergunta original
         subtopics: Lista de subtópicos
@@ -64,16 +105,20 @@ def save_web_sources_json(
             'query': question
         },
         'subtopics': subtopics,
+        'sources': [],
         'web_searches': []
     }
     
-    # Extrair fontes web de cada pesquisa (COMPLETAS)
-    for i, result in enumerate(subagent_results, 1):
+    # Fontes únicas (COMPLETAS) + referências de cada pesquisa
+    sources, ids_per_result = collect_web_sources(subagent_results)
+    web_data['sources'] = sources
+    
+    for i, (result, source_ids) in enumerate(zip(subagent_results, ids_per_result), 1):
         search_data = {
             'search_number': i,
             'subtopic': result['subtopic'],
             'status': result['status'],
-            'sources': result.get('web_sources', [])
+            'source_ids': source_ids
         }
         web_data['web_searches'].append(search_data)
     
@@ -83,39 +128,28 @@ def save_web_sources_json(
     
     return filepath
 
-def save_research_results(
+def format_research_report(
     question: str,
     subtopics: List[str],
     subagent_results: List[Dict],
     final_answer: str,
-    output_dir: str = "data",
-    save_web_sources: bool = False  # ← Parâmetro booleano
-) -> Dict[str, str]:
+    timestamp: Optional[datetime] = None,
+    web_sources_filename: Optional[str] = None
+) -> str:
     """
-    Salva resultados da pesquisa
+    Formata o relatório TXT legível de uma pesquisa
     
     Args:
         question: Pergunta original
         subtopics: Lista de subtópicos
         subagent_results: Resultados dos subagentes
         final_answer: Resposta final compilada
-        output_dir: Diretório de saída
-        save_web_sources: Se True, salva fontes web em JSON separado
+        timestamp: Data da pesquisa (padrão: agora)
+        web_sources_filename: Se fornecido, adiciona nota apontando para o JSON de fontes
         
     Returns:
-        Dict: {'formatted': path_txt, 'web_sources': path_json}
+        str: Conteúdo do relatório
     """
-    os.makedirs(output_dir, exist_ok=True)
-    
-    base_filename = generate_filename(question, extension='')
-    base_filename = base_filename.rstrip('.')
-    
-    result_paths = {}
-    
-    # === 1. SALVAR RELATÓRIO FORMATADO (.txt) ===
-    txt_filename = f"{base_filename}.txt"
-    txt_filepath = os.path.join(output_dir, txt_filename)
-    
     content = []
     content.append("="*70)
     content.append("DEEP RESEARCH REPORT")
@@ -123,7 +157,7 @@ def save_research_results(
     content.append("")
     
     # Metadados
-    content.append(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    content.append(f"Data: {(timestamp or datetime.now()).strftime('%d/%m/%Y %H:%M:%S')}")
     content.append(f"Pergunta: {question}")
     content.append("")
     
@@ -149,9 +183,15 @@ def save_research_results(
         if web_sources:
             content.append(f"\nFontes Web ({len(web_sources)}):")
             for j, source in enumerate(web_sources, 1):
-                content.append(f"  {j}. {source['title']}")
+                source_id = f"[{source['source_id']}] " if source.get('source_id') else ""
+                content.append(f"  {j}. {source_id}{source['title']}")
                 content.append(f"     URL: {source['url']}")
                 
+                # Fonte repetida: snippet já aparece na primeira pesquisa que a encontrou
+                if 'snippet' not in source:
+                    content.append(f"     (mesma fonte de uma pesquisa anterior)")
+                    continue
+                
                 # Truncar snippet no TXT
                 snippet = source['snippet']
                 if len(snippet) > 200:
@@ -173,17 +213,60 @@ def save_research_results(
     content.append("")
     
     # Nota sobre fontes completas
-    if save_web_sources:
+    if web_sources_filename:
         content.append("="*70)
         content.append("NOTA: Snippets completos das fontes web estão salvos no arquivo")
-        content.append(f"      {base_filename}_web_sources.json")
+        content.append(f"      {web_sources_filename}")
         content.append("="*70)
     
     content.append("")
     
+    return '\n'.join(content)
+
+def save_research_results(
+    question: str,
+    subtopics: List[str],
+    subagent_results: List[Dict],
+    final_answer: str,
+    output_dir: str = "data",
+    save_web_sources: bool = False  # ← Parâmetro booleano
+) -> Dict[str, str]:
+    """
+    Salva resultados da pesquisa
+    
+    Args:
+        question: Pergunta original
+        subtopics: Lista de subtópicos
+        subagent_results: Resultados dos subagentes
+        final_answer: Resposta final compilada
+        output_dir: Diretório de saída
+        save_web_sources: Se True, salva fontes web em JSON separado
+        
+    Returns:
+        Dict: {'formatted': path_txt, 'web_sources': path_json}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    base_filename = generate_filename(question, extension='')
+    base_filename = base_filename.rstrip('.')
+    
+    result_paths = {}
+    
+    # === 1. SALVAR RELATÓRIO FORMATADO (.txt) ===
+    txt_filename = f"{base_filename}.txt"
+    txt_filepath = os.path.join(output_dir, txt_filename)
+    
+    content = format_research_report(
+        question,
+        subtopics,
+        subagent_results,
+        final_answer,
+        web_sources_filename=f"{base_filename}_web_sources.json" if save_web_sources else None
+    )
+    
     # Salvar TXT
     with open(txt_filepath, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(content))
+        f.write(content)
     
     result_paths['formatted'] = txt_filepath
     
@@ -230,4 +313,31 @@ def list_research_files(data_dir: str = "data", limit: int = 10) -> List[Dict]:
             })
     
     files.sort(key=lambda x: x['modified'], reverse=True)
-    return files[:limit]
\ No newline at end of file
+    return files[:limit]
+
+def export_archived_run(archive, run_id: str, output_dir: str = "data") -> str:
+    """
+    Exporta uma execução do arquivo comprimido (RunArchive) como relatório TXT
+    
+    Returns:
+        str: Caminho do arquivo gerado
+    """
+    record = archive.get(run_id)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    timestamp = datetime.fromisoformat(record['timestamp'])
+    filename = f"{sanitize_filename(record['question'])}_{timestamp.strftime('%H%M%S')}_{timestamp.strftime('%d%m%Y')}.txt"
+    filepath = os.path.join(output_dir, filename)
+    
+    content = format_research_report(
+        record['question'],
+        record['subtopics'],
+        record['results'],
+        record['final_answer'],
+        timestamp=timestamp
+    )
+    
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+    
+    return filepath
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""
+Deep fetch: baixa as páginas dos resultados web, extrai o texto principal
+e seleciona apenas os trechos mais relevantes para o subtópico
+"""
+import asyncio
+import ipaddress
+import re
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+USER_AGENT = "Mozilla/5.0 (compatible; DeepResearchBot/1.0)"
+
+# Redirects seguidos por página (cada destino é verificado de novo)
+MAX_REDIRECTS = 5
+
+# Tags cujo conteúdo nunca é texto principal
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe", "button", "select"}
+
+# Tags que quebram parágrafo
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "table",
+              "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "dd", "dt"}
+
+class _MainTextParser(HTMLParser):
+    """Coleta o texto visível, ignorando navegação, scripts e afins"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List[str] = []
+        self._current: List[str] = []
+        self._skip_depth = 0
+
+    def _flush(self):
+        text = " ".join("".join(self._current).split())
+        if text:
+            self.blocks.append(text)
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+def extract_main_text(html: str, min_words: int = 6) -> str:
+    """
+    Extrai o texto principal de uma página HTML
+
+    Descarta blocos curtos (menus, botões, rodapés) com menos de `min_words` palavras.
+    """
+    parser = _MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+
+    blocks = [block for block in parser.blocks if len(block.split()) >= min_words]
+    return "\n\n".join(blocks)
+
+def chunk_text(text: str, chunk_chars: int = 600) -> List[str]:
+    """Divide o texto em pedaços de até `chunk_chars`, respeitando fim de frase quando possível"""
+    sentences = re.split(r"(?<=[.!?])\s+|\n{2,}", text)
+    chunks = []
+    current = ""
+
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:chunk_chars])
+            sentence = sentence[chunk_chars:]
+        if current and len(current) + len(sentence) + 1 > chunk_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+def is_public_address(address: str) -> bool:
+    """IP roteável na internet (não loopback, rede privada, link-local, multicast, ...)"""
+    try:
+        ip = ipaddress.ip_address(address.split("%")[0])
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+class _HostPolicy:
+    """
+    Hosts que podem ser baixados: todos os IPs resolvidos são públicos, ou o
+    host foi liberado explicitamente (`allowed_hosts`, ex: servidor de teste local)
+
+    Resultados de busca e redirects podem apontar para a rede interna
+    (metadata da nuvem, serviços em localhost) de quem embute o sistema.
+    """
+
+    def __init__(self, allowed_hosts: Iterable[str] = ()):
+        self.allowed_hosts = {host.lower() for host in allowed_hosts}
+        self._resolved: Dict[str, bool] = {}
+
+    async def allows(self, host: str) -> bool:
+        host = host.lower()
+        if not host:
+            return False
+        if host in self.allowed_hosts:
+            return True
+        if host not in self._resolved:
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+                self._resolved[host] = bool(infos) and all(is_public_address(info[4][0]) for info in infos)
+            except OSError:
+                self._resolved[host] = False
+        return self._resolved[host]
+
+async def _fetch_one(
+    client,
+    url: str,
+    host_limits: Dict[str, asyncio.Semaphore],
+    per_host: int,
+    policy: _HostPolicy,
+    max_bytes: int,
+    timeout: float
+) -> Optional[str]:
+
+    async def _download():
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            host = urlsplit(current).hostname or ""
+            if not await policy.allows(host):
+                return None
+
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(per_host)
+            async with host_limits[host]:
+                async with client.stream("GET", current) as response:
+                    # Redirects seguidos aqui: o destino passa pela mesma verificação de host
+                    if response.is_redirect:
+                        location = response.headers.get("location")
+                        current = urljoin(current, location) if location else ""
+                        if not current.startswith(("http://", "https://")):
+                            return None
+                        continue
+
+                    if response.status_code >= 400:
+                        return None
+                    content_type = response.headers.get("content-type", "")
+                    if content_type and "html" not in content_type and "text" not in content_type:
+                        return None
+
+                    data = bytearray()
+                    async for part in response.aiter_bytes():
+                        data.extend(part)
+                        if len(data) >= max_bytes:
+                            del data[max_bytes:]
+                            break
+
+                    return bytes(data).decode(response.encoding or "utf-8", errors="replace")
+        return None  # Redirects demais
+
+    try:
+        return await asyncio.wait_for(_download(), timeout=timeout)
+    except Exception:
+        return None
+
+async def _fetch_all(
+    urls: List[str],
+    max_connections: int,
+    per_host: int,
+    max_bytes: int,
+    timeout: float,
+    allowed_hosts: Iterable[str] = ()
+) -> Dict[str, Optional[str]]:
+    import httpx
+
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    policy = _HostPolicy(allowed_hosts)
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(timeout),
+        follow_redirects=False,
+        headers={"User-Agent": USER_AGENT}
+    ) as client:
+        pages = await asyncio.gather(*[
+            _fetch_one(client, url, host_limits, per_host, policy, max_bytes, timeout)
+            for url in urls
+        ])
+
+    return dict(zip(urls, pages))
+
+def fetch_pages(
+    urls: List[str],
+    max_connections: int = 10,
+    per_host: int = 2,
+    max_bytes: int = 2_000_000,
+    timeout: float = 8.0,
+    allowed_hosts: Iterable[str] = ()
+) -> Dict[str, Optional[str]]:
+    """
+    Baixa várias páginas concorrentemente (cliente assíncrono com pool limitado)
+
+    Args:
+        urls: URLs a baixar
+        max_connections: Conexões simultâneas no total
+        per_host: Conexões simultâneas por host
+        max_bytes: Bytes máximos lidos por página (o resto é descartado)
+        timeout: Tempo máximo por página (segundos)
+        allowed_hosts: Hosts baixados mesmo sem IP público (ex: servidor de
+            teste em localhost); os demais só se todos os IPs forem públicos,
+            inclusive os destinos de redirects
+
+    Returns:
+        Dict[str, Optional[str]]: URL → HTML (None se falhou ou host não permitido)
+
+    Pode ser chamada de dentro de um event loop (ex: `ResearchSession.research`
+    num handler async): nesse caso os downloads rodam numa thread com loop próprio.
+    """
+    urls = [url for url in dict.fromkeys(urls) if url.startswith(("http://", "https://"))]
+    if not urls:
+        return {}
+
+    def fetch():
+        return asyncio.run(_fetch_all(urls, max_connections, per_host, max_bytes, timeout, allowed_hosts))
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return fetch()
+
+    # asyncio.run não pode rodar numa thread que já tem um loop em andamento
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="web-fetch") as executor:
+        return executor.submit(fetch).result()
+
+def select_top_passages(query: str, passages: List[Dict], embeddings, top_k: int) -> List[Dict]:
+    """
+    Índice vetorial efêmero: embeda os trechos e retorna os `top_k` mais similares à query
+
+    Args:
+        passages: [{"url": str, "content": str}, ...]
+    """
+    import numpy as np
+
+    if not passages:
+        return []
+
+    vectors = np.asarray(embeddings.embed_documents([p["content"] for p in passages]), dtype=np.float32)
+    query_vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    query_vector /= np.linalg.norm(query_vector) + 1e-12
+    scores = vectors @ query_vector
+
+    best = np.argsort(-scores)[:top_k]
+    return [{**passages[i], "score": float(scores[i])} for i in best]
+
+def deep_fetch_results(query: str, search_results: List[Dict], embeddings, config, verbose: bool = False) -> List[Dict]:
+    """
+    Enriquece os resultados web com os trechos mais relevantes das páginas completas
+
+    Returns:
+        List[Dict]: Cópias dos resultados com a chave extra `passages` (List[str]);
+        resultados cuja página não pôde ser baixada ficam só com o snippet
+    """
+    try:
+        pages = fetch_pages(
+            [result["url"] for result in search_results],
+            max_connections=config.fetch_max_connections,
+            per_host=config.fetch_per_host,
+            max_bytes=config.fetch_max_bytes,
+            timeout=config.fetch_timeout
+        )
+    except ImportError:
+        print("ERRO: Pacote 'httpx' não instalado (necessário para --deep-fetch)")
+        print("Execute: pip install httpx")
+        return search_results
+
+    passages = []
+    for url, html in pages.items():
+        if not html:
+            continue
+        for chunk in chunk_text(extract_main_text(html), config.fetch_chunk_chars):
+            passages.append({"url": url, "content": chunk})
+
+    top = select_top_passages(query, passages, embeddings, config.fetch_top_passages)
+
+    if verbose:
+        fetched = sum(1 for html in pages.values() if html)
+        print(f"   Deep fetch: {fetched}/{len(search_results)} páginas, {len(passages)} trechos → {len(top)} selecionados")
+
+    by_url: Dict[str, List[str]] = {}
+    for passage in top:
+        by_url.setdefault(passage["url"], []).append(passage["content"])
+
+    return [{**result, "passages": by_url.get(result["url"], [])} for result in search_results]
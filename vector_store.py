@@ -1,70 +1,229 @@
 """
-Sistema de Vector Store (FAISS + RAG) com cache
+Sistema de Vector Store (FAISS ou NumPy compacto + RAG) com cache
 """
-from typing import List
+from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import pickle
 import os
+import shutil
 from pathlib import Path
 from langchain_community.vectorstores import FAISS
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config import Config
+from embedding_cache import CachedEmbeddings
+from numpy_store import NumpyVectorStore
+from small_to_big import SmallToBigStore, ParentStore, split_child_chunks
+from utils.extractors import iter_corpus_files, extract_files, to_langchain_documents
 
-def get_cache_path(data_dir: str = "data") -> str:
-    """Retorna caminho para o cache do vector store"""
+# Separadores do splitter (fazem parte da fingerprint do índice)
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+# Arquivos de controle dentro de cada variante do cache
+MANIFEST_FILENAME = "fingerprint.json"
+FILES_MANIFEST_FILENAME = "files.json"
+LAST_USED_FILENAME = ".last_used"
+
+# Backends de índice: nome → dtype do NumpyVectorStore (None = FAISS)
+VECTOR_BACKENDS = {"faiss": None, "numpy_f16": "float16", "numpy_int8": "int8"}
+
+def get_cache_root(data_dir: str = "data") -> str:
+    """Retorna pasta raiz do cache (uma subpasta por variante de configuração)"""
     return os.path.join(data_dir, ".vectorstore_cache")
 
-def should_rebuild_cache(data_dir: str = "data") -> bool:
+def index_settings(config: Config) -> Dict:
+    """Configurações que mudam o conteúdo do índice"""
+    return {
+        "embedding_model": config.embedding_model,
+        "embedding_backend": config.embedding_backend,
+        "embedding_onnx_file": config.embedding_onnx_file if config.embedding_backend.startswith("onnx") else None,
+        "chunk_size": config.chunk_size,
+        "chunk_overlap": config.chunk_overlap,
+        "child_chunk_size": config.child_chunk_size,
+        "separators": CHUNK_SEPARATORS,
+        "vector_backend": config.vector_backend,
+    }
+
+def index_fingerprint(config: Config) -> str:
+    """Hash curto das configurações do índice"""
+    payload = json.dumps(index_settings(config), sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def get_cache_path(config: Config, data_dir: str = "data") -> str:
+    """Retorna caminho para o cache do vector store da configuração atual"""
+    return os.path.join(get_cache_root(data_dir), index_fingerprint(config))
+
+def should_rebuild_cache(config: Config, data_dir: str = "data") -> bool:
     """
     Verifica se precisa reconstruir o cache
     
     Reconstrói se:
-    - Cache não existe
-    - Algum .txt foi modificado após a criação do cache
+    - Cache desta configuração não existe
+    - A lista de documentos mudou (arquivo novo ou removido, em qualquer subpasta)
+    - Algum documento foi modificado após a criação do cache
     """
-    cache_path = get_cache_path(data_dir)
+    cache_path = get_cache_path(config, data_dir)
+    manifest_path = os.path.join(cache_path, MANIFEST_FILENAME)
     
-    # Se cache não existe, precisa construir
-    if not os.path.exists(cache_path):
+    # Se cache não existe, precisa construir (variante só com shards não tem índice único)
+    if not os.path.exists(manifest_path) or not _index_exists(cache_path, config):
         return True
     
-    # Pegar timestamp do cache
-    cache_mtime = os.path.getmtime(cache_path)
+    files = iter_corpus_files(data_dir)
+    return should_rebuild_shard(cache_path, files)
+
+def _write_manifest(variant_path: str, config: Config):
+    os.makedirs(variant_path, exist_ok=True)
+    with open(os.path.join(variant_path, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(index_settings(config), f, indent=2)
+
+def touch_cache_variant(variant_path: str):
+    """Marca a variante como usada agora (ordem do LRU)"""
+    os.makedirs(variant_path, exist_ok=True)
+    with open(os.path.join(variant_path, LAST_USED_FILENAME), 'w') as f:
+        f.write("")
+
+def evict_cache_variants(data_dir: str, keep: int, current: Optional[str] = None, verbose: bool = False) -> List[str]:
+    """
+    Remove as variantes menos usadas recentemente, mantendo `keep` no disco
     
-    # Verificar se algum .txt é mais novo que o cache
-    data_path = Path(data_dir)
-    for txt_file in data_path.glob("*.txt"):
-        if os.path.getmtime(txt_file) > cache_mtime:
-            return True  # Arquivo modificado
+    Args:
+        current: Variante em uso (nunca removida)
+        
+    Returns:
+        List[str]: Fingerprints removidas
+    """
+    root = get_cache_root(data_dir)
+    if not os.path.isdir(root):
+        return []
+    
+    def last_used(path: str) -> float:
+        marker = os.path.join(path, LAST_USED_FILENAME)
+        return os.path.getmtime(marker if os.path.exists(marker) else path)
+    
+    variants = [
+        os.path.join(root, name) for name in os.listdir(root)
+        if os.path.isfile(os.path.join(root, name, MANIFEST_FILENAME))
+    ]
+    variants.sort(key=last_used, reverse=True)
     
-    return False  # Cache está atualizado
+    evicted = []
+    kept = 1 if current else 0
+    for path in variants:
+        if current and os.path.abspath(path) == os.path.abspath(current):
+            continue
+        if kept < keep:
+            kept += 1
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        evicted.append(os.path.basename(path))
+    
+    if verbose and evicted:
+        print(f"   - Cache: {len(evicted)} variante(s) antiga(s) removida(s)")
+    return evicted
+
+def get_embedding_cache_path(data_dir: str = "data") -> str:
+    """Retorna caminho para o cache de embeddings por conteúdo"""
+    return os.path.join(data_dir, ".embedding_cache")
+
+def _index_embeddings(embeddings, config: Config, data_dir: str):
+    """Embeddings usados na construção do índice (com cache por conteúdo, se ativado)"""
+    if not config.embedding_cache or isinstance(embeddings, CachedEmbeddings):
+        return embeddings
+    # Backends quantizados e exports ONNX diferentes geram vetores diferentes:
+    # chave por modelo + backend + arquivo .onnx (como em index_settings)
+    model_key = f"{config.embedding_model}:{config.embedding_backend}"
+    if config.embedding_backend.startswith("onnx") and config.embedding_onnx_file:
+        model_key += f":{config.embedding_onnx_file}"
+    return CachedEmbeddings(embeddings, model_key, get_embedding_cache_path(data_dir))
+
+def _write_files_manifest(cache_path: str, files: List[Path]):
+    with open(os.path.join(cache_path, FILES_MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump([str(path) for path in files], f)
+
+def _index_exists(cache_path: str, config: Config) -> bool:
+    if config.child_chunk_size and not ParentStore.exists(cache_path):
+        return False
+    if VECTOR_BACKENDS[config.vector_backend] is None:
+        return os.path.exists(os.path.join(cache_path, "index.faiss"))
+    return NumpyVectorStore.exists(cache_path)
+
+def _load_index(cache_path: str, embeddings, config: Config):
+    """Carrega o índice salvo no backend configurado"""
+    dtype = VECTOR_BACKENDS[config.vector_backend]
+    if dtype is None:
+        index = FAISS.load_local(cache_path, embeddings, allow_dangerous_deserialization=True)
+    else:
+        # Vetores em memmap: só as páginas tocadas pela busca são lidas do disco
+        index = NumpyVectorStore.load_local(cache_path, embeddings)
+    if config.child_chunk_size:
+        # Pais também em memmap: só os dos hits vencedores são lidos
+        return SmallToBigStore.load_local(index, cache_path, config.parent_window_chars)
+    return index
+
+def _build_index(documents: List[Union[str, Document]], embeddings, config: Config, data_dir: str = "data"):
+    """Divide documentos em chunks e cria o índice (metadata `source`/`page` vai para cada chunk)"""
+    # Converter strings em Document objects
+    docs = [doc if isinstance(doc, Document) else Document(page_content=doc) for doc in documents]
+    
+    # Dividir em chunks (small-to-big: filhos sem overlap, documentos viram os pais)
+    parents = None
+    if config.child_chunk_size:
+        chunks, parents = split_child_chunks(docs, config.child_chunk_size, CHUNK_SEPARATORS)
+    else:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            separators=CHUNK_SEPARATORS
+        )
+        chunks = splitter.split_documents(docs)
+    
+    if config.verbose:
+        print(f"   - {len(chunks)} chunks criados" + (f" (filhos de {len(parents)} pais)" if parents is not None else ""))
+    
+    # Criar índice (chunks já embedados antes vêm do cache)
+    index_embeddings = _index_embeddings(embeddings, config, data_dir)
+    dtype = VECTOR_BACKENDS[config.vector_backend]
+    if dtype is None:
+        vectorstore = FAISS.from_documents(chunks, index_embeddings)
+    else:
+        vectorstore = NumpyVectorStore.from_documents(chunks, index_embeddings, dtype=dtype)
+        # Queries não passam pelo cache de embeddings
+        vectorstore.embeddings = embeddings
+    
+    if config.verbose and isinstance(index_embeddings, CachedEmbeddings):
+        print(f"   - Cache de embeddings: {index_embeddings.hits} reaproveitados, {index_embeddings.misses} novos")
+    
+    if parents is not None:
+        return SmallToBigStore(vectorstore, ParentStore(parents), config.parent_window_chars)
+    return vectorstore
 
 def create_vector_store(documents: List[str], embeddings, config: Config, data_dir: str = "data"):
     """
-    Cria ou carrega FAISS vector store (com cache)
+    Cria ou carrega o vector store (com cache)
     
     Args:
-        documents: Lista de strings (documentos)
+        documents: Lista de Documents (com metadata) ou strings
         embeddings: Modelo de embeddings
         config: Configurações
         data_dir: Pasta dos documentos
         
     Returns:
-        FAISS: Vector store indexado
+        FAISS ou NumpyVectorStore (conforme `config.vector_backend`), dentro de um
+        SmallToBigStore se `config.child_chunk_size` estiver definido: Vector store indexado
     """
-    cache_path = get_cache_path(data_dir)
+    cache_path = get_cache_path(config, data_dir)
     
     # Verificar se pode usar cache
-    if not should_rebuild_cache(data_dir) and os.path.exists(cache_path):
+    if not should_rebuild_cache(config, data_dir):
         if config.verbose:
-            print(f"\nCarregando vector store do cache...")
+            print(f"\nCarregando vector store do cache ({os.path.basename(cache_path)})...")
         
         try:
-            vectorstore = FAISS.load_local(
-                cache_path, 
-                embeddings,
-                allow_dangerous_deserialization=True
-            )
+            vectorstore = _load_index(cache_path, embeddings, config)
+            touch_cache_variant(cache_path)
             
             if config.verbose:
                 print("Cache carregado com sucesso")
@@ -80,27 +239,16 @@ def create_vector_store(documents: List[str], embeddings, config: Config, data_d
         print(f"\nCriando vector store...")
         print(f"   - {len(documents)} documentos")
     
-    # Converter strings em Document objects
-    docs = [Document(page_content=doc) for doc in documents]
-    
-    # Dividir em chunks
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=config.chunk_size,
-        chunk_overlap=config.chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    
-    chunks = splitter.split_documents(docs)
-    
-    if config.verbose:
-        print(f"   - {len(chunks)} chunks criados")
-    
-    # Criar índice FAISS
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+    vectorstore = _build_index(documents, embeddings, config, data_dir)
     
     # Salvar cache
     try:
         vectorstore.save_local(cache_path)
+        _write_files_manifest(cache_path, iter_corpus_files(data_dir))
+        # Manifesto gravado por último: marca a variante como completa
+        _write_manifest(cache_path, config)
+        touch_cache_variant(cache_path)
+        evict_cache_variants(data_dir, config.max_cached_indexes, current=cache_path, verbose=config.verbose)
         if config.verbose:
             print(f"Cache salvo em: {cache_path}")
     except Exception as e:
@@ -112,17 +260,197 @@ def create_vector_store(documents: List[str], embeddings, config: Config, data_d
     
     return vectorstore
 
-def search_documents(vectorstore, query: str, k: int = 5) -> List[str]:
+# === SHARDS ===
+ROOT_SHARD = "_root"  # Arquivos no topo de data_dir
+
+def get_shards_path(config: Config, data_dir: str = "data") -> str:
+    """Retorna pasta onde ficam os caches de cada shard (dentro da variante da configuração)"""
+    return os.path.join(get_cache_path(config, data_dir), "shards")
+
+def discover_shards(data_dir: str = "data") -> Dict[str, List[Path]]:
+    """
+    Particiona o corpus em shards: um por subdiretório (recursivo) + um para
+    os arquivos do topo de data_dir
+    
+    Returns:
+        Dict[str, List[Path]]: nome do shard → documentos (todos os formatos suportados)
+    """
+    data_path = Path(data_dir)
+    shards = {}
+    
+    for path in iter_corpus_files(data_dir):
+        parts = path.relative_to(data_path).parts
+        name = parts[0] if len(parts) > 1 else ROOT_SHARD
+        shards.setdefault(name, []).append(path)
+    
+    # _root primeiro, depois subdiretórios em ordem alfabética
+    return dict(sorted(shards.items(), key=lambda item: (item[0] != ROOT_SHARD, item[0])))
+
+def should_rebuild_shard(cache_path: str, files: List[Path]) -> bool:
+    """
+    Verifica se um shard precisa ser reconstruído
+    
+    Reconstrói se:
+    - Cache do shard não existe
+    - A lista de arquivos mudou (arquivo novo ou removido)
+    - Algum arquivo do shard foi modificado após a criação do cache
+    """
+    manifest_path = os.path.join(cache_path, FILES_MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return True
+    
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        cached_files = json.load(f)
+    if cached_files != [str(path) for path in files]:
+        return True
+    
+    cache_mtime = os.path.getmtime(manifest_path)
+    return any(os.path.getmtime(path) > cache_mtime for path in files)
+
+def _load_files(files: List[Path], data_dir: str, verbose: bool = False) -> List[Document]:
+    """Extrai os arquivos (cache de extração por hash) como Documents com metadata"""
+    return to_langchain_documents(extract_files(files, data_dir=data_dir, verbose=verbose))
+
+class ShardedVectorStore:
+    """
+    Conjunto de índices independentes (um por shard, FAISS, NumpyVectorStore ou SmallToBigStore)
+    
+    A busca consulta todos os shards em paralelo (FAISS libera o GIL) e
+    junta os resultados num top-k global pela distância.
+    """
+    
+    def __init__(self, shards: Dict[str, Union[FAISS, NumpyVectorStore, SmallToBigStore]], embeddings, max_workers: int = 4, default_shards: Optional[List[str]] = None):
+        self.shards = shards
+        self.embeddings = embeddings
+        self.default_shards = default_shards
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="shard-search")
+    
+    def similarity_search_with_score(self, query: str, k: int = 5, shards: Optional[List[str]] = None):
+        """
+        Busca em paralelo nos shards selecionados
+        
+        Args:
+            shards: Nomes dos shards a consultar (None = `default_shards` ou todos)
+            
+        Returns:
+            List[Tuple[Document, float]]: top-k global (menor distância primeiro)
+        """
+        # Embedding da query calculado uma única vez para todos os shards
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k=k, shards=shards)
+    
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 5, shards: Optional[List[str]] = None):
+        """Busca em paralelo nos shards selecionados com o embedding já calculado"""
+        names = shards or self.default_shards or list(self.shards)
+        selected = [self.shards[name] for name in names if name in self.shards]
+        if not selected:
+            return []
+        
+        futures = [
+            self._executor.submit(index.similarity_search_with_score_by_vector, embedding, k)
+            for index in selected
+        ]
+        
+        hits = []
+        for future in futures:
+            hits.extend(future.result())
+        
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+    
+    def similarity_search(self, query: str, k: int = 5, shards: Optional[List[str]] = None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, shards=shards)]
+    
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 5, shards: Optional[List[str]] = None):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, shards=shards)]
+
+def create_sharded_vector_store(embeddings, config: Config, data_dir: str = "data") -> ShardedVectorStore:
+    """
+    Cria ou carrega um índice por shard (subdiretório de data_dir)
+    
+    Cada shard tem seu próprio cache e só é reconstruído quando os SEUS arquivos mudam.
+    
+    Returns:
+        ShardedVectorStore: Vector store particionado
+    """
+    shard_files = discover_shards(data_dir)
+    variant_path = get_cache_path(config, data_dir)
+    shards_path = get_shards_path(config, data_dir)
+    
+    if config.verbose:
+        print(f"\nCarregando vector store particionado ({len(shard_files)} shards)...")
+    
+    shards = {}
+    for name, files in shard_files.items():
+        cache_path = os.path.join(shards_path, name)
+        
+        if not should_rebuild_shard(cache_path, files):
+            try:
+                shards[name] = _load_index(cache_path, embeddings, config)
+                if config.verbose:
+                    print(f"   - {name}: cache carregado")
+                continue
+            except Exception as e:
+                if config.verbose:
+                    print(f"   - {name}: erro ao carregar cache ({e}), reconstruindo")
+        
+        documents = _load_files(files, data_dir, verbose=config.verbose)
+        if not documents:
+            continue
+        
+        if config.verbose:
+            print(f"   - {name}: construindo índice ({len(documents)} documentos)")
+        
+        shards[name] = _build_index(documents, embeddings, config, data_dir)
+        
+        try:
+            shards[name].save_local(cache_path)
+            _write_files_manifest(cache_path, files)
+        except Exception as e:
+            if config.verbose:
+                print(f"Erro ao salvar cache do shard {name}: {e}")
+    
+    try:
+        if not os.path.exists(os.path.join(variant_path, MANIFEST_FILENAME)):
+            _write_manifest(variant_path, config)
+        touch_cache_variant(variant_path)
+        evict_cache_variants(data_dir, config.max_cached_indexes, current=variant_path, verbose=config.verbose)
+    except Exception as e:
+        if config.verbose:
+            print(f"Erro ao atualizar cache: {e}")
+    
+    if config.verbose:
+        print("Vector store particionado pronto")
+    
+    return ShardedVectorStore(
+        shards,
+        embeddings,
+        max_workers=config.shard_search_workers,
+        default_shards=config.search_shards
+    )
+
+def retrieved_doc_chars(config: Config) -> int:
+    """Tamanho de cada documento recuperado no prompt (small-to-big: a janela inteira do pai)"""
+    return config.parent_window_chars if config.child_chunk_size else 500
+
+def search_documents(vectorstore, query: str, k: int = 5, shards: Optional[List[str]] = None) -> List[str]:
     """
     Busca documentos relevantes
     
     Args:
-        vectorstore: FAISS vector store
+        vectorstore: FAISS, NumpyVectorStore, SmallToBigStore ou ShardedVectorStore
         query: Pergunta/query
         k: Número de documentos a retornar
+        shards: Filtrar shards consultados (apenas ShardedVectorStore)
         
     Returns:
-        List[str]: Documentos recuperados
+        List[str]: Documentos recuperados (janelas dos pais no modo small-to-big)
     """
-    docs = vectorstore.similarity_search(query, k=k)
-    return [doc.page_content for doc in docs]
\ No newline at end of file
+    if shards is not None:
+        docs = vectorstore.similarity_search(query, k=k, shards=shards)
+    else:
+        docs = vectorstore.similarity_search(query, k=k)
+    return [doc.page_content for doc in docs]
+
+def search_documents_by_vector(vectorstore, embedding: List[float], k: int = 5) -> List[str]:
+    """Como `search_documents`, com o embedding da query já calculado (ex: queries embedadas em batch)"""
+    return [doc.page_content for doc in vectorstore.similarity_search_by_vector(embedding, k=k)]
@@ -0,0 +1,153 @@
+"""
+Harness do deep fetch (utils/web_fetcher.py) contra um servidor falso
+
+Sobe um servidor HTTP mínimo em localhost (http.server, sem rede externa) e
+verifica o `fetch_pages`:
+- Limite por host: nunca mais que `per_host` downloads simultâneos no mesmo host
+  (hosts diferentes não dividem o limite)
+- Limite de bytes: páginas grandes são cortadas em `max_bytes`
+- Timeout: um servidor travado não segura a busca além de `timeout`
+- Hosts internos: sem liberação explícita, loopback não é baixado; um redirect
+  de um host liberado para um host interno também é bloqueado
+
+Uso:
+    python web_fetcher_harness.py
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.web_fetcher import fetch_pages
+
+class FakePageServer(ThreadingHTTPServer):
+    """Servidor falso: conta requisições e o pico de requisições simultâneas"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakePageHandler)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.peak = 0
+        self.delay = 0.0
+        self.body_bytes = 2000
+
+    def url(self, path: str, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.server_port}{path}"
+
+    def reset(self, delay: float = 0.0, body_bytes: int = 2000):
+        with self.lock:
+            self.requests = 0
+            self.active = 0
+            self.peak = 0
+        self.delay = delay
+        self.body_bytes = body_bytes
+
+class FakePageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        try:
+            if self.path.startswith("/redirect-internal"):
+                # Destino interno (mesmo servidor, outro nome de host)
+                self.send_response(302)
+                self.send_header("Location", self.server.url("/page", host="localhost"))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if self.server.delay:
+                time.sleep(self.server.delay)
+            body = b"<html><body><p>" + b"x" * self.server.body_bytes + b"</p></body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Cliente desistiu (timeout/limite de bytes)
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+def check_per_host_limit(server: FakePageServer, pages: int = 8, per_host: int = 2) -> str:
+    server.reset(delay=0.1)
+    urls = [server.url(f"/page?{i}") for i in range(pages)]
+    result = fetch_pages(urls, max_connections=10, per_host=per_host, allowed_hosts=["127.0.0.1"])
+    assert all(result[url] for url in urls), "página não baixada"
+    assert server.peak <= per_host, f"{server.peak} downloads simultâneos no mesmo host (limite {per_host})"
+
+    # Dois nomes para o mesmo servidor: cada host tem o seu limite
+    server.reset(delay=0.1)
+    urls = [server.url(f"/page?{i}", host=host) for i in range(pages // 2) for host in ("127.0.0.1", "localhost")]
+    fetch_pages(urls, max_connections=10, per_host=per_host, allowed_hosts=["127.0.0.1", "localhost"])
+    assert server.peak <= 2 * per_host, f"{server.peak} downloads simultâneos em 2 hosts"
+    return f"{pages} páginas no mesmo host, pico de {per_host} simultâneas; 2 hosts, pico de {server.peak}"
+
+def check_byte_cap(server: FakePageServer, max_bytes: int = 10_000) -> str:
+    server.reset(body_bytes=1_000_000)
+    url = server.url("/big")
+    html = fetch_pages([url], max_bytes=max_bytes, allowed_hosts=["127.0.0.1"])[url]
+    assert html, "página não baixada"
+    assert len(html.encode("utf-8")) <= max_bytes, f"{len(html)} caracteres lidos (limite {max_bytes} bytes)"
+    return f"página de ~1 MB cortada em {len(html)} bytes (max_bytes={max_bytes})"
+
+def check_timeout(server: FakePageServer, timeout: float = 0.3) -> str:
+    server.reset(delay=2.0)
+    url = server.url("/hang")
+    start = time.monotonic()
+    html = fetch_pages([url], timeout=timeout, allowed_hosts=["127.0.0.1"])[url]
+    elapsed = time.monotonic() - start
+    assert html is None, "servidor travado respondeu antes do timeout"
+    assert elapsed < timeout + 0.5, f"busca liberada só após {elapsed:.2f}s"
+    return f"servidor travado, busca liberada em {elapsed:.2f}s (timeout={timeout}s)"
+
+def check_internal_hosts(server: FakePageServer) -> str:
+    server.reset()
+    url = server.url("/page")
+    assert fetch_pages([url])[url] is None, "loopback baixado sem liberação"
+    assert server.requests == 0, f"{server.requests} requisições a um host bloqueado"
+
+    # Só 127.0.0.1 liberado: o redirect para "localhost" não é seguido
+    server.reset()
+    url = server.url("/redirect-internal")
+    assert fetch_pages([url], allowed_hosts=["127.0.0.1"])[url] is None, "redirect para host interno seguido"
+    assert server.requests == 1, f"{server.requests} requisições (esperado: só a do redirect)"
+    return "loopback bloqueado; redirect para host interno bloqueado após 1 requisição"
+
+CHECKS = [
+    ("Limite por host", check_per_host_limit),
+    ("Limite de bytes", check_byte_cap),
+    ("Timeout", check_timeout),
+    ("Hosts internos", check_internal_hosts),
+]
+
+def main():
+    server = FakePageServer()
+    threading.Thread(target=server.serve_forever, name="fake-page-server", daemon=True).start()
+
+    failures = 0
+    try:
+        for name, check in CHECKS:
+            try:
+                print(f"✅ {name}: {check(server)}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {name}: {type(e).__name__}: {e}")
+    finally:
+        server.shutdown()
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()